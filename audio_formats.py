@@ -0,0 +1,173 @@
+"""
+Audio output formats
+Content negotiation between the pitch audio formats (MP3 straight from ElevenLabs,
+Opus/Vorbis in Ogg transcoded with pydub + ffmpeg, uncompressed WAV) and a process
+pool for the transcoding, so CPU-bound encoding never runs on the event loop
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+# ffmpeg binary pydub shells out to (e.g. /opt/bin/ffmpeg from a serverless layer)
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+
+class AudioFormat:
+    """One audio representation a client can ask for"""
+
+    __slots__ = ("key", "media_type", "accepts", "extension", "codec", "bitrate")
+
+    def __init__(self, key: str, media_type: str, accepts: tuple, extension: str,
+                 codec: str = None, bitrate: str = None):
+        """
+        Args:
+            key: ?format= value
+            media_type: Content-Type of the response
+            accepts: Accept media types this format satisfies
+            extension: File extension for Content-Disposition
+            codec: ffmpeg encoder used when the format has to be transcoded (None = never transcoded)
+            bitrate: Encoder bitrate
+        """
+        self.key = key
+        self.media_type = media_type
+        self.accepts = accepts
+        self.extension = extension
+        self.codec = codec
+        self.bitrate = bitrate
+
+    def __repr__(self):
+        return f"AudioFormat({self.key!r})"
+
+
+# In server preference order: MP3 plays everywhere, Opus is the smallest for speech
+AUDIO_FORMATS = {
+    "mp3": AudioFormat("mp3", "audio/mpeg", ("audio/mpeg", "audio/mp3"), "mp3",
+                       codec="libmp3lame", bitrate="64k"),
+    "opus": AudioFormat("opus", "audio/ogg; codecs=opus", ("audio/opus", "audio/ogg"), "opus",
+                        codec="libopus", bitrate="32k"),
+    "ogg": AudioFormat("ogg", "audio/ogg", ("audio/ogg", "audio/vorbis"), "ogg",
+                       codec="libvorbis", bitrate="64k"),
+    "wav": AudioFormat("wav", "audio/wav", ("audio/wav", "audio/x-wav", "audio/wave"), "wav"),
+}
+
+
+def transcoding_available() -> bool:
+    """Whether ffmpeg is installed, i.e. formats can be transcoded"""
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def available_formats(native=("mp3", "wav")) -> list:
+    """
+    Format keys this server can produce right now, in preference order
+
+    Args:
+        native: Formats the audio source produces without transcoding
+    """
+    transcode = transcoding_available()
+    return [key for key, fmt in AUDIO_FORMATS.items() if key in native or (transcode and fmt.codec)]
+
+
+def negotiate_audio_format(accept: str, available=None):
+    """
+    Pick the audio format for an Accept header
+
+    The highest q-value wins; at equal q an exact media type beats audio/* which beats
+    */*, then the server preference order (AUDIO_FORMATS) decides. A missing header
+    counts as */*, which gets MP3.
+
+    Args:
+        accept: The Accept request header (None if absent)
+        available: Format keys to choose from (default: available_formats())
+
+    Returns:
+        str: A key of AUDIO_FORMATS, or None if nothing acceptable can be produced
+    """
+    available = available_formats() if available is None else available
+    ranges = []
+    for item in (accept or "*/*").split(","):
+        media_range, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_range:
+            ranges.append((media_range.lower(), q))
+
+    best = None
+    for preference, key in enumerate(AUDIO_FORMATS):
+        if key not in available:
+            continue
+        fmt = AUDIO_FORMATS[key]
+        # (q, specificity) of the most specific range matching this format
+        match = None
+        for media_range, q in ranges:
+            if media_range in fmt.accepts:
+                specificity = 2
+            elif media_range == "audio/*":
+                specificity = 1
+            elif media_range == "*/*":
+                specificity = 0
+            else:
+                continue
+            if match is None or specificity > match[1]:
+                match = (q, specificity)
+        if match is None or match[0] <= 0:
+            continue
+        rank = (match[0], match[1], -preference)
+        if best is None or rank > best[0]:
+            best = (rank, key)
+    return best[1] if best else None
+
+
+def transcode_audio(audio: bytes, source: str, target: str) -> bytes:
+    """
+    Re-encode audio with pydub (runs in a worker process)
+
+    Args:
+        audio: The source audio
+        source: Its container ("wav" or "mp3")
+        target: Key of the AUDIO_FORMATS entry to produce
+
+    Returns:
+        bytes: The encoded audio
+    """
+    from pydub import AudioSegment
+    AudioSegment.converter = shutil.which(FFMPEG_BINARY) or FFMPEG_BINARY
+    fmt = AUDIO_FORMATS[target]
+    segment = AudioSegment.from_file(io.BytesIO(audio), format=source)
+    output = io.BytesIO()
+    segment.export(output, format="ogg" if target == "opus" else fmt.extension,
+                   codec=fmt.codec, bitrate=fmt.bitrate)
+    return output.getvalue()
+
+
+class AudioTranscoder:
+    """Runs transcode_audio() on a bounded process pool, started on first use"""
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: Transcodes running at once, across all requests (each is one ffmpeg process)
+        """
+        self.max_workers = max_workers
+        self.executor = None
+
+    async def transcode(self, audio: bytes, source: str, target: str) -> bytes:
+        """Transcode off the event loop; queued when all workers are busy"""
+        if self.executor is None:
+            # spawn, not fork: the server process has threads (thread pools, cache writer)
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, transcode_audio, audio, source, target)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
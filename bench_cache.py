@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+ResponseCache micro-benchmarks
+Fills a cache backend with synthetic entries of realistic size and measures per-op
+latency of get/set/clear_expired/get_stats, startup cost and disk usage
+
+Usage:
+    python bench_cache.py --sizes 10000,100000 --output cache_bench.json
+    python bench_cache.py --sizes 1000000 --cache-dir /tmp/bench-cache --keep
+    python bench_cache.py --backend cache_manager:ResponseCache --backend-arg max_tracked_keys=1000
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORDS = (
+    "community water access sustainable impact funding program local partners "
+    "training outcomes measurable goals budget timeline climate health education"
+).split()
+
+
+def load_backend(spec: str, backend_args: dict):
+    """
+    Resolve "module:Factory" into a callable(cache_dir, ttl_hours) -> cache
+
+    Any object with get(endpoint, data), set(endpoint, data, response),
+    clear_expired() and get_stats() can be benchmarked
+    """
+    module_name, _, attr = spec.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr or "ResponseCache")
+
+    def make(cache_dir, ttl_hours):
+        return factory(cache_dir=str(cache_dir), ttl_hours=ttl_hours, **backend_args)
+    return make
+
+
+def parse_backend_args(pairs) -> dict:
+    args = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            args[key] = json.loads(value)
+        except json.JSONDecodeError:
+            args[key] = value
+    return args
+
+
+def make_request(i: int) -> dict:
+    """Cache-key data shaped like make_openrouter_request's {"messages": [...]}"""
+    return {"messages": [
+        {"role": "system", "content": "You are a helpful assistant, expert in starting non profits."},
+        {"role": "user", "content": f'{{"idea": {{"name": "Idea {i}", "mission": "Mission {i}"}}}}'},
+    ]}
+
+
+def make_response(rng: random.Random) -> dict:
+    """LLM response in OpenRouter format; content ~ lognormal around 4 KB (1-20 KB)"""
+    size = int(min(20000, max(1000, rng.lognormvariate(math.log(4000), 0.5))))
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return {"choices": [{"message": {"role": "assistant", "content": " ".join(words)}}]}
+
+
+def percentiles_us(samples: list) -> dict:
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pct(p):
+        return samples[max(0, min(len(samples) - 1, math.ceil(p / 100 * len(samples)) - 1))] * 1e6
+
+    return {
+        "ops": len(samples),
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+        "p50_us": round(pct(50), 1),
+        "p95_us": round(pct(95), 1),
+        "p99_us": round(pct(99), 1),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def disk_usage(path: Path) -> dict:
+    """Apparent and allocated size of everything under path"""
+    files = 0
+    apparent = 0
+    allocated = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            st = os.stat(os.path.join(root, name))
+            files += 1
+            apparent += st.st_size
+            allocated += getattr(st, "st_blocks", 0) * 512 or st.st_size
+    return {"files": files, "apparent_mb": round(apparent / 1e6, 2), "allocated_mb": round(allocated / 1e6, 2)}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the cache's per-operation log lines (still paying for formatting them)"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_size(make_cache, cache_dir: Path, size: int, ops: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    result = {"entries": size}
+
+    # Fill (sampling set latency as the cache grows)
+    cache = make_cache(cache_dir, 24)
+    with quiet():
+        existing = cache.get_stats().get("total", 0)
+    set_samples = []
+    start = time.perf_counter()
+    with quiet():
+        for i in range(existing, size):
+            elapsed, _ = timed(cache.set, "bench", make_request(i), make_response(rng))
+            if i % max(1, size // ops) == 0:
+                set_samples.append(elapsed)
+    result["fill_s"] = round(time.perf_counter() - start, 2)
+    result["fill_reused_entries"] = existing
+    result["set_during_fill"] = percentiles_us(set_samples)
+
+    # Startup: what main.py does on import
+    with quiet():
+        construct_s, cache = timed(make_cache, cache_dir, 24)
+        clear_s, _ = timed(cache.clear_expired)
+        stats_s, stats = timed(cache.get_stats)
+    result["startup"] = {
+        "construct_ms": round(construct_s * 1000, 2),
+        "clear_expired_ms": round(clear_s * 1000, 2),
+        "get_stats_ms": round(stats_s * 1000, 2),
+        "total_ms": round((construct_s + clear_s + stats_s) * 1000, 2),
+    }
+    result["reported_stats"] = {k: v for k, v in stats.items() if isinstance(v, (int, float))}
+
+    # Per-op latency on the filled cache
+    hit_samples, miss_samples, overwrite_samples = [], [], []
+    with quiet():
+        for _ in range(ops):
+            hit_samples.append(timed(cache.get, "bench", make_request(rng.randrange(size)))[0])
+            miss_samples.append(timed(cache.get, "bench", make_request(size + rng.randrange(size)))[0])
+            overwrite_samples.append(
+                timed(cache.set, "bench", make_request(rng.randrange(size)), make_response(rng))[0]
+            )
+    result["get_hit"] = percentiles_us(hit_samples)
+    result["get_miss"] = percentiles_us(miss_samples)
+    result["set_overwrite"] = percentiles_us(overwrite_samples)
+
+    # Full-scan operations
+    with quiet():
+        runs = max(1, min(3, 300000 // max(size, 1)))
+        result["get_stats_ms"] = round(min(timed(cache.get_stats)[0] for _ in range(runs)) * 1000, 2)
+        result["clear_expired_ms"] = round(min(timed(cache.clear_expired)[0] for _ in range(runs)) * 1000, 2)
+
+    result["disk"] = disk_usage(Path(getattr(cache, "cache_dir", cache_dir)))
+    return result
+
+
+def print_result(r: dict):
+    print(f"\n{'='*70}")
+    print(f"{r['entries']:,} entries  (fill {r['fill_s']}s, {r['disk']['allocated_mb']} MB on disk, "
+          f"{r['disk']['files']:,} files)")
+    print(f"{'='*70}")
+    print(f"{'operation':<22}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}")
+    for op in ("get_hit", "get_miss", "set_overwrite", "set_during_fill"):
+        s = r[op]
+        if s:
+            print(f"{op:<22}{s['p50_us']:>12.1f}{s['p95_us']:>12.1f}{s['p99_us']:>12.1f}")
+    print(f"get_stats:      {r['get_stats_ms']:>10.1f} ms")
+    print(f"clear_expired:  {r['clear_expired_ms']:>10.1f} ms")
+    print(f"startup total:  {r['startup']['total_ms']:>10.1f} ms  {r['startup']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResponseCache micro-benchmarks")
+    parser.add_argument("--backend", default="cache_manager:ResponseCache",
+                        help="module:Factory accepting (cache_dir, ttl_hours, **backend-args)")
+    parser.add_argument("--backend-arg", action="append", default=[], help="key=value passed to the factory")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated entry counts")
+    parser.add_argument("--ops", type=int, default=2000, help="Samples per per-op measurement")
+    parser.add_argument("--cache-dir", help="Directory to fill (default: a temp dir). Re-used if it exists")
+    parser.add_argument("--keep", action="store_true", help="Keep the filled directory for later runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    make_cache = load_backend(args.backend, parse_backend_args(args.backend_arg))
+    base_dir = Path(args.cache_dir) if args.cache_dir else Path(tempfile.mkdtemp(prefix="bench-cache-"))
+    results = {"backend": args.backend, "backend_args": parse_backend_args(args.backend_arg), "sizes": []}
+
+    try:
+        # Sizes are filled incrementally in one directory: 10k -> 100k -> 1M
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            print(f"\n⏳ Filling to {size:,} entries...", file=sys.stderr)
+            r = bench_size(make_cache, base_dir, size, args.ops, args.seed)
+            results["sizes"].append(r)
+            print_result(r)
+    finally:
+        if not args.keep and not args.cache_dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+File vs Redis-protocol cache backend benchmark
+Fills each backend with the same synthetic entries, then measures hit latency,
+concurrent hit throughput and pipelined get_many throughput through ResponseCache
+
+By default the Redis-protocol stand-in (redis_protocol.py) runs in a separate
+process on a free port; pass --redis-url to benchmark a real Redis instead
+
+Usage:
+    python bench_cache_backends.py
+    python bench_cache_backends.py --entries 5000 --threads 1,4,16 --output backend_bench.json
+    python bench_cache_backends.py --redis-url redis://127.0.0.1:6379/0
+"""
+import argparse
+import json
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bench_cache import make_request, make_response, percentiles_us, quiet
+from cache_backends import FileCacheBackend, RedisCacheBackend
+from cache_manager import ResponseCache
+from redis_protocol import RedisClient, RedisError
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stand_in():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "redis_protocol.py", "serve", "--port", str(port)],
+        cwd=Path(__file__).resolve().parent, stdout=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    client = RedisClient(url)
+    deadline = time.time() + 10
+    while True:
+        try:
+            client.execute("PING")
+            break
+        except RedisError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.05)
+    client.close()
+    return process, url
+
+
+def throughput(cache, entries: int, threads: int, seconds: float) -> float:
+    """Cache hits per second with `threads` concurrent callers"""
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(i):
+        rng = random.Random(i)
+        while not stop.is_set():
+            cache.get("bench", make_request(rng.randrange(entries)))
+            counts[i] += 1
+
+    with quiet():
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for w in workers:
+            w.start()
+        time.sleep(seconds)
+        stop.set()
+        for w in workers:
+            w.join()
+    return sum(counts) / seconds
+
+
+def bench_backend(name: str, cache, args) -> dict:
+    rng = random.Random(args.seed)
+    result = {"backend": name}
+
+    with quiet():
+        cache.clear_all()
+        start = time.perf_counter()
+        batch = []
+        for i in range(args.entries):
+            batch.append((make_request(i), make_response(rng)))
+            if len(batch) == 100:
+                cache.set_many("bench", batch)
+                batch = []
+        cache.set_many("bench", batch)
+        result["fill_s"] = round(time.perf_counter() - start, 2)
+
+        hits, misses, sets = [], [], []
+        for _ in range(args.ops):
+            start = time.perf_counter()
+            cache.get("bench", make_request(rng.randrange(args.entries)))
+            hits.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            cache.get("bench", make_request(args.entries + rng.randrange(args.entries)))
+            misses.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            cache.set("bench", make_request(rng.randrange(args.entries)), make_response(rng))
+            sets.append(time.perf_counter() - start)
+        result["get_hit"] = percentiles_us(hits)
+        result["get_miss"] = percentiles_us(misses)
+        result["set"] = percentiles_us(sets)
+
+        # get_many: one round trip for a batch of lookups
+        batches = max(1, args.ops // args.batch)
+        start = time.perf_counter()
+        for _ in range(batches):
+            cache.get_many("bench", [make_request(rng.randrange(args.entries)) for _ in range(args.batch)])
+        result["get_many_hits_per_s"] = round(batches * args.batch / (time.perf_counter() - start))
+
+    result["hits_per_s"] = {
+        threads: round(throughput(cache, args.entries, threads, args.seconds)) for threads in args.threads
+    }
+    return result
+
+
+def print_results(results: list, threads: list, batch: int):
+    print(f"\n{'=' * 78}")
+    print(f"{'backend':<10}{'hit p50':>10}{'hit p99':>10}{'miss p50':>10}{'set p50':>10}"
+          + "".join(f"{f'{t} thr/s':>10}" for t in threads) + f"{f'batch{batch}/s':>12}")
+    print("=" * 78)
+    for r in results:
+        print(f"{r['backend']:<10}{r['get_hit']['p50_us']:>8.0f}us{r['get_hit']['p99_us']:>8.0f}us"
+              f"{r['get_miss']['p50_us']:>8.0f}us{r['set']['p50_us']:>8.0f}us"
+              + "".join(f"{r['hits_per_s'][t]:>10,}" for t in threads)
+              + f"{r['get_many_hits_per_s']:>12,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File vs Redis-protocol cache backend benchmark")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=1000, help="Samples per latency measurement")
+    parser.add_argument("--threads", default="1,4,16", help="Concurrency levels for the throughput test")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duration of each throughput run")
+    parser.add_argument("--batch", type=int, default=20, help="Lookups per get_many call")
+    parser.add_argument("--redis-url", help="Benchmark this server instead of a local stand-in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+    args.threads = [int(t) for t in args.threads.split(",")]
+
+    cache_dir = Path(tempfile.mkdtemp(prefix="bench-backend-"))
+    stand_in = None
+    try:
+        if args.redis_url:
+            redis_url = args.redis_url
+        else:
+            stand_in, redis_url = start_stand_in()
+
+        results = []
+        with quiet():
+            backends = [
+                ("file", ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir))),
+                ("redis", ResponseCache(ttl_hours=24, backend=RedisCacheBackend(redis_url, prefix="bench:"))),
+            ]
+        for name, cache in backends:
+            print(f"⏳ Benchmarking {name} backend...", file=sys.stderr)
+            results.append(bench_backend(name, cache, args))
+        print_results(results, args.threads, args.batch)
+    finally:
+        if stand_in is not None:
+            stand_in.terminate()
+            stand_in.wait()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
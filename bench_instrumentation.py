@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead micro-benchmark
+Measures the per-request cost of the otel_config helpers (instrument_function,
+add_span_attribute, add_span_event, timed_phase) with tracing off, with tracing on
+but the trace sampled out, and with tracing on and recording
+
+Usage:
+    python bench_instrumentation.py
+    python bench_instrumentation.py --iterations 200000 --output instrumentation.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODES = ("disabled", "unsampled", "recording")
+
+
+def setup(mode: str):
+    """Configure OpenTelemetry for a mode (each mode runs in its own process)"""
+    import otel_config
+
+    if mode == "disabled":
+        return otel_config
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+
+    # No span processors: spans are recorded but never exported, so only the
+    # instrumentation cost itself is measured
+    trace.set_tracer_provider(TracerProvider(sampler=ALWAYS_ON if mode == "recording" else ALWAYS_OFF))
+    otel_config.enable_tracing()
+    return otel_config
+
+
+def build_request(otel):
+    """A stand-in for make_openrouter_request's instrumentation pattern"""
+    add_span_attribute = otel.add_span_attribute
+    add_span_event = otel.add_span_event
+    tracing_active = otel.tracing_active
+    timed_phase = otel.timed_phase
+
+    @otel.instrument_function("make_openrouter_request")
+    def simulated_request(endpoint_name="investors", provider_name="Google Gemini"):
+        add_span_attribute("endpoint.name", endpoint_name)
+        add_span_attribute("request.message_count", 3)
+        with timed_phase("cache", "cache lookup", span_name="cache_lookup"):
+            pass
+        add_span_attribute("cache.hit", False)
+        if tracing_active():
+            add_span_attribute("providers.available", 3)
+            add_span_attribute("providers.list", ",".join(["Google Gemini", "OpenRouter", "Cloudflare"]))
+            add_span_event("trying_provider", {
+                "provider.name": provider_name,
+                "provider.index": 0,
+                "endpoint.name": endpoint_name,
+            })
+        with timed_phase("ratelimit", f"rate-limit wait ({provider_name})", span_name="rate_limit_wait"):
+            pass
+        with timed_phase("provider1", provider_name, span_name="provider_attempt"):
+            add_span_attribute("llm.provider", provider_name)
+            add_span_attribute("llm.latency_ms", 812.5)
+            add_span_attribute("response.length", 3000)
+        if tracing_active():
+            add_span_attribute("provider.used", provider_name)
+            add_span_event("provider_success", {
+                "provider.name": provider_name,
+                "endpoint.name": endpoint_name,
+                "duration_ms": 812.5,
+            })
+        return True
+
+    def bare_request(endpoint_name="investors", provider_name="Google Gemini"):
+        return True
+
+    return simulated_request, bare_request
+
+
+def measure(fn, iterations: int) -> float:
+    """Best-of-5 nanoseconds per call"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / iterations)
+    return best
+
+
+def run_mode(mode: str, iterations: int) -> dict:
+    otel = setup(mode)
+    simulated_request, bare_request = build_request(otel)
+
+    result = {
+        "mode": mode,
+        "bare_ns": measure(bare_request, iterations),
+        "instrumented_ns": measure(simulated_request, iterations),
+        "add_span_attribute_ns": measure(lambda: otel.add_span_attribute("k", 1), iterations),
+        "add_span_event_ns": measure(lambda: otel.add_span_event("e", {"k": 1}), iterations),
+        "tracing_active_ns": measure(otel.tracing_active, iterations),
+    }
+    result["overhead_per_request_us"] = round((result["instrumented_ns"] - result["bare_ns"]) / 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: the global tracer provider can only be set once per process
+        print(json.dumps(run_mode(args.mode, args.iterations)))
+        return
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--iterations", str(args.iterations)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<12}{'overhead/request':>20}{'add_span_attribute':>22}{'add_span_event':>18}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['overhead_per_request_us']:>17.3f} us"
+              f"{r['add_span_attribute_ns']:>19.0f} ns{r['add_span_event_ns']:>15.0f} ns")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
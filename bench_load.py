@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Concurrent load-generation benchmark for the FastAPI endpoints
+Drives the real endpoints at configurable concurrency, request mix and cache-hit
+ratio, reports throughput and latency percentiles, and compares against a baseline
+
+Usage:
+    python bench_load.py --concurrency 10,50,200 --requests 500 --output results.json
+    python bench_load.py --concurrency 50 --baseline results.json --max-regression 0.10
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from copy import deepcopy
+from pathlib import Path
+
+import httpx
+
+ENDPOINTS = (
+    "investors",
+    "grantInfo",
+    "getGrantProposal",
+    "generatePitchText",
+    "business_plan_roadmap",
+    "generatePitchAudio",
+)
+
+DEFAULT_MIX = "investors=3,grantInfo=2,getGrantProposal=1,generatePitchText=2,business_plan_roadmap=1,generatePitchAudio=1"
+
+BASE_IDEA = json.loads(
+    (Path(__file__).parent / "biz_roadmap_generation" / "sample_input.json").read_text()
+)["idea"]
+
+SAMPLE_PITCH = (
+    "Imagine a world where every community has access to clean drinking water. "
+    "Our initiative installs low-cost filtration systems and trains local technicians. "
+    "Join us and help bring safe water to ten thousand people this year."
+)
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse "investors=3,grantInfo=1" into {endpoint: weight}"""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lstrip("/")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_body(endpoint: str, variant: str) -> dict:
+    """Build a request body; the same variant always produces the same body"""
+    if endpoint == "generatePitchAudio":
+        return {"pitch_text": f"{SAMPLE_PITCH} Reference {variant}."}
+    idea = deepcopy(BASE_IDEA)
+    idea["name"] = f"{idea['name']} {variant}"
+    return {"idea": idea}
+
+
+def plan_requests(mix: dict, total: int, cache_hit_ratio: float, hot_ideas: int, seed: int) -> list:
+    """
+    Pre-compute the request sequence so every run sends the same traffic
+
+    Returns:
+        List of (endpoint, body) tuples
+    """
+    rng = random.Random(seed)
+    endpoints = list(mix)
+    weights = [mix[e] for e in endpoints]
+    plan = []
+    for i in range(total):
+        endpoint = rng.choices(endpoints, weights)[0]
+        if rng.random() < cache_hit_ratio:
+            variant = f"hot-{rng.randrange(hot_ideas)}"
+        else:
+            variant = f"cold-{seed}-{i}"
+        plan.append((endpoint, make_body(endpoint, variant)))
+    return plan
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """Summarize (latency_s, outcome) samples into throughput/percentile/error stats"""
+    latencies = sorted(latency for latency, outcome in samples if outcome == "ok")
+    total = len(samples)
+    errors = sum(1 for _, outcome in samples if outcome == "error")
+    timeouts = sum(1 for _, outcome in samples if outcome == "timeout")
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "timeout_rate": round(timeouts / total, 4) if total else 0.0,
+    }
+
+
+async def run_level(base_url: str, plan: list, concurrency: int, timeout: float) -> dict:
+    """Run the planned requests with `concurrency` closed-loop workers"""
+    samples = defaultdict(list)
+    queue = iter(plan)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            for endpoint, body in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"/{endpoint}", json=body)
+                    outcome = "ok" if response.status_code < 400 else "error"
+                except httpx.TimeoutException:
+                    outcome = "timeout"
+                except httpx.HTTPError:
+                    outcome = "error"
+                samples[endpoint].append((time.perf_counter() - start, outcome))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_samples = [sample for endpoint_samples in samples.values() for sample in endpoint_samples]
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(all_samples, elapsed),
+        "endpoints": {endpoint: summarize(s, elapsed) for endpoint, s in sorted(samples.items())},
+    }
+
+
+async def warm_up(base_url: str, mix: dict, hot_ideas: int, timeout: float):
+    """Prime the cache with the hot ideas so the cache-hit ratio holds from the first request"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        for endpoint in mix:
+            for i in range(hot_ideas):
+                try:
+                    await client.post(f"/{endpoint}", json=make_body(endpoint, f"hot-{i}"))
+                except httpx.HTTPError as e:
+                    print(f"⚠️  Warm-up failed for /{endpoint}: {e}")
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Compare results against a baseline
+
+    Returns:
+        List of human-readable regression messages (empty if none)
+    """
+    regressions = []
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in results["levels"]:
+        base = baseline_levels.get(level["concurrency"])
+        if not base:
+            continue
+        now, before = level["overall"], base["overall"]
+        label = f"c={level['concurrency']}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if before[metric] and now[metric] > before[metric] * (1 + max_regression):
+                regressions.append(f"{label} {metric}: {before[metric]} -> {now[metric]}")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{label} throughput_rps: {before['throughput_rps']} -> {now['throughput_rps']}")
+        for metric in ("error_rate", "timeout_rate"):
+            if now[metric] > before[metric] + max_regression / 10:
+                regressions.append(f"{label} {metric}: {before[metric]} -> {now[metric]}")
+    return regressions
+
+
+def print_level(level: dict):
+    print(f"\n{'='*78}")
+    print(f"Concurrency {level['concurrency']}  ({level['elapsed_s']}s)")
+    print(f"{'='*78}")
+    print(f"{'endpoint':<24}{'reqs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err%':>7}{'tmo%':>7}")
+    rows = list(level["endpoints"].items()) + [("OVERALL", level["overall"])]
+    for name, s in rows:
+        print(f"{name:<24}{s['requests']:>6}{s['throughput_rps']:>9.2f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['error_rate']*100:>7.1f}{s['timeout_rate']*100:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load benchmark for the API endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", default="10,50,200", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. investors=3,grantInfo=1")
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.8,
+                        help="Fraction of requests reusing a small pool of hot ideas")
+    parser.add_argument("--hot-ideas", type=int, default=5, help="Size of the hot idea pool")
+    parser.add_argument("--no-warm-up", action="store_true", help="Skip priming the cache with hot ideas")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously saved results file")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed relative regression before failing (default 10%%)")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if not args.no_warm_up and args.cache_hit_ratio > 0:
+        print(f"🔥 Warming up {args.hot_ideas} hot idea(s) per endpoint...")
+        asyncio.run(warm_up(args.base_url, mix, args.hot_ideas, args.timeout))
+
+    results = {
+        "config": {
+            "base_url": args.base_url,
+            "requests_per_level": args.requests,
+            "mix": mix,
+            "cache_hit_ratio": args.cache_hit_ratio,
+            "hot_ideas": args.hot_ideas,
+            "timeout_s": args.timeout,
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "levels": [],
+    }
+
+    for concurrency in levels:
+        plan = plan_requests(mix, args.requests, args.cache_hit_ratio, args.hot_ideas, args.seed + concurrency)
+        level = asyncio.run(run_level(args.base_url, plan, concurrency, args.timeout))
+        results["levels"].append(level)
+        print_level(level)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for message in regressions:
+                print(f"   - {message}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.max_regression:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+PDF export benchmark
+Renders large generated proposals (markdown with headings, lists and tables) and compares:
+  - the old text_to_pdf() (a Normal paragraph per raw line, stylesheet rebuilt per call)
+    with pdf_export.render_pdf() in one process
+  - PdfRenderer throughput at several pool sizes, and the worst event-loop stall while
+    rendering on the pool vs. rendering inline on the loop
+  - /exportPdf cold vs. served from the PDF cache
+
+Usage:
+    python bench_pdf.py
+    python bench_pdf.py --sizes 20000,100000,400000 --docs 8 --workers 1,2,4 --output pdf.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_cache import quiet
+from fake_providers import generate_text
+
+ROOT = Path(__file__).resolve().parent
+
+
+def large_document(chars: int, seed: int = 0) -> str:
+    """A proposal-shaped markdown document of roughly `chars` characters"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    section = 1
+    while size < chars:
+        body = generate_text(f"section {seed}-{section}", 1200).replace("## Section", "### Part")
+        bullets = "\n".join(f"- **Milestone {i}:** {generate_text(f'{seed}-{section}-{i}', 90).strip()}"
+                            for i in range(1, rng.randint(3, 6)))
+        rows = "\n".join(f"| Q{q} | ${rng.randint(5, 90)}k | {rng.choice(['Planned', 'Funded', 'Done'])} |"
+                         for q in range(1, 5))
+        part = (f"## {section}. Section {section}\n\n{body}\n{bullets}\n\n"
+                f"| Quarter | Budget | Status |\n|---|---:|---|\n{rows}\n\n")
+        parts.append(part)
+        size += len(part)
+        section += 1
+    return "".join(parts)
+
+
+def naive_pdf(text: str) -> bytes:
+    """The old main.text_to_pdf(): one Normal paragraph per raw line, stylesheet per call"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    doc.build([Paragraph(line, styles["Normal"]) for line in text.split("\n")])
+    return buffer.getvalue()
+
+
+def pages(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+
+
+def best_of(runs: int, fn, *args):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - start)
+    return min(samples), result
+
+
+async def with_loop_lag(coro):
+    """Await coro while measuring the worst delay of a 10ms ticker on the event loop"""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return result, elapsed, lag
+
+
+async def pool_throughput(workers: int, documents: list) -> tuple:
+    from pdf_export import PdfRenderer
+    renderer = PdfRenderer(max_workers=workers)
+    try:
+        # Start the workers (spawn, imports, stylesheet) outside the measurement
+        await asyncio.gather(*(renderer.render("# warm up") for _ in range(workers)))
+        _, elapsed, lag = await with_loop_lag(asyncio.gather(*(renderer.render(doc) for doc in documents)))
+        return elapsed, lag
+    finally:
+        renderer.shutdown()
+
+
+async def inline_render(document: str) -> tuple:
+    from pdf_export import render_pdf
+
+    async def render():
+        return render_pdf(document)
+
+    _, elapsed, lag = await with_loop_lag(render())
+    return elapsed, lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF export benchmark")
+    parser.add_argument("--sizes", default="20000,100000,400000", help="Document sizes to render (characters)")
+    parser.add_argument("--runs", type=int, default=3, help="Renders per size (best is reported)")
+    parser.add_argument("--docs", type=int, default=8, help="Documents rendered concurrently for pool throughput")
+    parser.add_argument("--doc-size", type=int, default=100000, help="Size of each pool throughput document")
+    parser.add_argument("--workers", default="1,2,4", help="Pool sizes to compare")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    levels = [int(w) for w in args.workers.split(",")]
+
+    from reportlab.lib.styles import getSampleStyleSheet
+    from pdf_export import get_styles, render_pdf
+
+    results = {"cpus": os.cpu_count()}
+    stylesheet_s, _ = best_of(20, getSampleStyleSheet)
+    start = time.perf_counter()
+    get_styles()
+    results["stylesheet_ms"] = {"per_call": round(stylesheet_s * 1000, 2),
+                                "cached_first": round((time.perf_counter() - start) * 1000, 2)}
+
+    results["single_process"] = {}
+    for size in sizes:
+        print(f"⏳ rendering {size} chars ({args.runs} runs each)...", file=sys.stderr)
+        document = large_document(size)
+        naive_s, naive = best_of(args.runs, naive_pdf, document)
+        new_s, pdf = best_of(args.runs, render_pdf, document, "Benchmark Proposal")
+        results["single_process"][size] = {
+            "naive_s": round(naive_s, 3), "naive_pages": pages(naive),
+            "render_s": round(new_s, 3), "pages": pages(pdf), "kb": len(pdf) // 1024,
+            "chars_per_s": round(size / new_s),
+        }
+
+    documents = [large_document(args.doc_size, seed=i) for i in range(args.docs)]
+    print(f"⏳ inline render of one {args.doc_size}-char document on the event loop...", file=sys.stderr)
+    elapsed, lag = asyncio.run(inline_render(documents[0]))
+    results["inline_on_loop"] = {"s": round(elapsed, 3), "max_loop_lag_ms": round(lag * 1000)}
+    results["pool"] = {}
+    for workers in levels:
+        print(f"⏳ {args.docs} documents on a pool of {workers}...", file=sys.stderr)
+        elapsed, lag = asyncio.run(pool_throughput(workers, documents))
+        results["pool"][workers] = {"s": round(elapsed, 3), "docs_per_s": round(args.docs / elapsed, 2),
+                                    "max_loop_lag_ms": round(lag * 1000)}
+
+    # End to end, including the PDF cache
+    workdir = tempfile.mkdtemp(prefix="bench-pdf-")
+    try:
+        os.environ.update({"CACHE_REFRESH_ENABLED": "false", "LOOP_MONITOR_ENABLED": "false"})
+        os.environ.pop("HONEYCOMB_API_KEY", None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+            with TestClient(app_main.app) as client:
+                body = {"content": large_document(sizes[-1], seed=99), "title": "Benchmark Proposal"}
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = client.post("/exportPdf", json=body)
+                    timings.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/exportPdf returned {response.status_code}: {response.text[:200]}")
+        results["endpoint"] = {"chars": sizes[-1], "cold_s": round(timings[0], 3), "cached_s": round(timings[1], 3)}
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'=' * 70}")
+    print(f"PDF EXPORT ({results['cpus']} CPU)")
+    print("=" * 70)
+    print(f"getSampleStyleSheet(): {results['stylesheet_ms']['per_call']:.2f}ms per call "
+          f"(now built once per process)")
+    print(f"\n{'chars':>8}  {'old text_to_pdf':>18}  {'render_pdf':>18}  {'chars/s':>9}")
+    for size, r in results["single_process"].items():
+        print(f"{size:>8}  {r['naive_s']:>7.2f}s {r['naive_pages']:>4} pages  "
+              f"{r['render_s']:>7.2f}s {r['pages']:>4} pages  {r['chars_per_s']:>9}")
+    inline = results["inline_on_loop"]
+    print(f"\n{args.doc_size}-char document inline on the loop: {inline['s']:.2f}s, "
+          f"loop stalled {inline['max_loop_lag_ms']}ms")
+    print(f"{args.docs} x {args.doc_size}-char documents on the pool:")
+    for workers, r in results["pool"].items():
+        print(f"   {workers} worker(s){r['s']:>8.2f}s   {r['docs_per_s']:>5.2f} docs/s   "
+              f"loop lag {r['max_loop_lag_ms']}ms")
+    endpoint = results["endpoint"]
+    print(f"\n/exportPdf, {endpoint['chars']} chars: cold {endpoint['cold_s']:.2f}s, "
+          f"cached {endpoint['cached_s'] * 1000:.0f}ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
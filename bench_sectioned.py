@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Monolithic vs sectioned grant proposal benchmark
+Runs /getGrantProposal in-process against fake_providers.py (started on a free port
+with output-length-proportional latency) and compares wall-clock latency of one long
+completion with concurrent per-section completions, plus how many provider calls and
+how long a regenerate takes after editing one idea field
+
+The rate limiter runs at --interval (default: the app's 60s) and is reset before every
+measured request, so each one starts on an idle endpoint; --back-to-back also times a
+second cold sectioned request right after the first, while the burst budget refills
+
+Usage:
+    python bench_sectioned.py
+    python bench_sectioned.py --runs 5 --concurrency 2,5,10 --ttft 0.5 --chars-per-second 400
+    python bench_sectioned.py --interval 2 --back-to-back
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_cache import quiet
+
+ROOT = Path(__file__).resolve().parent
+BASE_IDEA = json.loads((ROOT / "biz_roadmap_generation" / "sample_input.json").read_text())
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_providers(args, response_chars: int):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(port),
+         "--latency", f"fixed:{args.ttft}", "--latency", "ddg=fixed:0.05",
+         "--decode-chars-per-second", str(args.chars_per_second),
+         "--response-chars", str(response_chars)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(f"{url}/__fake__/config")
+            return process, url
+        except httpx.HTTPError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def provider_calls(url: str) -> int:
+    stats = httpx.get(f"{url}/__fake__/stats").json()
+    return sum(count for key, count in stats.items() if not key.startswith("ddg:"))
+
+
+def idea_variant(run: int, **changes) -> dict:
+    """A distinct idea per run so every measured request is a cold miss"""
+    body = json.loads(json.dumps(BASE_IDEA))
+    body["idea"]["name"] = f"{body['idea']['name']} #{run}"
+    body["idea"].update(changes)
+    return body
+
+
+def timed_post(client, path: str, body: dict) -> float:
+    start = time.perf_counter()
+    response = client.post(path, json=body)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monolithic vs sectioned grant proposal benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Cold requests per mode")
+    parser.add_argument("--concurrency", default="1,5,10", help="Section concurrency levels to compare")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Fake time to first token (seconds)")
+    parser.add_argument("--chars-per-second", type=float, default=2000,
+                        help="Fake decode rate (a small free model is ~400; default is 5x faster to keep runs short)")
+    parser.add_argument("--interval", type=float, default=60, help="RATE_LIMIT_MIN_INTERVAL_SECONDS")
+    parser.add_argument("--back-to-back", action="store_true",
+                        help="Also time a cold sectioned request right after another (waits up to sections x interval)")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    # The monolithic reply is as long as all sections together, so both modes produce the same amount of text
+    from sectioned_generation import GRANT_PROPOSAL_SECTIONS, SectionedGenerator
+    from fake_providers import CHARS_PER_WORD, LENGTH_HINT
+    response_chars = sum(int(LENGTH_HINT.search(s.instruction).group(1)) * CHARS_PER_WORD
+                         for s in GRANT_PROPOSAL_SECTIONS)
+
+    workdir = tempfile.mkdtemp(prefix="bench-sectioned-")
+    fake, url = start_fake_providers(args, response_chars)
+    results = {"response_chars": response_chars, "ttft_s": args.ttft, "chars_per_second": args.chars_per_second,
+               "interval_s": args.interval}
+    try:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake", "GEMINI_BASE_URL": url, "DDG_BASE_URL": url,
+            "RATE_LIMIT_MIN_INTERVAL_SECONDS": str(args.interval), "CACHE_REFRESH_ENABLED": "false",
+            "LOOP_MONITOR_ENABLED": "false",
+        })
+        for key in ("OPENROUTER_API_KEY", "CLOUDFLARE_API_KEY", "HONEYCOMB_API_KEY"):
+            os.environ.pop(key, None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+            client = TestClient(app_main.app)
+        # Forget earlier calls, so the next request starts on an idle endpoint with a full burst budget
+        idle = app_main.rate_limiter.backend.last_call_time.clear
+
+        run = 0
+        print(f"⏳ monolithic ({args.runs} cold requests)...", file=sys.stderr)
+        samples = []
+        with quiet():
+            for _ in range(args.runs):
+                run += 1
+                idle()
+                samples.append(timed_post(client, "/getGrantProposal?mode=monolithic", idea_variant(run)))
+        results["monolithic_s"] = round(statistics.median(samples), 3)
+
+        results["sectioned_s"] = {}
+        for level in levels:
+            print(f"⏳ sectioned, {level} at once ({args.runs} cold requests)...", file=sys.stderr)
+            app_main.section_generator.shutdown()
+            app_main.section_generator = SectionedGenerator(max_concurrency=level)
+            samples = []
+            with quiet():
+                for _ in range(args.runs):
+                    run += 1
+                    idle()
+                    samples.append(timed_post(client, "/getGrantProposal?mode=sectioned", idea_variant(run)))
+            results["sectioned_s"][level] = round(statistics.median(samples), 3)
+
+        if args.back_to_back:
+            print("⏳ two cold sectioned requests back to back...", file=sys.stderr)
+            idle()
+            with quiet():
+                first = timed_post(client, "/getGrantProposal?mode=sectioned", idea_variant(run + 1))
+                second = timed_post(client, "/getGrantProposal?mode=sectioned", idea_variant(run + 2))
+            run += 2
+            results["back_to_back_s"] = [round(first, 3), round(second, 3)]
+
+        # Regenerate after editing one field: only the sections that use it are redone
+        print("⏳ regenerate after an sdgs edit...", file=sys.stderr)
+        run += 1
+        edited = {"sdgs": ["SDG 13: Climate Action"]}
+        with quiet():
+            for mode in ("monolithic", "sectioned"):
+                idle()
+                timed_post(client, f"/getGrantProposal?mode={mode}", idea_variant(run))
+            regenerate = {}
+            for mode in ("monolithic", "sectioned"):
+                before = provider_calls(url)
+                idle()
+                elapsed = timed_post(client, f"/getGrantProposal?mode={mode}", idea_variant(run, **edited))
+                regenerate[mode] = {"s": round(elapsed, 3), "provider_calls": provider_calls(url) - before}
+        results["regenerate_after_edit"] = regenerate
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    sections = len(GRANT_PROPOSAL_SECTIONS)
+    print(f"\n{'=' * 70}")
+    print(f"GRANT PROPOSAL: {response_chars} chars, TTFT {args.ttft}s, {args.chars_per_second:g} chars/s, "
+          f"rate limit {args.interval:g}s")
+    print("=" * 70)
+    print(f"{'monolithic (1 call)':<32}{results['monolithic_s']:>8.2f}s")
+    for level, seconds in results["sectioned_s"].items():
+        speedup = results["monolithic_s"] / seconds
+        print(f"{f'sectioned ({sections} calls, {level} at once)':<32}{seconds:>8.2f}s   {speedup:4.1f}x")
+    if "back_to_back_s" in results:
+        first, second = results["back_to_back_s"]
+        print(f"{'sectioned, back to back':<32}{first:>8.2f}s then {second:.2f}s (budget refills one call per "
+              f"{args.interval:g}s)")
+    print("\nRegenerate after editing sdgs:")
+    for mode, r in results["regenerate_after_edit"].items():
+        print(f"   {mode:<12}{r['s']:>6.2f}s   {r['provider_calls']} provider call(s)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,742 @@
+"""
+Storage backends for ResponseCache
+A backend stores serialized entries (JSON bytes) under (endpoint, cache_key);
+ResponseCache handles serialization, expiry checks, the snapshot tier and stats
+
+    file                directory of <md5>.json files (default; one host)
+    redis://host:port/0 Redis-protocol server shared by every instance
+                        (Redis, Valkey, or the redis_protocol.py stand-in)
+
+Backend interface:
+    name, tier                      labels for logs and the cache_lookup metric
+    get(endpoint, key)              -> bytes or None
+    get_many(endpoint, keys)        -> list of bytes or None, in order
+    set(endpoint, key, blob, ttl_seconds)
+    set_many(endpoint, items, ttl_seconds)       items: [(key, blob), ...]
+    single_flight(endpoint, key, timeout, on_wait) -> context manager
+    clear_expired(ttl) -> int, clear_all() -> int, stats(ttl) -> dict
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run a single worker
+    fcntl = None
+
+from metrics import CACHE_EVICTIONS
+from redis_protocol import RedisClient, RedisError, WatchConflict
+
+# Bounded caches evict down to this fraction of the exceeded limit
+EVICTION_LOW_WATERMARK = 0.9
+
+
+class SingleFlight:
+    """
+    Cross-process lock held while one worker regenerates a cache key
+
+    Callers must check the cache again once inside: the previous holder may have
+    filled the key. waited is True if another worker held the lock first
+    """
+
+    def __init__(self, lock_path: Path, timeout: float, on_wait=None):
+        """
+        Args:
+            lock_path: Lock file for the key
+            timeout: Seconds to wait for the holder before proceeding anyway
+            on_wait: Called once if the lock was held by someone else
+        """
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self.on_wait = on_wait
+        self.waited = False
+        self.acquired = False
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        try:
+            self._file = open(self.lock_path, 'a')
+        except OSError as e:
+            print(f"⚠️ Single-flight lock unavailable: {e}")
+            return self
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.acquired = True
+                break
+            except BlockingIOError:
+                self.waited = True
+                if time.monotonic() >= deadline:
+                    # Give up waiting and regenerate anyway rather than fail the request
+                    print(f"⚠️ Single-flight wait timed out after {self.timeout}s")
+                    break
+                time.sleep(0.05)
+
+        if self.waited and self.on_wait is not None:
+            self.on_wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            if self.acquired:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        return False
+
+
+class EntryIndex:
+    """
+    Sizes and access metadata of the entries in a cache directory, kept in a SQLite
+    file next to them so every worker sees the same occupancy
+
+    Per-endpoint byte totals are maintained on every write and removal, so checking
+    the budget is a single-row read. Hits are buffered in memory and written in
+    batches, so a cache hit costs a dict update rather than a transaction
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 5.0, flush_batch: int = 256):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            flush_interval: Seconds between writes of buffered hits
+            flush_batch: Buffered hits that trigger a write regardless of the interval
+        """
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._local = threading.local()
+        self._pending = {}  # cache_key -> [last_access, hits]
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, size INTEGER NOT NULL,
+                last_access REAL NOT NULL, hits INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS usage (
+                endpoint TEXT PRIMARY KEY, bytes INTEGER NOT NULL, entries INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);
+            CREATE INDEX IF NOT EXISTS entries_lfu ON entries (hits, last_access);
+            CREATE INDEX IF NOT EXISTS entries_endpoint_lru ON entries (endpoint, last_access);
+            CREATE INDEX IF NOT EXISTS entries_endpoint_lfu ON entries (endpoint, hits, last_access);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def is_empty(self) -> bool:
+        return self._conn().execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+
+    def record_writes(self, endpoint: str, sizes: list):
+        """
+        Register written entries (new or overwritten)
+
+        Args:
+            endpoint: API endpoint name
+            sizes: List of (cache_key, size in bytes)
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            for cache_key, size in sizes:
+                old = conn.execute("SELECT endpoint, size FROM entries WHERE key = ?", (cache_key,)).fetchone()
+                if old is not None:
+                    self._add_usage(conn, old[0], -old[1], -1)
+                conn.execute(
+                    "INSERT INTO entries (key, endpoint, size, last_access, hits) VALUES (?, ?, ?, ?, 0) "
+                    "ON CONFLICT(key) DO UPDATE SET endpoint = excluded.endpoint, size = excluded.size, "
+                    "last_access = excluded.last_access",
+                    (cache_key, endpoint, size, now),
+                )
+                self._add_usage(conn, endpoint, size, 1)
+
+    def remove(self, cache_keys: list):
+        """Forget removed entries"""
+        with self._transaction() as conn:
+            for cache_key in cache_keys:
+                old = conn.execute("SELECT endpoint, size FROM entries WHERE key = ?", (cache_key,)).fetchone()
+                if old is not None:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (cache_key,))
+                    self._add_usage(conn, old[0], -old[1], -1)
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM usage")
+
+    def _add_usage(self, conn, endpoint: str, size_delta: int, count_delta: int):
+        conn.execute(
+            "INSERT INTO usage (endpoint, bytes, entries) VALUES (?, ?, ?) "
+            "ON CONFLICT(endpoint) DO UPDATE SET bytes = bytes + excluded.bytes, entries = entries + excluded.entries",
+            (endpoint, size_delta, count_delta),
+        )
+
+    def touch(self, cache_key: str):
+        """Buffer a hit; flushed in batches"""
+        with self._pending_lock:
+            pending = self._pending.setdefault(cache_key, [0.0, 0])
+            pending[0] = time.time()
+            pending[1] += 1
+            due = len(self._pending) >= self.flush_batch or time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered hits"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE entries SET last_access = max(last_access, ?), hits = hits + ? WHERE key = ?",
+                [(last_access, hits, cache_key) for cache_key, (last_access, hits) in pending.items()],
+            )
+
+    def usage(self) -> dict:
+        """Bytes and entry count per endpoint"""
+        rows = self._conn().execute("SELECT endpoint, bytes, entries FROM usage").fetchall()
+        return {endpoint: {'bytes': size, 'entries': entries} for endpoint, size, entries in rows}
+
+    def victims(self, policy: str, endpoint: str = None, exclude=(), limit: int = 64) -> list:
+        """
+        Least valuable entries first
+
+        Args:
+            policy: "lru" (oldest access first) or "lfu" (fewest hits, then oldest)
+            endpoint: Only consider this endpoint's entries
+            exclude: Keys that must not be evicted (just written)
+            limit: Maximum rows returned
+
+        Returns:
+            List of (cache_key, endpoint, size)
+        """
+        order = "last_access" if policy == "lru" else "hits, last_access"
+        where = "WHERE endpoint = ?" if endpoint is not None else ""
+        params = [endpoint] if endpoint is not None else []
+        rows = self._conn().execute(
+            f"SELECT key, endpoint, size FROM entries {where} ORDER BY {order} LIMIT ?",
+            (*params, limit + len(exclude)),
+        ).fetchall()
+        return [row for row in rows if row[0] not in exclude][:limit]
+
+
+class FileCacheBackend:
+    """
+    One JSON file per entry in a directory, safe with several workers on one host
+
+    Entries are written to a temp file and renamed into place; sweeps take an
+    exclusive advisory lock so they never delete an entry that was just rewritten
+
+    With max_bytes or endpoint_quotas set, an EntryIndex tracks entry sizes and
+    accesses and every write evicts the least recently (lru) or least frequently
+    (lfu) used entries until the directory is back within budget
+    """
+
+    name = "file"
+    tier = "disk"
+
+    def __init__(self, cache_dir=".cache", max_bytes: int = None, endpoint_quotas: dict = None,
+                 eviction: str = "lru"):
+        """
+        Args:
+            cache_dir: Directory to store cache files (".cache" falls back to
+                /tmp/.cache on read-only filesystems)
+            max_bytes: Byte budget for all entries (None = unbounded)
+            endpoint_quotas: Byte budget per endpoint, e.g. {"getGrantProposal": 50_000_000}
+            eviction: "lru" or "lfu"
+        """
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {eviction!r} (use lru or lfu)")
+        # Detect serverless/read-only environments and use /tmp instead
+        if cache_dir == ".cache":
+            # Try to create the directory to test if filesystem is writable
+            try:
+                test_dir = Path(cache_dir)
+                test_dir.mkdir(exist_ok=True)
+                self.cache_dir = test_dir
+            except (OSError, PermissionError):
+                # Filesystem is read-only (serverless environment)
+                # Use /tmp directory instead
+                print(f"⚠️  Read-only filesystem detected, using /tmp for cache")
+                self.cache_dir = Path("/tmp/.cache")
+                self.cache_dir.mkdir(exist_ok=True)
+        else:
+            self.cache_dir = Path(cache_dir)
+            self.cache_dir.mkdir(exist_ok=True)
+
+        # Advisory lock files for sweeps and single-flight regeneration
+        self._sweep_lock_path = self.cache_dir / ".sweep.lock"
+        self._locks_dir = self.cache_dir / ".locks"
+        self._locks_dir.mkdir(exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self.endpoint_quotas = endpoint_quotas or {}
+        self.eviction = eviction
+        self.evictions = 0
+        self._evictions_lock = threading.Lock()
+        self.index = None
+        if max_bytes or self.endpoint_quotas:
+            self.index = EntryIndex(self.cache_dir / ".index.db")
+            if self.index.is_empty():
+                self._import_existing_entries()
+
+    def _import_existing_entries(self):
+        """One-time registration of entries written before the budget was enabled"""
+        by_endpoint = {}
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                with open(cache_file, 'rb') as f:
+                    blob = f.read()
+                endpoint = json.loads(blob).get('endpoint') or "unknown"
+            except (OSError, ValueError, AttributeError):
+                continue
+            by_endpoint.setdefault(endpoint, []).append((cache_file.stem, len(blob)))
+        for endpoint, sizes in by_endpoint.items():
+            self.index.record_writes(endpoint, sizes)
+        if by_endpoint:
+            print(f"📇 Indexed {sum(len(sizes) for sizes in by_endpoint.values())} existing cache entries")
+
+    def _get_cache_path(self, cache_key: str) -> Path:
+        """Get the file path for a cache key"""
+        return self.cache_dir / f"{cache_key}.json"
+
+    def get(self, endpoint: str, cache_key: str):
+        """
+        Read an entry; never deletes (expired and corrupted files are left to
+        clear_expired, which holds the sweep lock)
+
+        Raises:
+            OSError: If the file exists but can't be read
+        """
+        try:
+            with open(self._get_cache_path(cache_key), 'rb') as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        if self.index is not None:
+            self.index.touch(cache_key)
+        return blob
+
+    def get_many(self, endpoint: str, cache_keys: list) -> list:
+        return [self.get(endpoint, cache_key) for cache_key in cache_keys]
+
+    def set(self, endpoint: str, cache_key: str, blob: bytes, ttl_seconds: float):
+        self.set_many(endpoint, [(cache_key, blob)], ttl_seconds)
+
+    def set_many(self, endpoint: str, items: list, ttl_seconds: float):
+        for cache_key, blob in items:
+            self._write_file(cache_key, blob)
+        if self.index is not None:
+            self.index.record_writes(endpoint, [(cache_key, len(blob)) for cache_key, blob in items])
+            self._enforce_budget(endpoint, exclude={cache_key for cache_key, _ in items})
+
+    def _write_file(self, cache_key: str, blob: bytes):
+        # Write a private temp file, then rename it over the entry: readers in
+        # other workers see either the old or the new file, never a partial one
+        tmp_path = self.cache_dir / f".{cache_key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            with self._sweep_guard(exclusive=False):
+                os.replace(tmp_path, self._get_cache_path(cache_key))
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _enforce_budget(self, endpoint: str, exclude: set):
+        """
+        Evict entries once the endpoint quota or the global budget is exceeded
+
+        Evicts down to EVICTION_LOW_WATERMARK of the limit, so a full cache doesn't
+        take the exclusive lock on every single write
+        """
+        usage = self.index.usage()
+        quota = self.endpoint_quotas.get(endpoint)
+        if not self._over_limit(usage, endpoint, quota):
+            return
+
+        # Evict by the latest access order, not the one from the last flush
+        self.index.flush()
+        with self._sweep_guard(exclusive=True):
+            # Another worker may have evicted while we waited for the lock
+            usage = self.index.usage()
+            endpoint_bytes = usage.get(endpoint, {}).get('bytes', 0)
+            if quota is not None and endpoint_bytes > quota:
+                self._evict(endpoint_bytes - int(quota * EVICTION_LOW_WATERMARK), "quota", endpoint, exclude)
+                usage = self.index.usage()
+            total_bytes = sum(entry['bytes'] for entry in usage.values())
+            if self.max_bytes is not None and total_bytes > self.max_bytes:
+                self._evict(total_bytes - int(self.max_bytes * EVICTION_LOW_WATERMARK), "budget", None, exclude)
+
+    def _over_limit(self, usage: dict, endpoint: str, quota) -> bool:
+        if quota is not None and usage.get(endpoint, {}).get('bytes', 0) > quota:
+            return True
+        return self.max_bytes is not None and sum(entry['bytes'] for entry in usage.values()) > self.max_bytes
+
+    def _evict(self, excess: int, reason: str, endpoint: str, exclude: set):
+        """Remove the least valuable entries until at least excess bytes are freed"""
+        freed = 0
+        while freed < excess:
+            victims = self.index.victims(self.eviction, endpoint, exclude)
+            if not victims:
+                break
+            removed = []
+            for cache_key, victim_endpoint, size in victims:
+                self._get_cache_path(cache_key).unlink(missing_ok=True)
+                removed.append(cache_key)
+                freed += size
+                CACHE_EVICTIONS.inc(endpoint=victim_endpoint, reason=reason)
+                if freed >= excess:
+                    break
+            self.index.remove(removed)
+            with self._evictions_lock:
+                self.evictions += len(removed)
+
+    @contextmanager
+    def _sweep_guard(self, exclusive: bool, blocking: bool = True):
+        """
+        Advisory lock on the cache directory, shared by other processes
+
+        Writers hold it shared while renaming an entry into place; sweeps hold it
+        exclusively, so a sweep never deletes an entry that was just rewritten
+
+        Yields:
+            bool: False if blocking=False and another process holds it
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(self._sweep_lock_path, 'a') as lock_file:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            try:
+                fcntl.flock(lock_file, mode if blocking else mode | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def single_flight(self, endpoint: str, cache_key: str, timeout: float, on_wait=None) -> SingleFlight:
+        return SingleFlight(self._locks_dir / f"{cache_key}.lock", timeout, on_wait=on_wait)
+
+    def clear_expired(self, ttl) -> int:
+        """
+        Remove all expired entries
+
+        Holds the sweep lock exclusively; if another worker is already sweeping this
+        call returns immediately
+        """
+        with self._sweep_guard(exclusive=True, blocking=False) as acquired:
+            if not acquired:
+                print("🗑️ Cache sweep already running in another worker, skipping")
+                return 0
+
+            removed_keys = []
+            for cache_file in self.cache_dir.glob("*.json"):
+                try:
+                    with open(cache_file, 'r') as f:
+                        cached = json.load(f)
+
+                    cached_time = datetime.fromisoformat(cached['timestamp'])
+                    if datetime.now() - cached_time > ttl:
+                        cache_file.unlink(missing_ok=True)
+                        removed_keys.append(cache_file.stem)
+
+                except FileNotFoundError:
+                    continue
+                except Exception:
+                    # Remove corrupted files
+                    cache_file.unlink(missing_ok=True)
+                    removed_keys.append(cache_file.stem)
+
+            if self.index is not None:
+                self.index.remove(removed_keys)
+            self._remove_stale_files(ttl)
+
+        return len(removed_keys)
+
+    def _remove_stale_files(self, ttl):
+        """Delete temp files left by crashed writers and unused single-flight locks"""
+        cutoff = time.time() - 3600
+        for tmp_file in self.cache_dir.glob(".*.tmp"):
+            try:
+                if tmp_file.stat().st_mtime < cutoff:
+                    tmp_file.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+        if fcntl is None:
+            return
+        cutoff = time.time() - ttl.total_seconds()
+        for lock_path in self._locks_dir.glob("*.lock"):
+            try:
+                if lock_path.stat().st_mtime >= cutoff:
+                    continue
+                with open(lock_path, 'a') as lock_file:
+                    # Only delete locks nobody holds right now
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    lock_path.unlink(missing_ok=True)
+            except (BlockingIOError, FileNotFoundError):
+                continue
+
+    def clear_all(self) -> int:
+        removed = 0
+        with self._sweep_guard(exclusive=True):
+            for cache_file in self.cache_dir.glob("*.json"):
+                cache_file.unlink(missing_ok=True)
+                removed += 1
+            if self.index is not None:
+                self.index.clear()
+        return removed
+
+    def stats(self, ttl) -> dict:
+        total = 0
+        expired = 0
+        valid = 0
+
+        for cache_file in self.cache_dir.glob("*.json"):
+            total += 1
+            try:
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+
+                cached_time = datetime.fromisoformat(cached['timestamp'])
+                if datetime.now() - cached_time > ttl:
+                    expired += 1
+                else:
+                    valid += 1
+
+            except Exception:
+                expired += 1
+
+        stats = {'total': total, 'valid': valid, 'expired': expired, 'cache_dir': str(self.cache_dir)}
+        if self.index is not None:
+            usage = self.index.usage()
+            stats.update({
+                'bytes': sum(entry['bytes'] for entry in usage.values()),
+                'max_bytes': self.max_bytes,
+                'endpoint_quotas': self.endpoint_quotas,
+                'eviction': self.eviction,
+                'evictions': self.evictions,
+                'per_endpoint': usage,
+            })
+        return stats
+
+    def occupancy(self):
+        """
+        Bytes and entries per endpoint from the index, without scanning the directory
+
+        Returns:
+            dict or None if the cache is unbounded (no index)
+        """
+        return self.index.usage() if self.index is not None else None
+
+
+class RedisSingleFlight:
+    """SingleFlight over a Redis-protocol lock key (SET NX PX), shared across hosts"""
+
+    def __init__(self, client: RedisClient, lock_key: str, timeout: float, on_wait=None):
+        self.client = client
+        self.lock_key = lock_key
+        self.timeout = timeout
+        self.on_wait = on_wait
+        self.waited = False
+        self.acquired = False
+        self._token = uuid.uuid4().hex
+
+    def __enter__(self):
+        # The lock expires on its own if the holder dies mid-regeneration
+        ttl_ms = int(self.timeout * 1000)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                if self.client.execute("SET", self.lock_key, self._token, "NX", "PX", ttl_ms) is not None:
+                    self.acquired = True
+                    break
+                self.waited = True
+                if time.monotonic() >= deadline:
+                    print(f"⚠️ Single-flight wait timed out after {self.timeout}s")
+                    break
+                time.sleep(0.05)
+        except RedisError as e:
+            print(f"⚠️ Single-flight lock unavailable: {e}")
+
+        if self.waited and self.on_wait is not None:
+            self.on_wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.acquired:
+            return False
+
+        def release(conn):
+            # Only delete the lock if it is still ours (it may have expired and been re-taken)
+            return [("DEL", self.lock_key)] if conn.execute("GET", self.lock_key) == self._token.encode() else []
+
+        try:
+            self.client.transaction([self.lock_key], release)
+        except (RedisError, WatchConflict) as e:
+            print(f"⚠️ Single-flight unlock failed: {e}")
+        return False
+
+
+class RedisCacheBackend:
+    """
+    Entries in a Redis-protocol server, shared by every instance of the app
+
+    Keys are namespaced per endpoint (<prefix><endpoint>:<cache_key>) and expire
+    server-side, so there is nothing to sweep. Batch operations are pipelined:
+    one round trip however many keys
+    """
+
+    name = "redis"
+    tier = "redis"
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        """
+        Args:
+            url: redis://[:password@]host:port/db
+            prefix: Namespace for this app's keys
+        """
+        self.url = url
+        self.client = RedisClient(url)
+        self.prefix = prefix
+
+    def _key(self, endpoint: str, cache_key: str) -> str:
+        return f"{self.prefix}{endpoint}:{cache_key}"
+
+    def get(self, endpoint: str, cache_key: str):
+        return self.client.execute("GET", self._key(endpoint, cache_key))
+
+    def get_many(self, endpoint: str, cache_keys: list) -> list:
+        if not cache_keys:
+            return []
+        return self.client.execute_many([("GET", self._key(endpoint, cache_key)) for cache_key in cache_keys])
+
+    def set(self, endpoint: str, cache_key: str, blob: bytes, ttl_seconds: float):
+        self.set_many(endpoint, [(cache_key, blob)], ttl_seconds)
+
+    def set_many(self, endpoint: str, items: list, ttl_seconds: float):
+        if not items:
+            return
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.client.execute_many([
+            ("SET", self._key(endpoint, cache_key), blob, "PX", ttl_ms) for cache_key, blob in items
+        ])
+
+    def single_flight(self, endpoint: str, cache_key: str, timeout: float, on_wait=None) -> RedisSingleFlight:
+        return RedisSingleFlight(self.client, f"{self.prefix}lock:{endpoint}:{cache_key}", timeout, on_wait)
+
+    def _scan(self, pattern: str):
+        cursor = b"0"
+        while True:
+            cursor, keys = self.client.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 1000)
+            yield from keys
+            if cursor in (b"0", 0):
+                return
+
+    def clear_expired(self, ttl) -> int:
+        # Expiry is server-side
+        return 0
+
+    def clear_all(self) -> int:
+        keys = list(self._scan(f"{self.prefix}*"))
+        for i in range(0, len(keys), 1000):
+            self.client.execute("DEL", *keys[i:i + 1000])
+        return len(keys)
+
+    def stats(self, ttl) -> dict:
+        per_endpoint = {}
+        total = 0
+        for key in self._scan(f"{self.prefix}*"):
+            namespace = key.decode()[len(self.prefix):].rpartition(":")[0]
+            if namespace.startswith("lock:"):
+                continue
+            per_endpoint[namespace] = per_endpoint.get(namespace, 0) + 1
+            total += 1
+        return {'total': total, 'valid': total, 'expired': 0, 'per_endpoint': per_endpoint, 'url': self.url}
+
+
+def parse_size(value) -> int:
+    """
+    Parse a byte size such as 500000, "200KB", "50MB" or "1.5GB" (powers of 1024)
+
+    Returns:
+        int or None for an empty value
+    """
+    if value is None or str(value).strip() == "":
+        return None
+    text = str(value).strip().upper().removesuffix("B")
+    for suffix, factor in (("K", 1024), ("M", 1024 ** 2), ("G", 1024 ** 3)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(float(text))
+
+
+def parse_quotas(spec: str) -> dict:
+    """Parse "endpoint=size,..." (e.g. "getGrantProposal=50MB,investors=20MB") into byte quotas"""
+    quotas = {}
+    for item in (spec or "").split(","):
+        if item.strip():
+            endpoint, _, size = item.partition("=")
+            quotas[endpoint.strip()] = parse_size(size)
+    return quotas
+
+
+def create_cache_backend(spec: str = None, cache_dir=".cache", max_bytes: int = None,
+                         endpoint_quotas: dict = None, eviction: str = "lru"):
+    """
+    Build a backend from a spec string (CACHE_BACKEND)
+
+    Args:
+        spec: "file" or "redis://host:port/db"
+        cache_dir: Directory for the file backend
+        max_bytes: Byte budget for the file backend (None = unbounded)
+        endpoint_quotas: Per-endpoint byte budgets for the file backend
+        eviction: "lru" or "lfu" (file backend)
+
+    Raises:
+        ValueError: For an unknown scheme
+    """
+    spec = (spec or "file").strip()
+    if spec == "file":
+        return FileCacheBackend(cache_dir, max_bytes=max_bytes, endpoint_quotas=endpoint_quotas, eviction=eviction)
+    if spec.startswith("redis://"):
+        if max_bytes or endpoint_quotas:
+            # Redis enforces its own budget: maxmemory + maxmemory-policy allkeys-lru/allkeys-lfu
+            print("⚠️ Cache byte budget ignored for the Redis backend; set maxmemory on the server")
+        return RedisCacheBackend(spec)
+    raise ValueError(f"Unknown cache backend: {spec!r} (use file or redis://host:port/db)")
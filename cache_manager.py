@@ -1,41 +1,254 @@
 """
-Simple file-based caching system for API responses
+Simple caching system for API responses
 Reduces OpenRouter API calls and helps with rate limiting
+
+Entries live in a pluggable backend (cache_backends.py): a file directory by default,
+safe with several uvicorn workers on one host, or a Redis-protocol server shared by
+every instance. single_flight() lets only one worker regenerate a missing key
 """
+import atexit
 import json
 import hashlib
-import os
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from pathlib import Path
 import time
 
+from cache_backends import FileCacheBackend
+from cache_snapshot import CacheSnapshot
+from metrics import CACHE_BYTES, CACHE_ENTRIES, CACHE_LIMIT_BYTES, CACHE_LOOKUP, CACHE_WRITE, CACHE_WRITE_QUEUE
+from rate_limit_backends import MemoryRateLimitBackend
+from redis_protocol import RedisError
+
+
+class WriteBehindWriter:
+    """
+    Background persistence for ResponseCache in write-behind mode
+    
+    set() only records the response in a pending table, which doubles as the memory
+    tier until the entry is on the backend. A writer thread persists pending entries
+    in batches (one set_many per endpoint), serializing them off the request path.
+    Writing the same key again before it is persisted replaces the pending value, so
+    only the latest version is written
+    """
+    
+    def __init__(self, backend, encode, ttl_seconds: float, max_pending: int = 1000,
+                 batch_size: int = 100, flush_interval: float = 0.5):
+        """
+        Args:
+            backend: Cache backend to persist to
+            encode: Callable(endpoint, response, timestamp) -> bytes
+            ttl_seconds: Entry TTL passed to the backend
+            max_pending: Queue bound; put() refuses entries beyond it
+            batch_size: Maximum entries persisted per batch
+            flush_interval: Seconds a pending entry may wait for a batch to fill
+        """
+        self.backend = backend
+        self.encode = encode
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # (endpoint, cache_key) -> [response, timestamp, flights to release once persisted]
+        self.pending = OrderedDict()
+        self.stats = {'queued': 0, 'coalesced': 0, 'persisted': 0, 'batches': 0, 'overflows': 0, 'errors': 0}
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="cache-write-behind", daemon=True)
+        self._thread.start()
+    
+    def put(self, endpoint: str, cache_key: str, response, timestamp: datetime) -> bool:
+        """
+        Queue an entry for persistence
+        
+        Returns:
+            False if the queue is full (the caller should write synchronously)
+        """
+        key = (endpoint, cache_key)
+        with self._cond:
+            old = self.pending.get(key)
+            if old is not None:
+                self.pending[key] = [response, timestamp, old[2]]
+                self.stats['coalesced'] += 1
+                return True
+            if len(self.pending) >= self.max_pending:
+                self.stats['overflows'] += 1
+                return False
+            self.pending[key] = [response, timestamp, []]
+            self.stats['queued'] += 1
+            CACHE_WRITE_QUEUE.set(len(self.pending))
+            if len(self.pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+    
+    def get(self, endpoint: str, cache_key: str):
+        """Return (response, timestamp) of a pending entry, or None"""
+        with self._cond:
+            entry = self.pending.get((endpoint, cache_key))
+            return (entry[0], entry[1]) if entry is not None else None
+    
+    def hold_flight(self, endpoint: str, cache_key: str, flight) -> bool:
+        """
+        Keep a single-flight lock until the key is persisted, so workers waiting on it
+        find the entry on the backend when they get the lock
+        
+        Returns:
+            False if the key isn't pending (the caller releases the lock itself)
+        """
+        with self._cond:
+            entry = self.pending.get((endpoint, cache_key))
+            if entry is None:
+                return False
+            entry[2].append(flight)
+            return True
+    
+    def flush(self, timeout: float = 30) -> bool:
+        """
+        Persist everything pending now
+        
+        Returns:
+            True if the queue drained within the timeout
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            drained = self._cond.wait_for(lambda: not self.pending or not self._thread.is_alive(), timeout)
+            self._flush_requested = False
+            return drained and not self.pending
+    
+    def close(self, timeout: float = 30) -> bool:
+        """Flush and stop the writer thread"""
+        drained = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        return drained
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or self._flush_requested or len(self.pending) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping and not self.pending:
+                    return
+                batch = list(self.pending.items())[:self.batch_size]
+            if batch:
+                self._persist(batch)
+            with self._cond:
+                self._cond.notify_all()
+    
+    def _persist(self, batch: list):
+        by_endpoint = {}
+        for (endpoint, cache_key), entry in batch:
+            by_endpoint.setdefault(endpoint, []).append((cache_key, entry))
+        
+        for endpoint, entries in by_endpoint.items():
+            try:
+                self.backend.set_many(endpoint, [
+                    (cache_key, self.encode(endpoint, entry[0], entry[1])) for cache_key, entry in entries
+                ], self.ttl_seconds)
+                self.stats['persisted'] += len(entries)
+            except Exception as e:
+                # Dropped like a failed synchronous write; the next miss regenerates it
+                print(f"⚠️ Cache write-behind error for {endpoint}: {e}")
+                self.stats['errors'] += len(entries)
+        
+        with self._cond:
+            self.stats['batches'] += 1
+            flights = []
+            for key, entry in batch:
+                flights.extend(entry[2])
+                entry[2].clear()
+                # A newer value set meanwhile stays pending for the next batch
+                if self.pending.get(key) is entry:
+                    del self.pending[key]
+            CACHE_WRITE_QUEUE.set(len(self.pending))
+        for flight in flights:
+            flight.__exit__(None, None, None)
+
+
+class _HandOffFlight:
+    """single_flight() wrapper that hands the lock to the write-behind writer on exit"""
+    
+    def __init__(self, flight, writer: WriteBehindWriter, endpoint: str, cache_key: str):
+        self._flight = flight
+        self._writer = writer
+        self._endpoint = endpoint
+        self._cache_key = cache_key
+    
+    def __getattr__(self, name):
+        return getattr(self._flight, name)
+    
+    def __enter__(self):
+        self._flight.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        if not self._writer.hold_flight(self._endpoint, self._cache_key, self._flight):
+            self._flight.__exit__(*exc_info)
+        return False
+
+
 class ResponseCache:
-    def __init__(self, cache_dir=".cache", ttl_hours=24):
+    def __init__(self, cache_dir=".cache", ttl_hours=24, max_tracked_keys=10000,
+                 snapshot_path=None, snapshot_ttl_hours=None, backend=None,
+                 write_behind=False, write_behind_max_pending=1000, write_behind_batch_size=100,
+                 write_behind_flush_interval=0.5):
         """
         Initialize the cache system
         
         Args:
-            cache_dir: Directory to store cache files
+            cache_dir: Directory to store cache files (file backend)
             ttl_hours: Time-to-live for cached responses in hours
+            max_tracked_keys: Maximum number of keys kept in the access-frequency table
+            snapshot_path: Optional read-only snapshot (see cache_snapshot.py) served
+                as a lower tier when the backend misses
+            snapshot_ttl_hours: Time-to-live for snapshot entries (None = never expire,
+                the snapshot is as fresh as the deployment that ships it)
+            backend: Entry storage (see cache_backends.py); default FileCacheBackend(cache_dir)
+            write_behind: Return from set() immediately and persist in the background
+                (see WriteBehindWriter); call close() on shutdown to flush
+            write_behind_max_pending: Pending entries before set() writes synchronously
+            write_behind_batch_size: Maximum entries per background batch
+            write_behind_flush_interval: Seconds an entry may wait for its batch
         """
-        # Detect serverless/read-only environments and use /tmp instead
-        if cache_dir == ".cache":
-            # Try to create the directory to test if filesystem is writable
+        self.backend = backend or FileCacheBackend(cache_dir)
+        self.cache_dir = getattr(self.backend, "cache_dir", None)
+        self.ttl = timedelta(hours=ttl_hours)
+        
+        # Read-only lower tier, memory-mapped; new entries always go to the backend
+        self.snapshot = None
+        self.snapshot_ttl = timedelta(hours=snapshot_ttl_hours) if snapshot_ttl_hours else None
+        if snapshot_path:
             try:
-                test_dir = Path(cache_dir)
-                test_dir.mkdir(exist_ok=True)
-                self.cache_dir = test_dir
-            except (OSError, PermissionError):
-                # Filesystem is read-only (serverless environment)
-                # Use /tmp directory instead
-                print(f"⚠️  Read-only filesystem detected, using /tmp for cache")
-                self.cache_dir = Path("/tmp/.cache")
-                self.cache_dir.mkdir(exist_ok=True)
-        else:
-            self.cache_dir = Path(cache_dir)
-            self.cache_dir.mkdir(exist_ok=True)
+                self.snapshot = CacheSnapshot(snapshot_path)
+                print(f"📦 Cache snapshot loaded: {snapshot_path} ({len(self.snapshot)} entries)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Cache snapshot unavailable: {e}")
         
-        self.ttl = timedelta(hours=ttl_hours)
+        # Access-frequency tracking (used by the refresh-ahead scheduler)
+        self.max_tracked_keys = max_tracked_keys
+        self.access_stats = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.read_errors = 0
+        self.single_flight_waits = 0
+        self._stats_lock = threading.Lock()
+        
+        self.writer = None
+        if write_behind:
+            self.writer = WriteBehindWriter(
+                self.backend, self._encode, self.ttl.total_seconds(),
+                max_pending=write_behind_max_pending,
+                batch_size=write_behind_batch_size,
+                flush_interval=write_behind_flush_interval,
+            )
+            # Don't lose pending entries if the process exits without close()
+            atexit.register(self.close)
         
     def _get_cache_key(self, endpoint: str, data: dict) -> str:
         """Generate a unique cache key based on endpoint and request data"""
@@ -45,46 +258,167 @@ class ResponseCache:
         key_str = f"{endpoint}:{data_str}"
         return hashlib.md5(key_str.encode()).hexdigest()
     
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get the file path for a cache key"""
-        return self.cache_dir / f"{cache_key}.json"
-    
-    def get(self, endpoint: str, data: dict):
+    def get(self, endpoint: str, data: dict, record_stats: bool = True, max_stale: float = 0):
         """
         Retrieve cached response if available and not expired
         
         Args:
             endpoint: API endpoint name
             data: Request data
+            record_stats: Count the lookup as a hit/miss (False for the re-check
+                inside single_flight, which would otherwise count every miss twice)
+            max_stale: Seconds past expiry an entry is still acceptable (a client's
+                Cache-Control: max-stale); expired entries are only served while the
+                backend still holds them
             
         Returns:
             Cached response or None if not found/expired
         """
+        lookup_start = time.perf_counter()
+        cache_key = self._get_cache_key(endpoint, data)
+        
+        pending = self.writer.get(endpoint, cache_key) if self.writer is not None else None
+        blob = None
+        if pending is None:
+            try:
+                blob = self.backend.get(endpoint, cache_key)
+            except (OSError, RedisError) as e:
+                self._record_read_error(e)
+        return self._resolve(endpoint, data, cache_key, blob, record_stats, lookup_start, pending, max_stale)
+    
+    def get_many(self, endpoint: str, data_list: list) -> list:
+        """
+        Look up several requests of one endpoint in a single backend round trip
+        
+        Args:
+            endpoint: API endpoint name
+            data_list: Request data for each lookup
+            
+        Returns:
+            Cached responses (None for misses), in the order of data_list
+        """
+        lookup_start = time.perf_counter()
+        cache_keys = [self._get_cache_key(endpoint, data) for data in data_list]
+        pending = [self.writer.get(endpoint, cache_key) if self.writer is not None else None for cache_key in cache_keys]
+        blobs = [None] * len(cache_keys)
+        missing = [i for i, entry in enumerate(pending) if entry is None]
+        if missing:
+            try:
+                for i, blob in zip(missing, self.backend.get_many(endpoint, [cache_keys[i] for i in missing])):
+                    blobs[i] = blob
+            except (OSError, RedisError) as e:
+                self._record_read_error(e)
+        return [
+            self._resolve(endpoint, data, cache_key, blob, True, lookup_start, entry)
+            for data, cache_key, blob, entry in zip(data_list, cache_keys, blobs, pending)
+        ]
+    
+    def record_access(self, endpoint: str, data: dict) -> bool:
+        """
+        Count an access to an entry that was served by a cache layered on top of this one
+        
+        The access-frequency table drives refresh-ahead, so an entry whose result is
+        served from a derived cache (e.g. a full response built from it) would
+        otherwise look cold and expire. Hit/miss counters are left alone.
+        
+        Args:
+            endpoint: API endpoint name
+            data: Request data
+            
+        Returns:
+            bool: Whether the entry is cached (nothing is recorded otherwise)
+        """
         cache_key = self._get_cache_key(endpoint, data)
-        cache_path = self._get_cache_path(cache_key)
+        pending = self.writer.get(endpoint, cache_key) if self.writer is not None else None
+        if pending is not None:
+            expires_at = pending[1] + self.ttl
+        else:
+            try:
+                blob = self.backend.get(endpoint, cache_key)
+            except (OSError, RedisError) as e:
+                self._record_read_error(e)
+                return False
+            entry = self._decode(blob) if blob is not None else None
+            if entry is None and self.snapshot is not None:
+                entry = self._get_from_snapshot(cache_key)
+            if entry is None:
+                return False
+            expires_at = entry[2]
+        with self._stats_lock:
+            self._track_access(cache_key, endpoint, data, expires_at)
+        return True
+    
+    def _resolve(self, endpoint: str, data: dict, cache_key: str, blob, record_stats: bool, lookup_start: float,
+                 pending=None, max_stale: float = 0):
+        """Decode a backend entry (or take the pending write-behind one), fall back to the snapshot, and record the lookup"""
+        tier = self.backend.tier
+        entry = self._decode(blob, max_stale) if blob is not None else None
+        if pending is not None:
+            tier = "memory"
+            response, cached_time = pending
+            entry = (response, cached_time, cached_time + self.ttl)
+        if entry is None and self.snapshot is not None:
+            tier = "snapshot"
+            entry = self._get_from_snapshot(cache_key, max_stale)
+        
+        if not record_stats:
+            return entry[0] if entry is not None else None
         
-        if not cache_path.exists():
+        if entry is None:
+            self._record_miss(lookup_start)
             return None
         
+        response, cached_time, expires_at = entry
+        print(f"✅ Cache HIT for {endpoint} ({tier}, age: {datetime.now() - cached_time})")
+        self._record_hit(cache_key, endpoint, data, expires_at)
+        CACHE_LOOKUP.observe(time.perf_counter() - lookup_start, tier=tier, result="hit")
+        return response
+    
+    def _decode(self, blob: bytes, max_stale: float = 0):
+        """Return (response, cached_time, expires_at) for a stored entry, or None if expired/corrupted"""
         try:
-            with open(cache_path, 'r') as f:
-                cached = json.load(f)
-            
-            # Check if cache is expired
+            cached = json.loads(blob)
             cached_time = datetime.fromisoformat(cached['timestamp'])
-            if datetime.now() - cached_time > self.ttl:
-                # Cache expired, delete it
-                cache_path.unlink()
-                return None
-            
-            print(f"✅ Cache HIT for {endpoint} (age: {datetime.now() - cached_time})")
-            return cached['response']
-            
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"⚠️ Cache read error: {e}")
-            # Delete corrupted cache file
-            cache_path.unlink(missing_ok=True)
+            response = cached['response']
+        except (KeyError, ValueError, TypeError) as e:
+            self._record_read_error(e)
+            return None
+        
+        # Check if cache is expired (beyond what the caller accepts as stale)
+        if (datetime.now() - cached_time - self.ttl).total_seconds() > max_stale:
+            return None
+        
+        return response, cached_time, cached_time + self.ttl
+    
+    def _record_read_error(self, error: Exception):
+        print(f"⚠️ Cache read error: {error}")
+        with self._stats_lock:
+            self.read_errors += 1
+    
+    def _get_from_snapshot(self, cache_key: str, max_stale: float = 0):
+        """Return (response, cached_time, expires_at) from the read-only snapshot, or None"""
+        try:
+            found = self.snapshot.get(cache_key)
+        except (ValueError, KeyError) as e:
+            print(f"⚠️ Cache snapshot read error: {e}")
             return None
+        if found is None:
+            return None
+        
+        cached_time, cached = found
+        if self.snapshot_ttl is None:
+            return cached['response'], cached_time, datetime.max
+        if (datetime.now() - cached_time - self.snapshot_ttl).total_seconds() > max_stale:
+            return None
+        return cached['response'], cached_time, cached_time + self.snapshot_ttl
+    
+    def _encode(self, endpoint: str, response, timestamp: datetime = None) -> bytes:
+        cached_data = {
+            'timestamp': (timestamp or datetime.now()).isoformat(),
+            'endpoint': endpoint,
+            'response': response
+        }
+        return json.dumps(cached_data, indent=2).encode()
     
     def set(self, endpoint: str, data: dict, response):
         """
@@ -95,42 +429,169 @@ class ResponseCache:
             data: Request data
             response: Response to cache
         """
-        cache_key = self._get_cache_key(endpoint, data)
-        cache_path = self._get_cache_path(cache_key)
+        self.set_many(endpoint, [(data, response)])
+    
+    def set_many(self, endpoint: str, items: list):
+        """
+        Store several responses of one endpoint in a single backend round trip
         
+        Args:
+            endpoint: API endpoint name
+            items: List of (request data, response) pairs
+        """
+        write_start = time.perf_counter()
+        mode = "sync"
         try:
-            cached_data = {
-                'timestamp': datetime.now().isoformat(),
-                'endpoint': endpoint,
-                'response': response
-            }
+            now = datetime.now()
+            keyed = [(self._get_cache_key(endpoint, data), response) for data, response in items]
+            if self.writer is not None:
+                mode = "write_behind"
+                # Anything the bounded queue refuses is written synchronously
+                keyed = [(cache_key, response) for cache_key, response in keyed
+                         if not self.writer.put(endpoint, cache_key, response, now)]
+            if keyed:
+                entries = [(cache_key, self._encode(endpoint, response, now)) for cache_key, response in keyed]
+                self.backend.set_many(endpoint, entries, self.ttl.total_seconds())
             
-            with open(cache_path, 'w') as f:
-                json.dump(cached_data, f, indent=2)
+            # Keep the expiry of tracked (hot) keys in sync with the new entries
+            with self._stats_lock:
+                for data, _ in items:
+                    stats = self.access_stats.get(self._get_cache_key(endpoint, data))
+                    if stats is not None:
+                        stats['expires_at'] = now + self.ttl
             
-            print(f"💾 Cached response for {endpoint}")
+            print(f"💾 Cached response for {endpoint}" + (f" ({len(items)} entries)" if len(items) > 1 else ""))
             
         except Exception as e:
             print(f"⚠️ Cache write error: {e}")
+        finally:
+            CACHE_WRITE.observe(time.perf_counter() - write_start, mode=mode)
     
-    def clear_expired(self):
-        """Remove all expired cache entries"""
-        removed = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r') as f:
-                    cached = json.load(f)
-                
-                cached_time = datetime.fromisoformat(cached['timestamp'])
-                if datetime.now() - cached_time > self.ttl:
-                    cache_file.unlink()
-                    removed += 1
-                    
-            except Exception:
-                # Remove corrupted files
-                cache_file.unlink(missing_ok=True)
-                removed += 1
+    def single_flight(self, endpoint: str, data: dict, timeout: float = 120):
+        """
+        Lock for regenerating one cache key, shared by every worker using the backend
+        
+        Usage:
+            with cache.single_flight(endpoint, data):
+                # Another worker may have filled the key since our lookup missed
+                result = cache.get(endpoint, data, record_stats=False)
+                if result is None:
+                    ...regenerate and cache.set()...
+        
+        Args:
+            endpoint: API endpoint name
+            data: Request data
+            timeout: Seconds to wait for another worker before regenerating anyway
+        """
+        cache_key = self._get_cache_key(endpoint, data)
+        flight = self.backend.single_flight(endpoint, cache_key, timeout, on_wait=self._record_single_flight_wait)
+        if self.writer is not None:
+            # Keep the lock until the new entry is persisted, not just queued
+            return _HandOffFlight(flight, self.writer, endpoint, cache_key)
+        return flight
+    
+    def flush(self, timeout: float = 30) -> bool:
+        """Persist pending write-behind entries now (no-op without write-behind)"""
+        return self.writer.flush(timeout) if self.writer is not None else True
+    
+    def close(self, timeout: float = 30) -> bool:
+        """Flush pending write-behind entries and stop the writer thread"""
+        if self.writer is None:
+            return True
+        pending = len(self.writer.pending)
+        drained = self.writer.close(timeout)
+        if pending:
+            print(f"💾 Flushed {pending} pending cache writes" + ("" if drained else " (timed out)"))
+        return drained
+    
+    def _record_single_flight_wait(self):
+        with self._stats_lock:
+            self.single_flight_waits += 1
+    
+    def _record_miss(self, lookup_start: float):
+        """Count a cache miss"""
+        with self._stats_lock:
+            self.misses += 1
+        CACHE_LOOKUP.observe(time.perf_counter() - lookup_start, tier=self.backend.tier, result="miss")
+    
+    def _record_hit(self, cache_key: str, endpoint: str, data: dict, expires_at: datetime):
+        """
+        Count a cache hit and update the access-frequency table for the key
+        
+        Args:
+            cache_key: Hashed cache key
+            endpoint: API endpoint name
+            data: Request data (kept so the entry can be regenerated)
+            expires_at: When the cached entry expires
+        """
+        with self._stats_lock:
+            self.hits += 1
+            self._track_access(cache_key, endpoint, data, expires_at)
+    
+    def _track_access(self, cache_key: str, endpoint: str, data: dict, expires_at: datetime):
+        """Update the access-frequency table for a key (caller holds _stats_lock)"""
+        now = time.time()
+        stats = self.access_stats.get(cache_key)
+        if stats is None:
+            stats = {
+                'endpoint': endpoint,
+                'data': data,
+                'hit_times': deque(maxlen=256),
+            }
+            self.access_stats[cache_key] = stats
+        stats['hit_times'].append(now)
+        stats['last_hit'] = now
+        stats['expires_at'] = expires_at
+        self.access_stats.move_to_end(cache_key)
+        
+        # Forget the least recently accessed keys once the table is full
+        while len(self.access_stats) > self.max_tracked_keys:
+            self.access_stats.popitem(last=False)
+    
+    def get_hot_entries(self, min_hits_per_hour: float, expiring_within: timedelta, window_seconds: int = 3600):
+        """
+        Find frequently accessed entries that are about to expire
+        
+        Args:
+            min_hits_per_hour: Minimum hit rate for an entry to be considered hot
+            expiring_within: Only return entries expiring within this interval
+            window_seconds: Sliding window used to compute the hit rate
+            
+        Returns:
+            List of dicts (cache_key, endpoint, data, expires_at, hits_per_hour),
+            hottest first
+        """
+        now = time.time()
+        deadline = datetime.now() + expiring_within
+        hot = []
+        
+        with self._stats_lock:
+            for cache_key, stats in self.access_stats.items():
+                if stats['expires_at'] > deadline:
+                    continue
+                recent_hits = sum(1 for t in stats['hit_times'] if now - t <= window_seconds)
+                hits_per_hour = recent_hits * 3600 / window_seconds
+                if hits_per_hour >= min_hits_per_hour:
+                    hot.append({
+                        'cache_key': cache_key,
+                        'endpoint': stats['endpoint'],
+                        'data': stats['data'],
+                        'expires_at': stats['expires_at'],
+                        'hits_per_hour': hits_per_hour,
+                    })
         
+        hot.sort(key=lambda entry: entry['hits_per_hour'], reverse=True)
+        return hot
+    
+    def get_last_hit(self, cache_key: str):
+        """Return the time.time() of the last hit for a key, or None if untracked"""
+        with self._stats_lock:
+            stats = self.access_stats.get(cache_key)
+            return stats['last_hit'] if stats else None
+    
+    def clear_expired(self):
+        """Remove all expired cache entries (no-op for backends with server-side TTLs)"""
+        removed = self.backend.clear_expired(self.ttl)
         if removed > 0:
             print(f"🗑️ Removed {removed} expired cache entries")
         
@@ -138,68 +599,98 @@ class ResponseCache:
     
     def clear_all(self):
         """Remove all cache entries"""
-        removed = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
-            removed += 1
-        
+        removed = self.backend.clear_all()
         print(f"🗑️ Cleared all cache ({removed} entries)")
         return removed
     
+    def update_occupancy_metrics(self):
+        """Export per-endpoint bytes/entries and configured limits (bounded file cache only)"""
+        occupancy = getattr(self.backend, "occupancy", lambda: None)()
+        if occupancy is None:
+            return
+        for endpoint, usage in occupancy.items():
+            CACHE_BYTES.set(usage['bytes'], endpoint=endpoint)
+            CACHE_ENTRIES.set(usage['entries'], endpoint=endpoint)
+        if self.backend.max_bytes:
+            CACHE_LIMIT_BYTES.set(self.backend.max_bytes, endpoint="all")
+        for endpoint, quota in self.backend.endpoint_quotas.items():
+            CACHE_LIMIT_BYTES.set(quota, endpoint=endpoint)
+    
     def get_stats(self):
         """Get cache statistics"""
-        total = 0
-        expired = 0
-        valid = 0
+        backend_stats = self.backend.stats(self.ttl)
         
-        for cache_file in self.cache_dir.glob("*.json"):
-            total += 1
-            try:
-                with open(cache_file, 'r') as f:
-                    cached = json.load(f)
-                
-                cached_time = datetime.fromisoformat(cached['timestamp'])
-                if datetime.now() - cached_time > self.ttl:
-                    expired += 1
-                else:
-                    valid += 1
-                    
-            except Exception:
-                expired += 1
+        with self._stats_lock:
+            hits = self.hits
+            misses = self.misses
+            tracked_keys = len(self.access_stats)
+            read_errors = self.read_errors
+            single_flight_waits = self.single_flight_waits
+        
+        if self.writer is not None:
+            backend_stats['write_behind'] = {**self.writer.stats, 'pending': len(self.writer.pending)}
         
         return {
-            'total': total,
-            'valid': valid,
-            'expired': expired,
-            'cache_dir': str(self.cache_dir)
+            **backend_stats,
+            'backend': self.backend.name,
+            'hits': hits,
+            'misses': misses,
+            'tracked_keys': tracked_keys,
+            'read_errors': read_errors,
+            'single_flight_waits': single_flight_waits,
+            'snapshot_entries': len(self.snapshot) if self.snapshot is not None else 0,
         }
 
 
 class RateLimiter:
-    """Simple rate limiter to prevent hitting API limits"""
+    """
+    Simple rate limiter to prevent hitting API limits
     
-    def __init__(self, min_interval_seconds=120):
+    State lives in a pluggable backend (see rate_limit_backends.py); use a shared
+    one when running several workers so they respect one limit together
+    """
+    
+    def __init__(self, min_interval_seconds=120, backend=None):
         """
         Initialize rate limiter
         
         Args:
             min_interval_seconds: Minimum seconds between API calls (default 120s)
+            backend: Slot storage (default: per-process MemoryRateLimitBackend)
         """
         self.min_interval = min_interval_seconds
-        self.last_call_time = {}
+        self.backend = backend or MemoryRateLimitBackend()
     
-    def wait_if_needed(self, endpoint: str):
+    def time_until_allowed(self, endpoint: str, burst: int = 1) -> float:
         """
-        Wait if necessary to respect rate limits
+        Seconds until a call to endpoint would go through without waiting
         
         Args:
             endpoint: API endpoint name
+            burst: Burst budget the call would be made with (see wait_if_needed)
         """
-        if endpoint in self.last_call_time:
-            elapsed = time.time() - self.last_call_time[endpoint]
-            if elapsed < self.min_interval:
-                wait_time = self.min_interval - elapsed
-                print(f"⏳ Rate limit: waiting {wait_time:.1f}s before calling {endpoint}")
-                time.sleep(wait_time)
+        last_call = self.backend.last_call(endpoint)
+        if last_call is None:
+            return 0.0
+        return max(0.0, last_call + self.min_interval * (2 - burst) - time.time())
+    
+    def wait_if_needed(self, endpoint: str, burst: int = 1) -> float:
+        """
+        Wait if necessary to respect rate limits
         
-        self.last_call_time[endpoint] = time.time()
+        Reserves the next free slot before sleeping, so concurrent callers queue
+        up one interval apart instead of all waking at the same moment
+        
+        Args:
+            endpoint: API endpoint name
+            burst: Calls that may go through back to back after the endpoint has been
+                idle (the parts of one document); the budget refills one call per interval
+            
+        Returns:
+            Seconds spent waiting
+        """
+        wait_time = self.backend.reserve(endpoint, self.min_interval, burst)
+        if wait_time > 0:
+            print(f"⏳ Rate limit: waiting {wait_time:.1f}s before calling {endpoint}")
+            time.sleep(wait_time)
+        return wait_time
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Read-only cache snapshot bundles
+Packs a ResponseCache directory into one indexed file that can ship with a
+deployment. At startup the app memory-maps the snapshot and serves hits straight
+from it (binary search over a sorted index, no unpacking) as a lower tier below
+the writable cache directory
+
+File layout (little-endian):
+    header   MAGIC, entry count, index offset
+    data     compact JSON entries ({"timestamp", "endpoint", "response"}) back to back
+    index    one record per entry, sorted by cache key:
+             16-byte MD5 cache key, data offset, data length, timestamp (epoch seconds)
+
+Usage:
+    python cache_snapshot.py export --cache-dir .cache --output cache_snapshot.bin
+    python cache_snapshot.py inspect cache_snapshot.bin
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+
+MAGIC = b"TEDCSNP1"
+HEADER = struct.Struct("<8sIQ")
+INDEX_RECORD = struct.Struct("<16sQId")
+
+
+class CacheSnapshot:
+    """Memory-mapped, read-only view of a snapshot file"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file written by export_snapshot
+
+        Raises:
+            ValueError: If the file is not a valid snapshot
+        """
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, self._index_offset = (
+            HEADER.unpack_from(self._mm, 0) if len(self._mm) >= HEADER.size else (None, 0, 0)
+        )
+        expected_size = self._index_offset + self.count * INDEX_RECORD.size
+        if magic != MAGIC or len(self._mm) != expected_size:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a valid cache snapshot")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, i: int) -> tuple:
+        return INDEX_RECORD.unpack_from(self._mm, self._index_offset + i * INDEX_RECORD.size)
+
+    def _find(self, key: bytes):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def get(self, cache_key: str):
+        """
+        Look up an entry by its ResponseCache key
+
+        Args:
+            cache_key: Hex MD5 key as produced by ResponseCache._get_cache_key
+
+        Returns:
+            (timestamp as datetime, cached entry dict) or None if not in the snapshot
+        """
+        record = self._find(bytes.fromhex(cache_key))
+        if record is None:
+            return None
+        _, offset, length, timestamp = record
+        return datetime.fromtimestamp(timestamp), json.loads(self._mm[offset:offset + length])
+
+    def entries(self):
+        """Yield (cache_key, endpoint, timestamp) for every entry, in index order"""
+        for i in range(self.count):
+            key, offset, length, timestamp = self._record(i)
+            endpoint = json.loads(self._mm[offset:offset + length]).get("endpoint")
+            yield key.hex(), endpoint, datetime.fromtimestamp(timestamp)
+
+    def close(self):
+        self._mm.close()
+
+
+def export_snapshot(cache_dir: str, output: str, max_age_hours: float = None) -> dict:
+    """
+    Write every readable entry of a cache directory into a snapshot file
+
+    Args:
+        cache_dir: ResponseCache directory (files named <md5>.json)
+        output: Snapshot file to write (replaced atomically)
+        max_age_hours: Skip entries older than this (None keeps everything)
+
+    Returns:
+        dict: entries written, entries skipped, file size in bytes
+    """
+    entries = []
+    skipped = 0
+    now = datetime.now()
+    for cache_file in Path(cache_dir).glob("*.json"):
+        try:
+            with open(cache_file, "r") as f:
+                cached = json.load(f)
+            key = bytes.fromhex(cache_file.stem)
+            timestamp = datetime.fromisoformat(cached["timestamp"])
+        except (OSError, ValueError, KeyError):
+            skipped += 1
+            continue
+        if len(key) != 16 or (max_age_hours is not None and (now - timestamp).total_seconds() > max_age_hours * 3600):
+            skipped += 1
+            continue
+        entries.append((key, timestamp.timestamp(), json.dumps(cached, separators=(",", ":")).encode()))
+
+    entries.sort(key=lambda entry: entry[0])
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        index = []
+        offset = HEADER.size
+        for key, timestamp, blob in entries:
+            f.write(blob)
+            index.append(INDEX_RECORD.pack(key, offset, len(blob), timestamp))
+            offset += len(blob)
+        f.write(b"".join(index))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(entries), offset))
+    os.replace(tmp_path, output)
+
+    return {"entries": len(entries), "skipped": skipped, "bytes": os.path.getsize(output)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or inspect a read-only cache snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Pack a cache directory into a snapshot file")
+    export_parser.add_argument("--cache-dir", default=".cache")
+    export_parser.add_argument("--output", default="cache_snapshot.bin")
+    export_parser.add_argument("--max-age-hours", type=float, help="Skip entries older than this")
+
+    inspect_parser = sub.add_parser("inspect", help="List the entries of a snapshot file")
+    inspect_parser.add_argument("snapshot")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = export_snapshot(args.cache_dir, args.output, args.max_age_hours)
+        print(f"📦 Wrote {result['entries']} entries ({result['bytes'] / 1024:.1f} KiB) to {args.output}"
+              f" ({result['skipped']} skipped)")
+        return
+
+    snapshot = CacheSnapshot(args.snapshot)
+    print(f"📦 {args.snapshot}: {len(snapshot)} entries")
+    for cache_key, endpoint, timestamp in snapshot.entries():
+        print(f"  {cache_key}  {endpoint:<24} {timestamp.isoformat(timespec='seconds')}")
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Response compression
+Pure ASGI middleware gzip-encoding text responses (markdown/JSON/SSE) for clients
+that accept it. Audio, PDF and other already-compressed media pass through untouched,
+and streamed bodies are flushed chunk by chunk so streaming stays incremental.
+"""
+import zlib
+
+from http_caching import GZIP_ETAG_SUFFIX
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (and doesn't set q=0 for it)"""
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            params = params.replace(" ", "")
+            return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    """Gzip-encode compressible responses of at least minimum_size bytes"""
+
+    def __init__(self, app, minimum_size: int = 1000, level: int = 6):
+        """
+        Args:
+            app: ASGI application
+            minimum_size: Smaller single-body responses are sent uncompressed
+            level: zlib compression level (6 is ~3x faster than 9 for markdown,
+                at a few percent larger output)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        if not accepts_gzip(accept_encoding.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def compress_send(message):
+            if message["type"] == "http.response.start":
+                if self._eligible(message):
+                    state["start"] = message
+                else:
+                    state["passthrough"] = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            compressor = state["compressor"]
+            if compressor is None:
+                start = state["start"]
+                if not more_body and len(body) < self.minimum_size:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                # wbits=31: gzip container
+                compressor = state["compressor"] = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+                data = compressor.compress(body)
+                data += compressor.flush() if not more_body else compressor.flush(zlib.Z_SYNC_FLUSH)
+                start["headers"] = self._encoded_headers(start["headers"], None if more_body else len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            # Later chunks of a streamed body: flush each so the client sees it immediately
+            data = compressor.compress(body)
+            data += compressor.flush() if not more_body else compressor.flush(zlib.Z_SYNC_FLUSH)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, compress_send)
+
+    @staticmethod
+    def _eligible(start: dict) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        content_type = b""
+        for name, value in start.get("headers", []):
+            name = name.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1").lower()
+        return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _encoded_headers(headers: list, length: int) -> list:
+        """Response headers for the gzip representation (length None = streamed)"""
+        encoded = []
+        vary = None
+        for name, value in headers:
+            lower = name.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"vary":
+                vary = value
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # Distinct strong validator for the encoded representation
+                value = value[:-1] + GZIP_ETAG_SUFFIX.encode() + b'"'
+            encoded.append((name, value))
+        encoded.append((b"content-encoding", b"gzip"))
+        if vary is None:
+            encoded.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary.lower():
+            encoded.append((b"vary", vary + b", Accept-Encoding"))
+        else:
+            encoded.append((b"vary", vary))
+        if length is not None:
+            encoded.append((b"content-length", str(length).encode()))
+        return encoded
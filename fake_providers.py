@@ -0,0 +1,397 @@
+"""
+Offline fake-provider server for deterministic load benchmarks
+Speaks the Gemini generateContent, OpenRouter chat-completions, Cloudflare ai/run
+(each also as a server-sent event stream), ElevenLabs text-to-speech and DuckDuckGo
+search shapes, with configurable latency distributions, 429/5xx injection and payload sizes
+
+Usage:
+    python fake_providers.py --port 8900 --latency lognormal:-1.2,0.4 --error-429-rate 0.05
+
+Then point the app at it:
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8900 \\
+    OPENROUTER_API_KEY=fake OPENROUTER_BASE_URL=http://127.0.0.1:8900/api/v1 \\
+    ELEVENLABS_API_KEY=fake ELEVENLABS_BASE_URL=http://127.0.0.1:8900 \\
+    DDG_BASE_URL=http://127.0.0.1:8900 uvicorn main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+PROVIDERS = ("gemini", "openrouter", "cloudflare", "elevenlabs", "ddg")
+
+WORDS = (
+    "community water access sustainable impact funding program local partners "
+    "training outcomes measurable goals budget timeline climate health education "
+    "resilience donors grant mission volunteers infrastructure scale evidence"
+).split()
+
+# "about 150 words" in a prompt sizes the reply like a real model would (~6 chars/word)
+LENGTH_HINT = re.compile(r"about (\d+) words")
+CHARS_PER_WORD = 6
+
+# Streamed replies arrive a few words per event, like real token streams
+STREAM_WORDS_PER_EVENT = 3
+
+# A silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz), repeated to build fake MP3 audio
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def parse_latency(spec: str):
+    """
+    Parse a latency distribution spec into a sampler
+
+    Supported specs (all values in seconds):
+        fixed:0.2
+        uniform:0.1,0.5
+        normal:0.3,0.05         (mean, stddev; clipped at 0)
+        lognormal:-1.2,0.4      (mu, sigma of the underlying normal)
+        exp:0.25                (mean)
+
+    Returns:
+        Callable(rng) -> float
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FakeProviderConfig:
+    """Runtime-tunable behaviour of the fake providers"""
+
+    def __init__(self, latency="uniform:0.05,0.2", error_429_rate=0.0, error_5xx_rate=0.0,
+                 response_chars=3000, audio_bytes_per_char=400, decode_chars_per_second=0.0, seed=42):
+        """
+        Args:
+            latency: Default latency spec, or dict of provider -> spec (key "default" for the rest)
+            error_429_rate: Probability of answering 429 Too Many Requests
+            error_5xx_rate: Probability of answering 503 Service Unavailable
+            response_chars: Approximate length of generated LLM text
+            audio_bytes_per_char: Approximate TTS payload size per input character
+            decode_chars_per_second: LLM output rate; adds len(text) / rate seconds on top
+                of the sampled latency so long replies take longer (0 = off)
+            seed: Seed for the random number generator
+        """
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.latency_specs = {}
+        self.samplers = {}
+        self.set_latency(latency)
+        self.error_429_rate = error_429_rate
+        self.error_5xx_rate = error_5xx_rate
+        self.response_chars = response_chars
+        self.audio_bytes_per_char = audio_bytes_per_char
+        self.decode_chars_per_second = decode_chars_per_second
+        self.requests = Counter()
+
+    def set_latency(self, latency):
+        if isinstance(latency, str):
+            latency = {"default": latency}
+        self.latency_specs.update(latency)
+        self.samplers = {name: parse_latency(spec) for name, spec in self.latency_specs.items()}
+
+    def update(self, settings: dict):
+        """Apply a partial settings dict (as accepted by POST /__fake__/config)"""
+        if "latency" in settings:
+            self.set_latency(settings["latency"])
+        for field in ("error_429_rate", "error_5xx_rate", "response_chars", "audio_bytes_per_char",
+                      "decode_chars_per_second"):
+            if field in settings:
+                setattr(self, field, type(getattr(self, field))(settings[field]))
+        if "seed" in settings:
+            self.seed = int(settings["seed"])
+            self.rng = random.Random(self.seed)
+
+    def sample_latency(self, provider: str) -> float:
+        sampler = self.samplers.get(provider) or self.samplers["default"]
+        return sampler(self.rng)
+
+    def sample_failure(self):
+        """Return 429, 503 or None"""
+        roll = self.rng.random()
+        if roll < self.error_429_rate:
+            return 429
+        if roll < self.error_429_rate + self.error_5xx_rate:
+            return 503
+        return None
+
+    def as_dict(self):
+        return {
+            "latency": self.latency_specs,
+            "error_429_rate": self.error_429_rate,
+            "error_5xx_rate": self.error_5xx_rate,
+            "response_chars": self.response_chars,
+            "audio_bytes_per_char": self.audio_bytes_per_char,
+            "decode_chars_per_second": self.decode_chars_per_second,
+            "seed": self.seed,
+        }
+
+
+def generate_text(prompt: str, length: int) -> str:
+    """Deterministic markdown-ish text of roughly `length` characters for a prompt"""
+    rng = random.Random(hashlib.md5(prompt.encode()).hexdigest())
+    parts = []
+    size = 0
+    section = 1
+    while size < length:
+        heading = f"## Section {section}\n\n"
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = heading + " ".join(sentences) + "\n\n"
+        parts.append(paragraph)
+        size += len(paragraph)
+        section += 1
+    return "".join(parts)[:max(length, 1)].rstrip() + "\n"
+
+
+def reply_length(prompt: str, default: int) -> int:
+    """Characters to generate: the prompt's "about N words" hint if it has one"""
+    hints = LENGTH_HINT.findall(prompt)
+    return int(hints[-1]) * CHARS_PER_WORD if hints else default
+
+
+def _prompt_from_messages(messages) -> str:
+    return "\n".join(str(m.get("content", "")) for m in messages or [])
+
+
+def create_app(config: FakeProviderConfig = None) -> FastAPI:
+    """Build the fake-provider FastAPI application"""
+    config = config or FakeProviderConfig()
+    app = FastAPI(title="Fake LLM/TTS providers")
+    app.state.config = config
+
+    async def simulate(provider: str, error_body):
+        """Apply latency and failure injection; return an error response or None"""
+        await asyncio.sleep(config.sample_latency(provider))
+        status = config.sample_failure()
+        config.requests[(provider, status or 200)] += 1
+        if status is not None:
+            return JSONResponse(status_code=status, content=error_body(status))
+        return None
+
+    async def generate(prompt: str) -> str:
+        """LLM reply text, taking decode time proportional to its length"""
+        text = generate_text(prompt, reply_length(prompt, config.response_chars))
+        if config.decode_chars_per_second > 0:
+            await asyncio.sleep(len(text) / config.decode_chars_per_second)
+        return text
+
+    def stream(prompt: str, event, done: bool = False) -> StreamingResponse:
+        """Server-sent events carrying the reply a few words at a time, paced by the decode rate"""
+        text = generate_text(prompt, reply_length(prompt, config.response_chars))
+        words = re.findall(r"\S+\s*", text)
+        pieces = ["".join(words[i:i + STREAM_WORDS_PER_EVENT]) for i in range(0, len(words), STREAM_WORDS_PER_EVENT)]
+
+        async def events():
+            for piece in pieces:
+                if config.decode_chars_per_second > 0:
+                    await asyncio.sleep(len(piece) / config.decode_chars_per_second)
+                yield f"data: {json.dumps(event(piece))}\n\n"
+            if done:
+                yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    def gemini_error(status):
+        return {"error": {"code": status, "message": "Injected failure",
+                          "status": "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"}}
+
+    def openai_error(status):
+        return {"error": {"code": status, "message": "Injected failure"}}
+
+    def cloudflare_error(status):
+        return {"result": None, "success": False,
+                "errors": [{"code": status, "message": "Injected failure"}], "messages": []}
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini_generate_content(model_action: str, request: Request):
+        body = await request.json()
+        error = await simulate("gemini", gemini_error)
+        if error:
+            return error
+        prompt = "\n".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        if model_action.endswith(":streamGenerateContent"):
+            return stream(prompt, lambda piece: {
+                "candidates": [{"content": {"parts": [{"text": piece}], "role": "model"}, "index": 0}],
+            })
+        text = await generate(prompt)
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": (len(prompt) + len(text)) // 4,
+            },
+            "modelVersion": model_action.split(":")[0],
+        }
+
+    @app.post("/api/v1/chat/completions")
+    async def openrouter_chat_completions(request: Request):
+        body = await request.json()
+        error = await simulate("openrouter", openai_error)
+        if error:
+            return error
+        prompt = _prompt_from_messages(body.get("messages"))
+        if body.get("stream"):
+            return stream(prompt, lambda piece: {
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece}}],
+            }, done=True)
+        text = await generate(prompt)
+        return {
+            "id": f"gen-{hashlib.md5(prompt.encode()).hexdigest()[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": (len(prompt) + len(text)) // 4,
+            },
+        }
+
+    @app.post("/client/v4/accounts/{account_id}/ai/run/{model:path}")
+    async def cloudflare_ai_run(account_id: str, model: str, request: Request):
+        body = await request.json()
+        error = await simulate("cloudflare", cloudflare_error)
+        if error:
+            return error
+        prompt = _prompt_from_messages(body.get("messages"))
+        if body.get("stream"):
+            return stream(prompt, lambda piece: {"response": piece}, done=True)
+        return {
+            "result": {"response": await generate(prompt)},
+            "success": True,
+            "errors": [],
+            "messages": [],
+        }
+
+    def fake_audio(text: str, output_format: str) -> bytes:
+        size = max(1, len(text) * config.audio_bytes_per_char)
+        if output_format and output_format.startswith("pcm_"):
+            # 16-bit mono silence
+            return b"\x00" * (size - size % 2)
+        return SILENT_MP3_FRAME * max(1, size // len(SILENT_MP3_FRAME))
+
+    async def elevenlabs_tts(voice_id: str, request: Request):
+        body = await request.json()
+        error = await simulate("elevenlabs", lambda status: {"detail": {"status": status, "message": "Injected failure"}})
+        if error:
+            return error
+        output_format = request.query_params.get("output_format") or "mp3_44100_128"
+        media_type = "audio/mpeg" if output_format.startswith("mp3") else "application/octet-stream"
+        return Response(content=fake_audio(body.get("text", ""), output_format), media_type=media_type)
+
+    app.post("/v1/text-to-speech/{voice_id}")(elevenlabs_tts)
+    app.post("/v1/text-to-speech/{voice_id}/stream")(elevenlabs_tts)
+
+    @app.get("/search")
+    async def ddg_text_search(q: str, max_results: int = 3):
+        error = await simulate("ddg", lambda status: {"error": "Injected failure"})
+        if error:
+            return error
+        digest = hashlib.md5(q.encode()).hexdigest()
+        return [
+            {
+                "title": f"Result {i + 1} for {q}",
+                "href": f"https://example.org/{digest[:8]}/{i + 1}",
+                "body": generate_text(f"{q}:{i}", 200),
+            }
+            for i in range(max_results)
+        ]
+
+    @app.get("/__fake__/config")
+    async def get_config():
+        return config.as_dict()
+
+    @app.post("/__fake__/config")
+    async def update_config(request: Request):
+        config.update(await request.json())
+        return config.as_dict()
+
+    @app.get("/__fake__/stats")
+    async def get_stats():
+        return {f"{provider}:{status}": count for (provider, status), count in sorted(config.requests.items())}
+
+    @app.post("/__fake__/reset")
+    async def reset_stats():
+        config.requests.clear()
+        return {"status": "ok"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline fake LLM/TTS/search provider server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", action="append", default=[],
+                        help="Latency spec, optionally per provider (e.g. gemini=fixed:0.5). Repeatable")
+    parser.add_argument("--error-429-rate", type=float, default=0.0)
+    parser.add_argument("--error-5xx-rate", type=float, default=0.0)
+    parser.add_argument("--response-chars", type=int, default=3000)
+    parser.add_argument("--audio-bytes-per-char", type=int, default=400)
+    parser.add_argument("--decode-chars-per-second", type=float, default=0.0,
+                        help="LLM output rate; long replies take proportionally longer (0 = off)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    latency = {"default": "uniform:0.05,0.2"}
+    for spec in args.latency:
+        provider, sep, dist = spec.partition("=")
+        if sep and provider in PROVIDERS:
+            latency[provider] = dist
+        else:
+            latency["default"] = spec
+
+    config = FakeProviderConfig(
+        latency=latency,
+        error_429_rate=args.error_429_rate,
+        error_5xx_rate=args.error_5xx_rate,
+        response_chars=args.response_chars,
+        audio_bytes_per_char=args.audio_bytes_per_char,
+        decode_chars_per_second=args.decode_chars_per_second,
+        seed=args.seed,
+    )
+
+    import uvicorn
+    print(f"🧪 Fake providers listening on http://{args.host}:{args.port}")
+    print(f"   Config: {config.as_dict()}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
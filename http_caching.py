@@ -0,0 +1,84 @@
+"""
+HTTP caching for the generation endpoints
+Strong ETags derived from the response body, If-None-Match matching, and the
+Cache-Control request directives that map onto ResponseCache lookups:
+
+  no-cache        skip cached entries and regenerate (the new result is cached)
+  max-stale[=N]   accept entries up to N seconds past their TTL (any age without N)
+"""
+import hashlib
+
+# Suffix CompressionMiddleware appends to the ETag of gzip-encoded responses, so the
+# compressed and identity representations never share a strong validator
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+class CacheControl:
+    """Cache-Control request directives relevant to ResponseCache lookups"""
+
+    __slots__ = ("no_cache", "max_stale")
+
+    def __init__(self, no_cache: bool = False, max_stale: float = 0):
+        self.no_cache = no_cache
+        self.max_stale = max_stale
+
+    def __repr__(self):
+        return f"CacheControl(no_cache={self.no_cache}, max_stale={self.max_stale})"
+
+
+def parse_cache_control(header: str) -> CacheControl:
+    """
+    Parse a Cache-Control request header
+
+    Args:
+        header: Header value (e.g. "no-cache" or "max-stale=3600"); None or "" for none
+
+    Returns:
+        CacheControl: Unknown directives and malformed values are ignored
+    """
+    directives = CacheControl()
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        name = name.strip().lower()
+        value = value.strip().strip('"')
+        if name == "no-cache":
+            directives.no_cache = True
+        elif name == "max-stale":
+            if not value:
+                directives.max_stale = float("inf")
+            elif value.isdigit():
+                directives.max_stale = float(value)
+    return directives
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Evaluate If-None-Match against the current ETag (weak comparison, RFC 9110 13.1.2)
+
+    Tags the client received gzip-encoded carry GZIP_ETAG_SUFFIX; they still match
+    the identity ETag since both represent the same content.
+
+    Args:
+        if_none_match: Request header value (a list of tags or "*")
+        etag: ETag of the current representation
+
+    Returns:
+        bool: True if the client's copy is current (respond 304)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate.endswith(f'{GZIP_ETAG_SUFFIX}"'):
+            candidate = candidate[:-len(GZIP_ETAG_SUFFIX) - 1] + '"'
+        if candidate == opaque:
+            return True
+    return False
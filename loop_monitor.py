@@ -0,0 +1,214 @@
+"""
+Event-loop lag monitor and blocking-call detector
+A heartbeat task measures how late the event loop wakes it up (scheduling lag)
+and exports that as a metric. In debug mode a watchdog thread notices when the
+heartbeat stops and captures the event-loop thread's stack, which points at the
+blocking call (requests.post, time.sleep, file I/O, ...)
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+
+from metrics import Counter, Gauge, Histogram
+
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran the lag monitor's heartbeat",
+    buckets=LOOP_LAG_BUCKETS,
+)
+EVENT_LOOP_LAG_MAX = Gauge(
+    "event_loop_lag_max_seconds",
+    "Largest event-loop lag seen since startup",
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocked_total",
+    "Times the event loop was blocked for longer than the detector threshold",
+)
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop scheduling delay and, in debug mode, captures blocking stacks
+
+    Usage (inside a running loop):
+        monitor = LoopLagMonitor(debug=True)
+        monitor.start()
+        ...
+        await monitor.stop()
+    """
+
+    def __init__(self, interval_seconds: float = 0.1, block_threshold_seconds: float = 0.1,
+                 debug: bool = False, max_events: int = 50, verbose: bool = True):
+        """
+        Args:
+            interval_seconds: Heartbeat interval; lag is measured once per interval
+            block_threshold_seconds: Loop stalls longer than this count as blocking
+            debug: Run the watchdog thread that captures the blocking call's stack
+            max_events: Number of recent blocking events kept for inspection
+            verbose: Print startup and blocking messages (with stacks) as they happen
+        """
+        self.interval = interval_seconds
+        self.block_threshold = block_threshold_seconds
+        self.debug = debug
+        self.verbose = verbose
+        self.events = deque(maxlen=max_events)
+        self.max_lag = 0.0
+        self.samples = 0
+        self._last_beat = None
+        self._open_event = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._lock = threading.RLock()
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-block-detector", daemon=True)
+            self._watchdog.start()
+        mode = "debug, capturing stacks" if self.debug else "lag only"
+        if self.verbose:
+            print(f"⏱️  Event-loop monitor started ({mode}, threshold {self.block_threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the heartbeat task and the watchdog thread"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=2)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            # Measured from the previous beat (or start()), so a stall that begins
+            # before this task first runs is still counted
+            expected = self._last_beat + self.interval
+            await asyncio.sleep(max(0.0, expected - time.perf_counter()))
+            now = time.perf_counter()
+            self._observe(now, max(0.0, now - expected))
+
+    def _observe(self, now: float, lag: float):
+        EVENT_LOOP_LAG.observe(lag)
+        with self._lock:
+            self._last_beat = now
+            self.samples += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+                EVENT_LOOP_LAG_MAX.set(lag)
+            open_event, self._open_event = self._open_event, None
+            if lag <= self.block_threshold:
+                return
+            if open_event is not None:
+                # The watchdog captured the stall mid-way; now its full length is known
+                open_event["blocked_ms"] = round(lag * 1000, 1)
+            else:
+                # Debug off, or the stall ended before the watchdog saw it: no stack
+                self._record_block(lag, None)
+
+    def _watch(self):
+        """Watchdog thread: capture the loop thread's stack once per stall"""
+        captured_for = None
+        early_stack = None
+        poll = min(self.interval, self.block_threshold) / 2
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            stalled = time.perf_counter() - beat - self.interval
+            if stalled <= poll or captured_for == beat:
+                continue
+            stack = self._loop_stack()
+            if stalled <= self.block_threshold:
+                # Overdue but not yet over the threshold: remember where the loop is
+                # now, in case the stall has ended by the time it crosses the threshold
+                early_stack = (beat, stack)
+                continue
+            if early_stack is not None and early_stack[0] == beat:
+                stack = early_stack[1]
+            captured_for = beat
+            with self._lock:
+                # If the heartbeat ran meanwhile, the stall is over and the heartbeat records it
+                if self._last_beat == beat:
+                    self._open_event = self._record_block(stalled, stack)
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame is not None else None
+
+    def _record_block(self, duration: float, stack: str) -> dict:
+        EVENT_LOOP_BLOCKS.inc()
+        event = {"time": time.time(), "blocked_ms": round(duration * 1000, 1), "stack": stack}
+        with self._lock:
+            self.events.append(event)
+        if self.verbose:
+            print(f"🐢 Event loop blocked for >{event['blocked_ms']:.0f}ms")
+            if stack:
+                print(stack.rstrip())
+        return event
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "debug": self.debug,
+                "samples": self.samples,
+                "max_lag_ms": round(self.max_lag * 1000, 1),
+                "blocking_events": len(self.events),
+                "recent_blocks": [
+                    {key: value for key, value in event.items() if key != "stack"} for event in self.events
+                ],
+            }
+
+
+@asynccontextmanager
+async def detect_blocking(threshold_seconds: float = 0.05, raise_on_block: bool = True):
+    """
+    Fail a test when the code inside the block stalls the event loop
+
+    Usage:
+        async with detect_blocking(0.05) as events:
+            await client.post("/investors", json=body)
+
+    Args:
+        threshold_seconds: Stalls longer than this are reported
+        raise_on_block: Raise AssertionError (with the captured stack) on exit
+
+    Yields:
+        deque: Blocking events ({"blocked_ms", "stack", ...}) seen so far
+    """
+    monitor = LoopLagMonitor(
+        interval_seconds=threshold_seconds / 4,
+        block_threshold_seconds=threshold_seconds,
+        debug=True,
+        verbose=False,
+    )
+    monitor.start()
+    try:
+        yield monitor.events
+        # Give the watchdog a chance to see a stall that ended the block
+        await asyncio.sleep(monitor.interval * 2)
+    finally:
+        await monitor.stop()
+
+    if raise_on_block and monitor.events:
+        worst = max(monitor.events, key=lambda event: event["blocked_ms"])
+        raise AssertionError(
+            f"Event loop blocked {len(monitor.events)} time(s), worst {worst['blocked_ms']}ms:\n{worst['stack'] or ''}"
+        )
@@ -1,30 +1,62 @@
 # Main application file
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
-from starlette.background import BackgroundTask
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import base64
+import hashlib
+import json
 import os
-import tempfile
+import re
+import threading
 import requests
 import time
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from io import BytesIO
-from duckduckgo_search import DDGS
+from audio_formats import AUDIO_FORMATS, AudioTranscoder, available_formats, negotiate_audio_format
+from cache_backends import create_cache_backend, parse_quotas, parse_size
 from cache_manager import ResponseCache, RateLimiter
+from compression import CompressionMiddleware
+from http_caching import CacheControl, etag_matches, make_etag, parse_cache_control
+from pdf_export import LAYOUT_VERSION, PdfRenderer
+from rate_limit_backends import create_rate_limit_backend
+from pitch_streaming import pcm_to_wav, split_sentences, stream_pitch_audio
+from sectioned_generation import (
+    GRANT_PROPOSAL_SECTIONS, GRANT_PROPOSAL_SYSTEM_PROMPT, IDEA_FIELDS, SectionedGenerator, assemble,
+    join_sections, mentioned_values, revision_messages, section_messages, split_sections,
+)
+from refresh_scheduler import RefreshScheduler
+from loop_monitor import LoopLagMonitor
+from traffic_capture import TrafficCaptureMiddleware, note_cache_outcome
+from server_timing import ServerTimingMiddleware
+import server_timing
+import metrics
+from metrics import (
+    LLM_PROVIDER_LATENCY, LLM_FALLBACKS, PROVIDER_RATE_LIMITED, RATE_LIMITER_WAIT,
+    DDG_SEARCH_LATENCY, ELEVENLABS_TTFB, PITCH_FIRST_AUDIO,
+)
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The background tasks are defined further down, next to what they manage
+    await start_background_tasks()
+    yield
+    await stop_background_tasks()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure Honeycomb observability
 try:
-    from otel_config import configure_opentelemetry, add_span_attribute, add_span_event, get_tracer
+    from otel_config import (
+        configure_opentelemetry, add_span_attribute, add_span_event, get_tracer,
+        instrument_function, timed_phase, tracing_active,
+    )
     configure_opentelemetry(app, service_name="budhrajaankita-ted")
 except Exception as e:
     print(f"⚠️  Failed to configure Honeycomb observability: {e}")
@@ -32,26 +64,102 @@ except Exception as e:
     def add_span_attribute(key, value): pass
     def add_span_event(name, attributes=None): pass
     def get_tracer(name="main"): return None
+    def instrument_function(span_name=None): return lambda func: func
+    def timed_phase(name, description=None, span_name=None): return server_timing.phase(name, description)
+    def tracing_active(): return False
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 
 print(f"ElevenLabs API Key loaded: {ELEVENLABS_API_KEY[:10] if ELEVENLABS_API_KEY else 'None'}...")
 
-client = ElevenLabs(
-  api_key=ELEVENLABS_API_KEY
-)
+# Base URLs can be pointed at fake_providers.py for offline benchmarks
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")
+
+# The ElevenLabs SDK is slow to import, so the client is built on first use
+_elevenlabs_client = None
+
+
+def get_elevenlabs_client():
+    """Return the shared ElevenLabs client, importing the SDK on first call"""
+    global _elevenlabs_client
+    if _elevenlabs_client is None:
+        from elevenlabs.client import ElevenLabs
+        _elevenlabs_client = ElevenLabs(
+            api_key=ELEVENLABS_API_KEY,
+            base_url=ELEVENLABS_BASE_URL
+        )
+    return _elevenlabs_client
 
 # Initialize caching system
 # Cache responses for 24 hours to reduce API calls
-cache = ResponseCache(cache_dir=".cache", ttl_hours=24)
+# An optional read-only snapshot shipped with the deployment serves as a lower tier,
+# so serverless instances don't start with an empty /tmp cache
+cache = ResponseCache(
+    ttl_hours=24,
+    # CACHE_BACKEND=redis://host:6379/0 shares one cache between instances (default: .cache directory)
+    backend=create_cache_backend(
+        os.getenv("CACHE_BACKEND", "file"),
+        cache_dir=".cache",
+        # Byte budget for the cache directory (e.g. 200MB), evicting lru or lfu entries
+        max_bytes=parse_size(os.getenv("CACHE_MAX_BYTES")),
+        endpoint_quotas=parse_quotas(os.getenv("CACHE_ENDPOINT_QUOTAS")),
+        eviction=os.getenv("CACHE_EVICTION_POLICY", "lru"),
+    ),
+    snapshot_path=os.getenv("CACHE_SNAPSHOT_PATH"),
+    snapshot_ttl_hours=float(os.getenv("CACHE_SNAPSHOT_TTL_HOURS", "0")) or None,
+    # Write-behind: misses return without waiting for the cache write
+    write_behind=os.getenv("CACHE_WRITE_BEHIND", "false").lower() == "true",
+    write_behind_max_pending=int(os.getenv("CACHE_WRITE_BEHIND_MAX_PENDING", "1000")),
+    write_behind_batch_size=int(os.getenv("CACHE_WRITE_BEHIND_BATCH_SIZE", "100")),
+    write_behind_flush_interval=float(os.getenv("CACHE_WRITE_BEHIND_FLUSH_MS", "500")) / 1000,
+)
+
+# Full responses (LLM output + citations) share the backend under "<endpoint>:full",
+# so a repeat request is served without the provider call or the DuckDuckGo search.
+# Citations go stale sooner than the LLM output, and a full response can't outlive
+# the provider entry it was built from
+CITATION_TTL_HOURS = float(os.getenv("RESPONSE_CACHE_CITATION_TTL_HOURS", "6"))
+response_cache = ResponseCache(
+    ttl_hours=min(CITATION_TTL_HOURS, cache.ttl.total_seconds() / 3600),
+    backend=cache.backend,
+    write_behind=cache.writer is not None,
+)
+
+# Grant proposals: "monolithic" (one long completion) or "sectioned" (one concurrent
+# provider call per section, each cached on its own); ?mode= overrides per request
+GRANT_PROPOSAL_MODE = os.getenv("GRANT_PROPOSAL_MODE", "monolithic")
+section_generator = SectionedGenerator(max_concurrency=int(os.getenv("SECTION_CONCURRENCY", "5")))
+# /reviseDocument gets its own pool, so revisions and proposals can't starve each other
+revision_generator = SectionedGenerator(max_concurrency=int(os.getenv("REVISION_CONCURRENCY", "3")), name="revision")
+
+# Pitch audio: "whole" (one synthesis job) or "chunked" (one concurrent job per sentence,
+# each cached by content, stitched into a WAV); ?mode= overrides per request
+PITCH_AUDIO_MODE = os.getenv("PITCH_AUDIO_MODE", "whole")
+PITCH_PCM_SAMPLE_RATE = int(os.getenv("PITCH_PCM_SAMPLE_RATE", "24000"))
+# Sentences synthesized at once for chunked audio and /streamPitch (ElevenLabs concurrency limits are per plan)
+PITCH_TTS_CONCURRENCY = int(os.getenv("PITCH_TTS_CONCURRENCY", "3"))
+chunk_synthesizer = SectionedGenerator(max_concurrency=PITCH_TTS_CONCURRENCY)
+# Format ElevenLabs encodes MP3 responses in (mp3_22050_32 is ~4x smaller, fine for speech)
+PITCH_MP3_OUTPUT_FORMAT = os.getenv("PITCH_MP3_OUTPUT_FORMAT", "mp3_44100_128")
+# Opus/Ogg output is transcoded on a process pool (needs ffmpeg); results are cached
+transcoder = AudioTranscoder(max_workers=int(os.getenv("TRANSCODE_WORKERS", "2")))
+# PDF export renders on a process pool; each worker renders one document at a time
+pdf_renderer = PdfRenderer(max_workers=int(os.getenv("PDF_RENDER_WORKERS", "2")))
 
 # Initialize rate limiter
-# Wait at least 60 seconds between OpenRouter API calls
-rate_limiter = RateLimiter(min_interval_seconds=60)
+# Wait at least 60 seconds between OpenRouter API calls (override for benchmarks)
+# RATE_LIMIT_BACKEND shares the limit between workers (sqlite:///... or redis://...)
+rate_limiter = RateLimiter(
+    min_interval_seconds=float(os.getenv("RATE_LIMIT_MIN_INTERVAL_SECONDS", "60")),
+    backend=create_rate_limit_backend(os.getenv("RATE_LIMIT_BACKEND", "memory")),
+)
+print(f"⏱️  Rate limiter backend: {rate_limiter.backend.name}")
 
-# Clean up expired cache on startup
-cache.clear_expired()
-print(f"📊 Cache stats: {cache.get_stats()}")
+
+def sweep_expired_cache():
+    """Clean up expired cache entries (run in the background at startup, not at import)"""
+    cache.clear_expired()
+    print(f"📊 Cache stats: {cache.get_stats()}")
 
 
 
@@ -61,83 +169,91 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["Server-Timing", server_timing.DETAIL_RESPONSE_HEADER, "ETag", "X-Result-Key"],
 )
 
+# Opt-in capture of anonymized production traffic for replay benchmarks
+if os.getenv("TRAFFIC_CAPTURE_PATH"):
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        path=os.getenv("TRAFFIC_CAPTURE_PATH"),
+        salt=os.getenv("TRAFFIC_CAPTURE_SALT"),
+    )
+
+# Gzip markdown/JSON for clients that accept it (audio and other media pass through)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1000")))
+
+# Per-phase latency breakdown on every response (outermost, so "total" covers everything)
+app.add_middleware(ServerTimingMiddleware)
+
+
+DDG_BASE_URL = os.getenv("DDG_BASE_URL")
+
 
 def ddg_search(query: str, max_results: int = 3) -> list:
     """Performs DuckDuckGo search and returns results with retry logic"""
     max_retries = 2
     for attempt in range(max_retries):
+        start_time = time.perf_counter()
         try:
+            if DDG_BASE_URL:
+                # Search stand-in (e.g. fake_providers.py) returning DDGS.text()-shaped results
+                response = requests.get(
+                    f"{DDG_BASE_URL}/search",
+                    params={"q": query, "max_results": max_results},
+                    timeout=10
+                )
+                response.raise_for_status()
+                results = response.json()
+                DDG_SEARCH_LATENCY.observe(time.perf_counter() - start_time, outcome="success")
+                return results
+            from duckduckgo_search import DDGS
             time.sleep(1)  # Add delay to avoid rate limiting
             with DDGS() as ddgs:
                 results = list(ddgs.text(query, max_results=max_results))
+                DDG_SEARCH_LATENCY.observe(time.perf_counter() - start_time, outcome="success")
                 return results
         except Exception as e:
+            DDG_SEARCH_LATENCY.observe(time.perf_counter() - start_time, outcome="error")
             print(f"DuckDuckGo search error (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
                 time.sleep(2)  # Wait before retry
     return []
 
 
+# Prefix of a citations block that actually lists results (vs. "not found"/error text)
+CITATIONS_HEADER = "\n\nCitations:\n"
+
+
 # Added: Corrected integrate_duckduckgo function to use 'href' instead of 'link'
 def integrate_duckduckgo(query: str, max_results: int = 3) -> str:
     """Fetches DuckDuckGo search results and formats them as citations."""
     try:
-        results = ddg_search(query, max_results=max_results)
+        with timed_phase("citations", "DuckDuckGo search", span_name="ddg_search"):
+            results = ddg_search(query, max_results=max_results)
         if not results:
             return "\n\nCitations: No relevant citations found."
         citations = "\n".join([f"[{i+1}] {res['title']}: {res['href']}" for i, res in enumerate(results)])
-        return f"\n\nCitations:\n{citations}"
+        return f"{CITATIONS_HEADER}{citations}"
     except Exception as e:
         return f"\n\nCitations: DuckDuckGo search error: {str(e)}"
 
 
 
-def text_to_pdf(text):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    flowables = []
-
-    for line in text.split('\n'):
-        para = Paragraph(line, styles['Normal'])
-        flowables.append(para)
-
-    doc.build(flowables)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-
-
-
 # Load API keys
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 CLOUDFLARE_API_KEY = os.getenv("CLOUDFLARE_API_KEY")
 CLOUDFLARE_ACCOUNT_ID = os.getenv("CLOUDFLARE_ACCOUNT_ID")
 
+# Provider base URLs (override to run against fake_providers.py)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+CLOUDFLARE_BASE_URL = os.getenv("CLOUDFLARE_BASE_URL", "https://api.cloudflare.com/client/v4")
 
-@instrument_function("call_gemini_api")
-def call_gemini_api(messages: list) -> dict:
-    """
-    Call Google Gemini API (Provider 1)
-    
-    Args:
-        messages: List of message dictionaries for the chat completion
-        
-    Returns:
-        dict: The API response JSON in OpenRouter-compatible format
-    """
-    if not GEMINI_API_KEY:
-        raise Exception("GEMINI_API_KEY not configured")
-    
-    start_time = time.time()
-    model_name = "gemini-2.0-flash-exp"
-    add_span_attribute("llm.provider", "Google Gemini")
-    add_span_attribute("llm.model", model_name)
-    
-    # Convert OpenRouter messages to Gemini format
+
+def gemini_payload(messages: list) -> dict:
+    """Convert OpenRouter-style chat messages to a Gemini generateContent request body"""
     gemini_contents = []
     system_instruction = None
     
@@ -151,10 +267,6 @@ def call_gemini_api(messages: list) -> dict:
             gemini_contents.append({"role": "user", "parts": [{"text": content}]})
         elif role == "assistant":
             gemini_contents.append({"role": "model", "parts": [{"text": content}]})
-            
-    add_span_attribute("request.message_count", len(messages))
-    
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={GEMINI_API_KEY}"
     
     payload = {
         "contents": gemini_contents,
@@ -169,6 +281,32 @@ def call_gemini_api(messages: list) -> dict:
         payload["systemInstruction"] = {
             "parts": [{"text": system_instruction}]
         }
+    return payload
+
+
+@instrument_function("call_gemini_api")
+def call_gemini_api(messages: list) -> dict:
+    """
+    Call Google Gemini API (Provider 1)
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        
+    Returns:
+        dict: The API response JSON in OpenRouter-compatible format
+    """
+    if not GEMINI_API_KEY:
+        raise Exception("GEMINI_API_KEY not configured")
+    
+    start_time = time.time()
+    model_name = "gemini-2.0-flash-exp"
+    add_span_attribute("llm.provider", "Google Gemini")
+    add_span_attribute("llm.model", model_name)
+    
+    add_span_attribute("request.message_count", len(messages))
+    
+    url = f"{GEMINI_BASE_URL}/v1beta/models/{model_name}:generateContent?key={GEMINI_API_KEY}"
+    payload = gemini_payload(messages)
     
     response = requests.post(
         url=url,
@@ -177,6 +315,8 @@ def call_gemini_api(messages: list) -> dict:
         timeout=30
     )
     
+    if response.status_code == 429:
+        PROVIDER_RATE_LIMITED.inc(provider="Google Gemini")
     response.raise_for_status()
     data = response.json()
     
@@ -193,7 +333,7 @@ def call_gemini_api(messages: list) -> dict:
     
     # Try to extract usage metadata if available
     usage_metadata = data.get("usageMetadata", {})
-    if usage_metadata:
+    if usage_metadata and tracing_active():
         prompt_tokens = usage_metadata.get("promptTokenCount", 0)
         candidates_tokens = usage_metadata.get("candidatesTokenCount", 0)
         total_tokens = usage_metadata.get("totalTokenCount", 0)
@@ -239,10 +379,11 @@ def call_openrouter_api(messages: list, max_retries: int = 3) -> dict:
     
     for attempt in range(max_retries):
         try:
-            add_span_event("api_attempt", {"attempt": attempt + 1})
+            if tracing_active():
+                add_span_event("api_attempt", {"attempt": attempt + 1})
             
             response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
+                url=f"{OPENROUTER_BASE_URL}/chat/completions",
                 headers={
                     "Authorization": f"Bearer {OPENROUTER_API_KEY}",
                 },
@@ -266,7 +407,7 @@ def call_openrouter_api(messages: list, max_retries: int = 3) -> dict:
             
             # Extract usage if available
             usage = data.get("usage", {})
-            if usage:
+            if usage and tracing_active():
                 add_span_attribute("llm.usage.prompt_tokens", usage.get("prompt_tokens", 0))
                 add_span_attribute("llm.usage.completion_tokens", usage.get("completion_tokens", 0))
                 add_span_attribute("llm.usage.total_tokens", usage.get("total_tokens", 0))
@@ -277,7 +418,9 @@ def call_openrouter_api(messages: list, max_retries: int = 3) -> dict:
             if response.status_code == 429:  # Rate limit error
                 wait_time = (2 ** attempt) * 2  # Exponential backoff: 2, 4, 8 seconds
                 print(f"OpenRouter rate limited. Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}")
-                add_span_event("rate_limited", {"wait_time": wait_time, "attempt": attempt + 1})
+                PROVIDER_RATE_LIMITED.inc(provider="OpenRouter")
+                if tracing_active():
+                    add_span_event("rate_limited", {"wait_time": wait_time, "attempt": attempt + 1})
                 if attempt < max_retries - 1:
                     time.sleep(wait_time)
                     continue
@@ -319,11 +462,12 @@ def call_cloudflare_api(messages: list, max_retries: int = 3) -> dict:
     add_span_attribute("request.message_count", len(messages))
     
     # Cloudflare Workers AI endpoint
-    url = f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/{model_name}"
+    url = f"{CLOUDFLARE_BASE_URL}/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/{model_name}"
     
     for attempt in range(max_retries):
         try:
-            add_span_event("api_attempt", {"attempt": attempt + 1})
+            if tracing_active():
+                add_span_event("api_attempt", {"attempt": attempt + 1})
             
             response = requests.post(
                 url=url,
@@ -367,7 +511,9 @@ def call_cloudflare_api(messages: list, max_retries: int = 3) -> dict:
             if response.status_code == 429:  # Rate limit error
                 wait_time = (2 ** attempt) * 2  # Exponential backoff: 2, 4, 8 seconds
                 print(f"Cloudflare rate limited. Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}")
-                add_span_event("rate_limited", {"wait_time": wait_time, "attempt": attempt + 1})
+                PROVIDER_RATE_LIMITED.inc(provider="Cloudflare Workers AI")
+                if tracing_active():
+                    add_span_event("rate_limited", {"wait_time": wait_time, "attempt": attempt + 1})
                 if attempt < max_retries - 1:
                     time.sleep(wait_time)
                     continue
@@ -381,8 +527,156 @@ def call_cloudflare_api(messages: list, max_retries: int = 3) -> dict:
     raise Exception("Max retries exceeded for Cloudflare API")
 
 
+PROVIDER_ICONS = {
+    "Google Gemini": "🔵",
+    "OpenRouter": "🟢",
+    "Cloudflare Workers AI": "🟠",
+}
+
+
+def get_available_providers(max_retries: int = 3) -> list:
+    """
+    Build the ordered list of configured LLM providers
+    
+    Args:
+        max_retries: Maximum number of retry attempts per provider
+        
+    Returns:
+        list: (provider_name, provider_func) tuples in fallback order
+    """
+    providers = []
+    if GEMINI_API_KEY:
+        providers.append(("Google Gemini", call_gemini_api))
+    if OPENROUTER_API_KEY:
+        providers.append(("OpenRouter", lambda msgs: call_openrouter_api(msgs, max_retries)))
+    if CLOUDFLARE_API_KEY and CLOUDFLARE_ACCOUNT_ID:
+        providers.append(("Cloudflare Workers AI", lambda msgs: call_cloudflare_api(msgs, max_retries)))
+    return providers
+
+
+def iter_sse_data(response):
+    """Yield the data payloads of a server-sent event stream, up to OpenAI-style [DONE]"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue  # blank separators, comments (": keep-alive"), event names
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield data
+
+
+def stream_gemini_api(messages: list):
+    """
+    Stream a Google Gemini completion (streamGenerateContent over SSE)
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        
+    Yields:
+        str: Text deltas as the model writes them
+    """
+    if not GEMINI_API_KEY:
+        raise Exception("GEMINI_API_KEY not configured")
+    model_name = "gemini-2.0-flash-exp"
+    url = f"{GEMINI_BASE_URL}/v1beta/models/{model_name}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+    with requests.post(url, json=gemini_payload(messages), stream=True, timeout=30) as response:
+        if response.status_code == 429:
+            PROVIDER_RATE_LIMITED.inc(provider="Google Gemini")
+        response.raise_for_status()
+        for data in iter_sse_data(response):
+            parts = json.loads(data).get("candidates", [{}])[0].get("content", {}).get("parts", [])
+            text = "".join(part.get("text", "") for part in parts)
+            if text:
+                yield text
+
+
+def stream_openrouter_api(messages: list):
+    """
+    Stream an OpenRouter chat completion ("stream": true)
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        
+    Yields:
+        str: Text deltas as the model writes them
+    """
+    if not OPENROUTER_API_KEY:
+        raise Exception("OPENROUTER_API_KEY not configured")
+    with requests.post(
+        url=f"{OPENROUTER_BASE_URL}/chat/completions",
+        headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+        json={"model": "meta-llama/llama-3.2-3b-instruct:free", "messages": messages, "stream": True},
+        stream=True,
+        timeout=30
+    ) as response:
+        if response.status_code == 429:
+            PROVIDER_RATE_LIMITED.inc(provider="OpenRouter")
+        response.raise_for_status()
+        for data in iter_sse_data(response):
+            text = (json.loads(data).get("choices") or [{}])[0].get("delta", {}).get("content")
+            if text:
+                yield text
+
+
+def stream_cloudflare_api(messages: list):
+    """
+    Stream a Cloudflare Workers AI completion ("stream": true)
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        
+    Yields:
+        str: Text deltas as the model writes them
+    """
+    if not CLOUDFLARE_API_KEY or not CLOUDFLARE_ACCOUNT_ID:
+        raise Exception("CLOUDFLARE_API_KEY/CLOUDFLARE_ACCOUNT_ID not configured")
+    with requests.post(
+        url=f"{CLOUDFLARE_BASE_URL}/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/@cf/meta/llama-2-7b-chat-fp16",
+        headers={"Authorization": f"Bearer {CLOUDFLARE_API_KEY}"},
+        json={"messages": messages, "stream": True},
+        stream=True,
+        timeout=30
+    ) as response:
+        if response.status_code == 429:
+            PROVIDER_RATE_LIMITED.inc(provider="Cloudflare Workers AI")
+        response.raise_for_status()
+        for data in iter_sse_data(response):
+            text = json.loads(data).get("response")
+            if text:
+                yield text
+
+
+def get_available_stream_providers() -> list:
+    """
+    Streaming counterparts of get_available_providers(), in the same fallback order
+    
+    Returns:
+        list: (provider_name, stream_func) tuples; stream_func(messages) yields text deltas
+    """
+    providers = []
+    if GEMINI_API_KEY:
+        providers.append(("Google Gemini", stream_gemini_api))
+    if OPENROUTER_API_KEY:
+        providers.append(("OpenRouter", stream_openrouter_api))
+    if CLOUDFLARE_API_KEY and CLOUDFLARE_ACCOUNT_ID:
+        providers.append(("Cloudflare Workers AI", stream_cloudflare_api))
+    return providers
+
+
+def rate_limit_key(endpoint_name: str, provider_name: str) -> str:
+    """
+    Rate-limiter key for a provider call
+    
+    Parts of a document are cached under "<endpoint>:<part>" but share their
+    endpoint's budget, so one sectioned request can't fire a burst of calls that
+    each look like the first on a fresh key.
+    """
+    return f"{endpoint_name.split(':', 1)[0]}_{provider_name}"
+
+
 @instrument_function("make_openrouter_request")
-def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", max_retries: int = 3, use_cache: bool = True) -> dict:
+def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", max_retries: int = 3, use_cache: bool = True,
+                            cache_control: CacheControl = None, rate_limit_burst: int = 1) -> dict:
     """
     Make a request to LLM providers with multi-provider fallback, caching, and rate limiting
     
@@ -396,6 +690,10 @@ def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", m
         endpoint_name: Name of the endpoint for cache/rate limit tracking
         max_retries: Maximum number of retry attempts per provider
         use_cache: Whether to use caching (default: True)
+        cache_control: The client's Cache-Control directives (no-cache regenerates,
+            max-stale accepts expired entries)
+        rate_limit_burst: Calls the request belongs to (the parts of one document),
+            allowed through back to back when the rate limit has budget
         
     Returns:
         dict: The API response JSON in OpenRouter-compatible format
@@ -406,38 +704,69 @@ def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", m
     start_time = time.time()
     add_span_attribute("endpoint.name", endpoint_name)
     add_span_attribute("request.message_count", len(messages))
+    cache_control = cache_control or CacheControl()
+    if use_cache and cache_control.no_cache:
+        print(f"🔄 Cache-Control: no-cache, regenerating {endpoint_name}")
+        note_cache_outcome(False)
+        return call_llm_providers(messages, endpoint_name, max_retries, use_cache, start_time, rate_limit_burst)
     # Check cache first
     if use_cache:
         cache_key = {"messages": messages}
-        cached_response = cache.get(endpoint_name, cache_key)
+        with timed_phase("cache", "cache lookup", span_name="cache_lookup"):
+            cached_response = cache.get(endpoint_name, cache_key, max_stale=cache_control.max_stale)
         if cached_response is not None:
             cache_duration = time.time() - start_time
             print(f"✅ Cache hit for {endpoint_name}")
             add_span_attribute("cache.hit", True)
             add_span_attribute("total.duration_ms", cache_duration * 1000)
+            note_cache_outcome(True)
             return cached_response
+        note_cache_outcome(False)
+        
+        # Only one worker regenerates a key; the others wait and then read its result
+        with cache.single_flight(endpoint_name, cache_key) as flight:
+            cached_response = cache.get(endpoint_name, cache_key, record_stats=False)
+            if cached_response is not None:
+                print(f"✅ {endpoint_name} regenerated by another worker")
+                add_span_attribute("cache.single_flight_wait", flight.waited)
+                return cached_response
+            return call_llm_providers(messages, endpoint_name, max_retries, use_cache, start_time, rate_limit_burst)
+    
+    return call_llm_providers(messages, endpoint_name, max_retries, use_cache, start_time, rate_limit_burst)
+
+
+def call_llm_providers(messages: list, endpoint_name: str, max_retries: int, use_cache: bool, start_time: float,
+                       rate_limit_burst: int = 1) -> dict:
+    """
+    Try each configured LLM provider in order and cache the first success
     
+    Args:
+        messages: List of message dictionaries for the chat completion
+        endpoint_name: Name of the endpoint for cache/rate limit tracking
+        max_retries: Maximum number of retry attempts per provider
+        use_cache: Whether to store the result in the cache
+        start_time: time.time() when the request started
+        rate_limit_burst: Burst budget for the rate limiter (see make_openrouter_request)
+        
+    Returns:
+        dict: The API response JSON in OpenRouter-compatible format
+    """
+    cache_key = {"messages": messages}
     add_span_attribute("cache.hit", False)
     add_span_attribute("endpoint.name", endpoint_name)
     
     # Build list of available providers
-    providers = []
-    if GEMINI_API_KEY:
-        providers.append(("Google Gemini", call_gemini_api))
-        print(f"🔵 Google Gemini API available for {endpoint_name}")
-    if OPENROUTER_API_KEY:
-        providers.append(("OpenRouter", lambda msgs: call_openrouter_api(msgs, max_retries)))
-        print(f"🟢 OpenRouter API available for {endpoint_name}")
-    if CLOUDFLARE_API_KEY and CLOUDFLARE_ACCOUNT_ID:
-        providers.append(("Cloudflare Workers AI", lambda msgs: call_cloudflare_api(msgs, max_retries)))
-        print(f"🟠 Cloudflare Workers AI available for {endpoint_name}")
+    providers = get_available_providers(max_retries)
+    for provider_name, _ in providers:
+        print(f"{PROVIDER_ICONS[provider_name]} {provider_name} API available for {endpoint_name}")
     
     if not providers:
         add_span_attribute("error", "No LLM API keys configured")
         raise HTTPException(status_code=500, detail="No LLM API keys configured")
     
-    add_span_attribute("providers.available", len(providers))
-    add_span_attribute("providers.list", ",".join([p[0] for p in providers]))
+    if tracing_active():
+        add_span_attribute("providers.available", len(providers))
+        add_span_attribute("providers.list", ",".join([p[0] for p in providers]))
     print(f"📡 Attempting {len(providers)} provider(s) for {endpoint_name}")
     
     # Try each provider in order
@@ -445,44 +774,61 @@ def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", m
     for idx, (provider_name, provider_func) in enumerate(providers):
         try:
             print(f"🔄 Trying {provider_name}...")
-            add_span_event(f"trying_provider", {
-                "provider.name": provider_name,
-                "provider.index": idx,
-                "endpoint.name": endpoint_name
-            })
+            if tracing_active():
+                add_span_event("trying_provider", {
+                    "provider.name": provider_name,
+                    "provider.index": idx,
+                    "endpoint.name": endpoint_name
+                })
             
             # Apply rate limiting before making API call
-            rate_limiter.wait_if_needed(f"{endpoint_name}_{provider_name}")
+            with timed_phase("ratelimit", f"rate-limit wait ({provider_name})", span_name="rate_limit_wait"):
+                waited = rate_limiter.wait_if_needed(rate_limit_key(endpoint_name, provider_name), rate_limit_burst)
+            RATE_LIMITER_WAIT.observe(waited, endpoint=endpoint_name, provider=provider_name)
             
-            result = provider_func(messages)
+            provider_start = time.perf_counter()
+            try:
+                with timed_phase(f"provider{idx + 1}", provider_name, span_name="provider_attempt"):
+                    result = provider_func(messages)
+            except Exception:
+                LLM_PROVIDER_LATENCY.observe(time.perf_counter() - provider_start,
+                                             provider=provider_name, endpoint=endpoint_name, outcome="error")
+                raise
+            LLM_PROVIDER_LATENCY.observe(time.perf_counter() - provider_start,
+                                         provider=provider_name, endpoint=endpoint_name, outcome="success")
             
             # Cache successful response
             if use_cache:
-                cache.set(endpoint_name, cache_key, result)
+                with timed_phase("cache_write", "cache write", span_name="cache_write"):
+                    cache.set(endpoint_name, cache_key, result)
             
             print(f"✅ {provider_name} succeeded for {endpoint_name}")
             
             # Calculate total duration
-            total_duration = time.time() - start_time
-            add_span_attribute("total.duration_ms", total_duration * 1000)
-            add_span_attribute("provider.used", provider_name)
-            add_span_attribute("provider.success", True)
-            add_span_attribute("provider.attempt", idx + 1)
-            add_span_event(f"provider_success", {
-                "provider.name": provider_name,
-                "endpoint.name": endpoint_name,
-                "duration_ms": total_duration * 1000
-            })
+            if tracing_active():
+                total_duration = time.time() - start_time
+                add_span_attribute("total.duration_ms", total_duration * 1000)
+                add_span_attribute("provider.used", provider_name)
+                add_span_attribute("provider.success", True)
+                add_span_attribute("provider.attempt", idx + 1)
+                add_span_event("provider_success", {
+                    "provider.name": provider_name,
+                    "endpoint.name": endpoint_name,
+                    "duration_ms": total_duration * 1000
+                })
             return result
             
         except Exception as e:
             last_error = e
             print(f"❌ {provider_name} failed: {str(e)}")
-            add_span_event(f"provider_failed", {
-                "provider.name": provider_name,
-                "error.message": str(e),
-                "endpoint.name": endpoint_name
-            })
+            if idx < len(providers) - 1:
+                LLM_FALLBACKS.inc(endpoint=endpoint_name, provider=provider_name)
+            if tracing_active():
+                add_span_event("provider_failed", {
+                    "provider.name": provider_name,
+                    "error.message": str(e),
+                    "endpoint.name": endpoint_name
+                })
             continue
     
     # All providers failed
@@ -495,6 +841,328 @@ def make_openrouter_request(messages: list, endpoint_name: str = "openrouter", m
     raise HTTPException(status_code=500, detail=error_msg)
 
 
+def generate_content(messages: list, endpoint_name: str, cache_control: CacheControl = None,
+                     rate_limit_burst: int = 1) -> str:
+    """
+    Text of the first choice of a (cached) provider completion
+    
+    Raises:
+        HTTPException: If all providers fail or return an unexpected format
+    """
+    result = make_openrouter_request(messages, endpoint_name=endpoint_name, cache_control=cache_control,
+                                     rate_limit_burst=rate_limit_burst)
+    if "choices" in result and len(result["choices"]) > 0:
+        return result["choices"][0]["message"]["content"]
+    raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
+
+
+def stream_llm_text(messages: list, endpoint_name: str, cache_control: CacheControl = None):
+    """
+    Yield a completion's text as the provider writes it
+    
+    A cached completion (shared with make_openrouter_request under the same key) is
+    yielded in one piece. Otherwise providers are tried in fallback order; once a
+    provider has produced text its stream is committed to, so a later failure is
+    raised instead of restarting on the next provider. The finished text is cached.
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        endpoint_name: Name of the endpoint for cache/rate limit tracking
+        cache_control: The client's Cache-Control directives
+        
+    Yields:
+        str: Text deltas
+        
+    Raises:
+        HTTPException: If no provider is configured or all fail before producing text
+    """
+    cache_key = {"messages": messages}
+    cache_control = cache_control or CacheControl()
+    if not cache_control.no_cache:
+        cached_response = cache.get(endpoint_name, cache_key, max_stale=cache_control.max_stale)
+        if cached_response is not None:
+            print(f"✅ Cache hit for {endpoint_name}")
+            note_cache_outcome(True)
+            yield cached_response["choices"][0]["message"]["content"]
+            return
+    note_cache_outcome(False)
+    
+    providers = get_available_stream_providers()
+    if not providers:
+        raise HTTPException(status_code=500, detail="No LLM API keys configured")
+    
+    last_error = None
+    for idx, (provider_name, stream_func) in enumerate(providers):
+        print(f"🔄 Streaming from {provider_name}...")
+        waited = rate_limiter.wait_if_needed(rate_limit_key(endpoint_name, provider_name))
+        RATE_LIMITER_WAIT.observe(waited, endpoint=endpoint_name, provider=provider_name)
+        provider_start = time.perf_counter()
+        parts = []
+        try:
+            for delta in stream_func(messages):
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            LLM_PROVIDER_LATENCY.observe(time.perf_counter() - provider_start,
+                                         provider=provider_name, endpoint=endpoint_name, outcome="error")
+            if parts:
+                print(f"❌ {provider_name} stream broke off after {len(parts)} chunks: {e}")
+                raise
+            last_error = e
+            print(f"❌ {provider_name} failed: {str(e)}")
+            if idx < len(providers) - 1:
+                LLM_FALLBACKS.inc(endpoint=endpoint_name, provider=provider_name)
+            continue
+        if not parts:
+            last_error = Exception(f"{provider_name} stream returned no text")
+            continue
+        LLM_PROVIDER_LATENCY.observe(time.perf_counter() - provider_start,
+                                     provider=provider_name, endpoint=endpoint_name, outcome="success")
+        print(f"✅ {provider_name} streamed {endpoint_name}")
+        cache.set(endpoint_name, cache_key, {
+            "choices": [{"message": {"content": "".join(parts), "role": "assistant"}}]
+        })
+        return
+    
+    raise HTTPException(status_code=500, detail=f"All LLM providers failed. Last error: {str(last_error)}")
+
+
+def generate_sectioned(sections, messages_list: list, endpoint_name: str, cache_control: CacheControl = None) -> str:
+    """
+    Generate a document one section per provider call, concurrently, and assemble it in order
+    
+    Sections are cached under "<endpoint>:<section key>", so a regenerate only calls
+    providers for sections whose prompt changed. They share the endpoint's rate limit
+    with a burst budget of one call per section: an idle endpoint lets the whole
+    document through at once, and the budget refills one call per interval.
+    
+    Args:
+        sections: The document's Sections, in order
+        messages_list: Messages for each section (see section_messages)
+        endpoint_name: Name of the endpoint the document belongs to
+        cache_control: The client's Cache-Control directives
+        
+    Returns:
+        str: The assembled markdown
+    """
+    messages_by_key = {section.key: messages for section, messages in zip(sections, messages_list)}
+    
+    def generate_section(section):
+        return generate_content(messages_by_key[section.key], f"{endpoint_name}:{section.key}", cache_control,
+                                rate_limit_burst=len(sections))
+    
+    with timed_phase("sections", f"{len(sections)} sections, up to {section_generator.max_concurrency} at once",
+                     span_name="sectioned_generation"):
+        contents = section_generator.generate(sections, generate_section)
+    return assemble(sections, contents)
+
+
+def generate_with_citations(messages: list, endpoint_name: str, citation_query: str,
+                            cache_control: CacheControl = None, generate=None, provider_entries: list = None) -> str:
+    """
+    LLM output followed by DuckDuckGo citations, served from the full-response cache when possible
+    
+    A full hit skips both the provider call and the search. It still counts as an
+    access to the underlying completions, so refresh-ahead keeps popular ones warm.
+    Responses whose search found nothing (or failed) are not cached, so the next
+    request retries it.
+    
+    Args:
+        messages: List of message dictionaries for the chat completion (for a
+            sectioned document, the messages of every section)
+        endpoint_name: Name of the endpoint for cache/rate limit tracking
+        citation_query: DuckDuckGo query for the citations
+        cache_control: The client's Cache-Control directives
+        generate: Callable producing the LLM output on a miss (default: one
+            completion of `messages`)
+        provider_entries: (endpoint, cache data) of the completions `generate`
+            uses (default: the one completion of `messages`)
+        
+    Returns:
+        str: The combined markdown
+        
+    Raises:
+        HTTPException: If all providers fail or return an unexpected format
+    """
+    cache_control = cache_control or CacheControl()
+    full_endpoint = f"{endpoint_name}:full"
+    cache_key = {"messages": messages, "citation_query": citation_query}
+    cached = None
+    if not cache_control.no_cache:
+        with timed_phase("response_cache", "full-response cache lookup", span_name="response_cache_lookup"):
+            cached = response_cache.get(full_endpoint, cache_key, max_stale=cache_control.max_stale)
+    if cached is not None:
+        print(f"✅ Full-response cache hit for {endpoint_name}")
+        add_span_attribute("response_cache.hit", True)
+        # cache.hit is what the tail sampler keys on: a full hit is the cheapest trace there is
+        add_span_attribute("cache.hit", True)
+        note_cache_outcome(True)
+        for provider_endpoint, data in provider_entries or [(endpoint_name, {"messages": messages})]:
+            cache.record_access(provider_endpoint, data)
+        return cached["content"]
+    add_span_attribute("response_cache.hit", False)
+    # The citations search runs even if the completion is cached, so this is never a pure hit
+    add_span_attribute("cache.hit", False)
+    
+    if generate is None:
+        main_content = generate_content(messages, endpoint_name, cache_control)
+    else:
+        main_content = generate()
+    
+    citations = integrate_duckduckgo(citation_query)
+    content = main_content + citations
+    if citations.startswith(CITATIONS_HEADER):
+        with timed_phase("response_cache_write", "full-response cache write", span_name="response_cache_write"):
+            response_cache.set(full_endpoint, cache_key, {"content": content})
+    return content
+
+
+def conditional_response(http_request: Request, content, headers: dict = None) -> Response:
+    """
+    JSON response carrying a strong ETag, or 304 if the client's copy is current
+    
+    The ETag is a hash of the response body, so it is the same whether the content
+    came from the cache or was just generated, and changes when the entry is refreshed.
+    
+    Args:
+        http_request: The incoming request (for If-None-Match)
+        content: The endpoint's result
+        headers: Extra response headers (sent with the 304 as well)
+        
+    Returns:
+        Response: 200 with the body and ETag, or an empty 304 with the ETag
+    """
+    response = JSONResponse(content, headers=headers)
+    etag = make_etag(response.body)
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        print("✅ If-None-Match: client copy is current, 304")
+        return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
+def remember_document(endpoint_name: str, content: str, idea: dict, sectioned: bool = False) -> str:
+    """
+    Keep a generated proposal/roadmap so /reviseDocument can revise it later
+    
+    Args:
+        endpoint_name: Endpoint that generated the document
+        content: The combined markdown (LLM output + citations)
+        idea: The idea it was generated for
+        sectioned: Whether it was assembled from GRANT_PROPOSAL_SECTIONS
+        
+    Returns:
+        str: The result key (a hash of the content) identifying the document
+    """
+    result_key = hashlib.sha256(content.encode()).hexdigest()[:32]
+    cache_key = {"result_key": result_key}
+    if cache.get("documents", cache_key, record_stats=False) is None:
+        main_content, separator, citations = content.rpartition("\n\nCitations:")
+        if not separator:
+            main_content, citations = content, ""
+        cache.set("documents", cache_key, {
+            "endpoint": endpoint_name,
+            "idea": idea,
+            "content": main_content,
+            "citations": separator + citations,
+            "sectioned": sectioned,
+        })
+    return result_key
+
+
+def refresh_cached_response(endpoint_name: str, cache_data: dict) -> bool:
+    """
+    Regenerate a hot cache entry ahead of its expiry (used by the refresh scheduler)
+    
+    Args:
+        endpoint_name: Endpoint the entry was cached under
+        cache_data: The cache key data ({"messages": [...]})
+        
+    Returns:
+        bool: True if the entry was refreshed, False if it was skipped
+    """
+    if "messages" not in cache_data:
+        return False  # not an LLM completion (audio, PDFs, documents): nothing to regenerate it from
+    
+    providers = get_available_providers()
+    if not providers:
+        return False
+    
+    # Only refresh when the primary provider has rate budget to spare, so
+    # background refreshes never make a user request wait
+    if rate_limiter.time_until_allowed(rate_limit_key(endpoint_name, providers[0][0])) > 0:
+        return False
+    
+    result = make_openrouter_request(cache_data["messages"], endpoint_name=endpoint_name, use_cache=False)
+    cache.set(endpoint_name, cache_data, result)
+    return True
+
+
+# Refresh hot entries shortly before they expire instead of on the user's critical path
+refresh_scheduler = RefreshScheduler(
+    cache,
+    refresh_cached_response,
+    min_hits_per_hour=float(os.getenv("CACHE_REFRESH_MIN_HITS_PER_HOUR", "3")),
+    refresh_ahead_minutes=float(os.getenv("CACHE_REFRESH_AHEAD_MINUTES", "30")),
+    check_interval_seconds=float(os.getenv("CACHE_REFRESH_INTERVAL_SECONDS", "60")),
+    max_refreshes_per_interval=int(os.getenv("CACHE_REFRESH_MAX_PER_INTERVAL", "2")),
+)
+
+
+# Event-loop lag monitor; debug mode also captures the stack of blocking calls
+loop_monitor = LoopLagMonitor(
+    interval_seconds=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")) / 1000,
+    block_threshold_seconds=float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000,
+    debug=os.getenv("LOOP_MONITOR_DEBUG", "false").lower() == "true",
+)
+
+
+async def start_background_tasks():
+    # The sweep reads every cache file, so keep it off the cold-start path
+    threading.Thread(target=sweep_expired_cache, name="cache-sweep", daemon=True).start()
+    if os.getenv("CACHE_REFRESH_ENABLED", "true").lower() == "true":
+        refresh_scheduler.start()
+    if os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true":
+        loop_monitor.start()
+
+
+async def stop_background_tasks():
+    refresh_scheduler.stop()
+    await loop_monitor.stop()
+    section_generator.shutdown()
+    revision_generator.shutdown()
+    chunk_synthesizer.shutdown()
+    transcoder.shutdown()
+    pdf_renderer.shutdown()
+    # Persist pending write-behind entries before the worker exits
+    await asyncio.to_thread(cache.close)
+    await asyncio.to_thread(response_cache.close)
+
+
+@app.get("/metrics")
+async def getMetrics():
+    cache.update_occupancy_metrics()
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+async def getCacheStats():
+    return {
+        "cache": cache.get_stats(),
+        "responses": {
+            "hits": response_cache.hits,
+            "misses": response_cache.misses,
+            "ttl_hours": response_cache.ttl.total_seconds() / 3600,
+        },
+        "refresh": refresh_scheduler.get_stats(),
+    }
+
+
+@app.get("/debug/loop")
+async def getLoopStats():
+    return loop_monitor.get_stats()
+
+
 class IdeaModel(BaseModel):
     name: str
     mission: str
@@ -515,7 +1183,7 @@ class PitchTextRequest(BaseModel):
 
 
 @app.post("/investors")
-async def getInvestors(request: ChatRequest):
+async def getInvestors(request: ChatRequest, http_request: Request):
     try:
         request_json = request.json()
         
@@ -534,16 +1202,10 @@ async def getInvestors(request: ChatRequest):
             }
         ]
         
-        result = make_openrouter_request(messages, endpoint_name="investors")
-        
-        if "choices" in result and len(result["choices"]) > 0:
-            main_content = result["choices"][0]["message"]["content"]
-        else:
-            raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
-        
         query = f"Investors for {request.idea.mission}"
-        citations = integrate_duckduckgo(query)
-        return main_content + citations
+        content = await asyncio.to_thread(generate_with_citations, messages, "investors", query,
+                                          parse_cache_control(http_request.headers.get("cache-control")))
+        return conditional_response(http_request, content)
 
     except HTTPException:
         raise
@@ -554,7 +1216,7 @@ async def getInvestors(request: ChatRequest):
 
 
 @app.post("/grantInfo")
-async def getGrantInfo(request: ChatRequest):
+async def getGrantInfo(request: ChatRequest, http_request: Request):
     try:
         request_json = request.json()
         
@@ -573,16 +1235,10 @@ async def getGrantInfo(request: ChatRequest):
             }
         ]
         
-        result = make_openrouter_request(messages, endpoint_name="grantInfo")
-        
-        if "choices" in result and len(result["choices"]) > 0:
-            main_content = result["choices"][0]["message"]["content"]
-        else:
-            raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
-
         query = f"Grants for {request.idea.mission}"
-        citations = integrate_duckduckgo(query)
-        return main_content + citations
+        content = await asyncio.to_thread(generate_with_citations, messages, "grantInfo", query,
+                                          parse_cache_control(http_request.headers.get("cache-control")))
+        return conditional_response(http_request, content)
 
     except HTTPException:
         raise
@@ -593,8 +1249,31 @@ async def getGrantInfo(request: ChatRequest):
 
 
 @app.post("/getGrantProposal")
-async def getGrantProposal(request: ChatRequest):
+async def getGrantProposal(request: ChatRequest, http_request: Request, mode: str = None):
     try:
+        cache_control = parse_cache_control(http_request.headers.get("cache-control"))
+        query = f"Grant proposal examples for {request.idea.mission}"
+        
+        # Sectioned: one concurrent provider call per section (?mode=sectioned or GRANT_PROPOSAL_MODE)
+        mode = mode or GRANT_PROPOSAL_MODE
+        if mode not in ("monolithic", "sectioned"):
+            raise HTTPException(status_code=400, detail=f"Unknown mode: {mode} (use monolithic or sectioned)")
+        if mode == "sectioned":
+            idea = request.idea.model_dump()
+            messages_list = [
+                section_messages(section, idea, "grant proposal", GRANT_PROPOSAL_SYSTEM_PROMPT)
+                for section in GRANT_PROPOSAL_SECTIONS
+            ]
+            content = await asyncio.to_thread(
+                generate_with_citations, messages_list, "getGrantProposal", query, cache_control,
+                generate=lambda: generate_sectioned(GRANT_PROPOSAL_SECTIONS, messages_list, "getGrantProposal",
+                                                    cache_control),
+                provider_entries=[(f"getGrantProposal:{section.key}", {"messages": messages})
+                                  for section, messages in zip(GRANT_PROPOSAL_SECTIONS, messages_list)],
+            )
+            result_key = await asyncio.to_thread(remember_document, "getGrantProposal", content, idea, sectioned=True)
+            return conditional_response(http_request, content, headers={"X-Result-Key": result_key})
+        
         idea_description = request.json()
         
         prompt = f"""Write a persuasive grant proposal for a non-profit organization based on this {idea_description}. Include:
@@ -623,18 +1302,11 @@ Use a conversational yet professional tone, incorporate storytelling elements, a
             }
         ]
         
-        result = make_openrouter_request(messages, endpoint_name="getGrantProposal")
-        
-        if "choices" in result and len(result["choices"]) > 0:
-            propContent = result["choices"][0]["message"]["content"]
-
-            query = f"Grant proposal examples for {request.idea.mission}"
-            citations = integrate_duckduckgo(query)
-            combined_content = propContent + citations
-
-            return combined_content
-        else:
-            raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
+        content = await asyncio.to_thread(generate_with_citations, messages, "getGrantProposal", query,
+                                          cache_control)
+        result_key = await asyncio.to_thread(remember_document, "getGrantProposal", content,
+                                             request.idea.model_dump())
+        return conditional_response(http_request, content, headers={"X-Result-Key": result_key})
     
     except HTTPException:
         raise
@@ -644,11 +1316,14 @@ Use a conversational yet professional tone, incorporate storytelling elements, a
 
 
 
-@app.post("/generatePitchText")
-async def generatePitchText(request: ChatRequest):
-    try:
-        request_json = request.json()
-        prompt = f"""Create the transcript for a short compelling elevator pitch for this project {request_json} that aligns with the United Nations Sustainable Development Goals (SDGs). It should include:
+# Voice and model used for every pitch recording
+PITCH_VOICE_ID = "bIHbv24MWmeRgasZH58o"
+PITCH_TTS_MODEL = "eleven_monolingual_v1"
+
+
+def pitch_messages(request_json: str) -> list:
+    """Chat messages for an elevator pitch transcript (shared by /generatePitchText and /streamPitch)"""
+    prompt = f"""Create the transcript for a short compelling elevator pitch for this project {request_json} that aligns with the United Nations Sustainable Development Goals (SDGs). It should include:
         A Clear Introduction: Briefly introduce the project or idea and its relevance to sustainability.
         The Problem Statement: Identify the specific environmental or social issue your idea addresses.
         The Solution: Explain how your project provides a unique and effective solution to this problem.
@@ -656,21 +1331,29 @@ async def generatePitchText(request: ChatRequest):
         Call to Action: Encourage listeners to get involved, support the project, or learn more.
         Make sure the pitch is engaging, concise (around 30-60 seconds), and emotionally resonant, appealing to the audience's sense of responsibility towards a sustainable future. Only generate the transcript, no ** or ##. Just output the transcript."""
 
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a helpful assistant, expert in CREATING STELLAR elevator pitches for non-profits. Provide concise and accurate responses."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+    messages = [
+        {
+            "role": "system",
+            "content": "You are a helpful assistant, expert in CREATING STELLAR elevator pitches for non-profits. Provide concise and accurate responses."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+    return messages
+
+
+@app.post("/generatePitchText")
+async def generatePitchText(request: ChatRequest, http_request: Request):
+    try:
+        messages = pitch_messages(request.json())
         
-        result = make_openrouter_request(messages, endpoint_name="generatePitchText")
+        result = await asyncio.to_thread(make_openrouter_request, messages, endpoint_name="generatePitchText",
+                                         cache_control=parse_cache_control(http_request.headers.get("cache-control")))
         
         if "choices" in result and len(result["choices"]) > 0:
-            return result["choices"][0]["message"]["content"]
+            return conditional_response(http_request, result["choices"][0]["message"]["content"])
         else:
             raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
 
@@ -729,8 +1412,138 @@ async def generatePitchText(request: ChatRequest):
 #         print(f"Error details: {str(e)}")
 #         raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
 
+def synthesize_sentence(sentence: str, previous_text: str = "", output_format: str = "mp3_44100_128") -> bytes:
+    """
+    Audio for one pitch sentence
+    
+    Args:
+        sentence: The sentence to speak
+        previous_text: What was spoken before it, so intonation carries across sentences
+        output_format: ElevenLabs output format (MP3 frames and raw PCM both concatenate
+            cleanly with the other sentences)
+        
+    Returns:
+        bytes: The audio
+    """
+    options = {"previous_text": previous_text} if previous_text else {}
+    tts_start = time.perf_counter()
+    chunks = []
+    for chunk in get_elevenlabs_client().text_to_speech.convert(
+        PITCH_VOICE_ID, text=sentence, model_id=PITCH_TTS_MODEL,
+        output_format=output_format, **options
+    ):
+        if not chunks:
+            ELEVENLABS_TTFB.observe(time.perf_counter() - tts_start)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def synthesize_pitch_chunk(sentence: str) -> tuple:
+    """
+    PCM audio for one sentence of a chunked pitch, cached by content
+    
+    Sentences are synthesized without the surrounding text, so the same sentence
+    always maps to the same audio and survives edits elsewhere in the pitch.
+    
+    Returns:
+        tuple: (pcm_bytes, from_cache)
+    """
+    cache_key = {"text": sentence, "voice": PITCH_VOICE_ID, "model": PITCH_TTS_MODEL,
+                 "output_format": f"pcm_{PITCH_PCM_SAMPLE_RATE}"}
+    # Not an LLM completion: keep it out of the refresh-ahead access table
+    cached = cache.get("tts_chunks", cache_key, record_stats=False)
+    if cached is not None:
+        return base64.b64decode(cached["audio"]), True
+    audio = synthesize_sentence(sentence, output_format=f"pcm_{PITCH_PCM_SAMPLE_RATE}")
+    cache.set("tts_chunks", cache_key, {"audio": base64.b64encode(audio).decode("ascii")})
+    return audio, False
+
+
+def synthesize_chunked(pitch_text: str) -> bytes:
+    """
+    Speak a pitch sentence by sentence, concurrently, and stitch the audio into one WAV
+    
+    Only sentences that aren't cached yet are sent to ElevenLabs, so editing a pitch
+    re-synthesizes just the sentences that changed.
+    
+    Returns:
+        bytes: A 16-bit mono WAV file
+    """
+    sentences = split_sentences(pitch_text)
+    with timed_phase("tts", f"ElevenLabs synthesis ({len(sentences)} sentences)", span_name="elevenlabs_tts"):
+        results = chunk_synthesizer.generate(sentences, synthesize_pitch_chunk)
+    reused = sum(1 for _, from_cache in results if from_cache)
+    print(f"🔊 Pitch audio: {len(sentences) - reused} of {len(sentences)} sentences synthesized, {reused} from cache")
+    return pcm_to_wav([audio for audio, _ in results], PITCH_PCM_SAMPLE_RATE)
+
+
+def synthesize_whole(pitch_text: str, output_format: str) -> bytes:
+    """
+    Speak a pitch as one ElevenLabs synthesis job
+    
+    Args:
+        pitch_text: The pitch transcript
+        output_format: ElevenLabs output format (mp3_* or pcm_*)
+        
+    Returns:
+        bytes: MP3 audio, or a WAV file for pcm_* formats
+    """
+    tts_start = time.perf_counter()
+    audio_generator = get_elevenlabs_client().generate(
+        text=pitch_text,
+        voice=PITCH_VOICE_ID,
+        output_format=output_format
+    )
+
+    chunks = []
+    with timed_phase("tts", "ElevenLabs synthesis", span_name="elevenlabs_tts"):
+        for chunk in audio_generator:
+            if not chunks:
+                ELEVENLABS_TTFB.observe(time.perf_counter() - tts_start)
+            chunks.append(chunk)
+    audio = b''.join(chunks)
+    if output_format.startswith("pcm_"):
+        return pcm_to_wav([audio], int(output_format.split("_")[1]))
+    return audio
+
+
+async def synthesize_transcoded(pitch_text: str, mode: str, source: str, target: str, synthesize) -> bytes:
+    """
+    Pitch audio transcoded on the process pool, cached by what was spoken
+    
+    The key is the transcript, voice, model and encoding, not the audio: whole-pitch
+    synthesis isn't cached and ElevenLabs output isn't byte-identical between calls,
+    so a hash of freshly synthesized audio would never hit. A hit skips synthesis too.
+    
+    Args:
+        pitch_text: The pitch transcript
+        mode: "whole" or "chunked"
+        source: Container synthesize() produces ("wav" or "mp3")
+        target: Key of AUDIO_FORMATS to produce
+        synthesize: Blocking callable returning the source audio
+        
+    Returns:
+        bytes: The encoded audio
+    """
+    cache_key = {"text": pitch_text, "mode": mode, "voice": PITCH_VOICE_ID, "model": PITCH_TTS_MODEL,
+                 "source": source, "sample_rate": PITCH_PCM_SAMPLE_RATE, "format": target,
+                 "bitrate": AUDIO_FORMATS[target].bitrate}
+    # Not an LLM completion: keep it out of the refresh-ahead access table
+    cached = await asyncio.to_thread(cache.get, "tts_transcoded", cache_key, record_stats=False)
+    if cached is not None:
+        return base64.b64decode(cached["audio"])
+    audio = await asyncio.to_thread(synthesize)
+    with timed_phase("transcode", f"transcode to {target}", span_name="audio_transcode"):
+        encoded = await transcoder.transcode(audio, source, target)
+    print(f"🎚️ Transcoded {len(audio)} bytes of {source} to {len(encoded)} bytes of {target}")
+    await asyncio.to_thread(cache.set, "tts_transcoded", cache_key,
+                            {"audio": base64.b64encode(encoded).decode("ascii")})
+    return encoded
+
+
 @app.post("/generatePitchAudio")
-async def generatePitchAudio(request: PitchTextRequest):
+async def generatePitchAudio(request: PitchTextRequest, http_request: Request, mode: str = None,
+                             format: str = None):
     try:
         # body = await request.json()
         pitch_text = request.pitch_text
@@ -740,33 +1553,97 @@ async def generatePitchAudio(request: PitchTextRequest):
 
         print(f"Received pitch_text: {pitch_text[:100]}...")
 
-        audio_generator = client.generate(
-            text=pitch_text,
-            voice="bIHbv24MWmeRgasZH58o"
-        )
-
-        audio_chunks = b''.join(chunk for chunk in audio_generator)
-
-        # Create a temporary file to store the audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(audio_chunks)
-            tmp_path = tmp_file.name
-
-        # Return the file and clean it up after sending
-        return FileResponse(
-            tmp_path, 
-            media_type="audio/wav", 
-            filename="pitch.wav",
-            background=BackgroundTask(lambda: os.remove(tmp_path))
+        mode = mode or PITCH_AUDIO_MODE
+        if mode not in ("whole", "chunked"):
+            raise ValueError(f"Unknown mode '{mode}' (expected 'whole' or 'chunked')")
+
+        # ?format= wins over the Accept header
+        if format is not None and format not in AUDIO_FORMATS:
+            raise ValueError(f"Unknown format '{format}' (expected one of: {', '.join(AUDIO_FORMATS)})")
+        # Whole pitches come from ElevenLabs as MP3 or PCM; chunked ones are always stitched PCM
+        available = available_formats(native=("wav",) if mode == "chunked" else ("mp3", "wav"))
+        if format:
+            target = format if format in available else None
+        else:
+            target = negotiate_audio_format(http_request.headers.get("accept"), available)
+        if target is None:
+            raise HTTPException(status_code=406, detail=f"Can't produce the requested audio format "
+                                                        f"(available: {', '.join(available)})")
+        audio_format = AUDIO_FORMATS[target]
+
+        # Whatever is synthesized is WAV unless ElevenLabs produces the MP3 directly
+        if mode == "chunked":
+            source, synthesize = "wav", lambda: synthesize_chunked(pitch_text)
+        elif target == "mp3":
+            source, synthesize = "mp3", lambda: synthesize_whole(pitch_text, PITCH_MP3_OUTPUT_FORMAT)
+        else:
+            source, synthesize = "wav", lambda: synthesize_whole(pitch_text, f"pcm_{PITCH_PCM_SAMPLE_RATE}")
+        if source == target:
+            audio = await asyncio.to_thread(synthesize)
+        else:
+            audio = await synthesize_transcoded(pitch_text, mode, source, target, synthesize)
+
+        return Response(
+            content=audio,
+            media_type=audio_format.media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="pitch.{audio_format.extension}"',
+                "Vary": "Accept",
+            }
         )
 
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error details: {str(e)}")  # Log the full error details
         raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
 
 
+@app.post("/streamPitch")
+async def streamPitch(request: ChatRequest, http_request: Request):
+    """
+    Generate and speak an elevator pitch as one audio stream
+    
+    The transcript is streamed from the LLM and cut at sentence boundaries; each
+    sentence is sent to ElevenLabs as soon as it is complete and the MP3 audio is
+    streamed back in order, so playback starts about when the first sentence has
+    been written. The transcript is cached like /generatePitchText's.
+    """
+    request_start = time.perf_counter()
+    text = stream_llm_text(pitch_messages(request.json()), "generatePitchText",
+                           cache_control=parse_cache_control(http_request.headers.get("cache-control")))
+    audio = stream_pitch_audio(text, synthesize_sentence, max_concurrency=PITCH_TTS_CONCURRENCY)
+
+    # Wait for the first sentence's audio so failures before any audio are still an error status
+    try:
+        with timed_phase("first_audio", "first sentence spoken", span_name="pitch_first_audio"):
+            first = await audio.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="The LLM returned an empty pitch")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error details: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
+    PITCH_FIRST_AUDIO.observe(time.perf_counter() - request_start)
+
+    async def body():
+        try:
+            yield first
+            async for chunk in audio:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; the client sees the stream end early
+            print(f"❌ Pitch stream aborted: {str(e)}")
+        finally:
+            await audio.aclose()
+
+    return StreamingResponse(body(), media_type="audio/mpeg",
+                             headers={"Content-Disposition": "inline; filename=pitch.mp3"})
+
+
 # @app.post("/generatePitchAudio")
 # async def generatePitchAudio(pitch_text: PitchTextRequest):
 #     try:
@@ -892,15 +1769,18 @@ async def generatePitchAudio(request: PitchTextRequest):
 #     return response
 
 
+BUSINESS_PLAN_SYSTEM_PROMPT = "You are a consultant for non-profits. You receive details on the type of non-profit your client wants to create. You have 20 years of experience advising for clients across the globe, and specialize in creating business plans and actionable roadmaps for aspirational non-profit founders. You consider your clients' country of operation when providing advice. When you provide advice, you include website links to resources for your clients to follow. Double check these links work. Your output is a step-by-step non-profit creation plan with a timeline. Exclude fundraising from the step-by-step plan but include it in the timeline"
+
+
 @app.post("/business_plan_roadmap")
-async def getPlan(request: ChatRequest):
+async def getPlan(request: ChatRequest, http_request: Request):
     try:
         request_json = request.json()
         
         messages = [
             {
                 "role": "system",
-                "content": "You are a consultant for non-profits. You receive details on the type of non-profit your client wants to create. You have 20 years of experience advising for clients across the globe, and specialize in creating business plans and actionable roadmaps for aspirational non-profit founders. You consider your clients' country of operation when providing advice. When you provide advice, you include website links to resources for your clients to follow. Double check these links work. Your output is a step-by-step non-profit creation plan with a timeline. Exclude fundraising from the step-by-step plan but include it in the timeline"
+                "content": BUSINESS_PLAN_SYSTEM_PROMPT
             },
             {
                 "role": "user",
@@ -908,20 +1788,221 @@ async def getPlan(request: ChatRequest):
             }
         ]
         
-        result = make_openrouter_request(messages, endpoint_name="business_plan_roadmap")
+        query = f"Business plan roadmap for {request.idea.mission}"
+        content = await asyncio.to_thread(generate_with_citations, messages, "business_plan_roadmap", query,
+                                          parse_cache_control(http_request.headers.get("cache-control")))
+        result_key = await asyncio.to_thread(remember_document, "business_plan_roadmap", content,
+                                             request.idea.model_dump())
+        return conditional_response(http_request, content, headers={"X-Result-Key": result_key})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+class RevisionRequest(BaseModel):
+    result_key: str
+    instruction: Optional[str] = None
+    sections: List[str] = []
+    idea: Optional[IdeaModel] = None
+
+
+# Revisable documents: endpoint -> (what it is, system prompt, citation query)
+REVISABLE_DOCUMENTS = {
+    "getGrantProposal": ("grant proposal", GRANT_PROPOSAL_SYSTEM_PROMPT, "Grant proposal examples for {mission}"),
+    "business_plan_roadmap": ("non-profit business plan and roadmap", BUSINESS_PLAN_SYSTEM_PROMPT,
+                              "Business plan roadmap for {mission}"),
+}
+
+
+def revise_document(record: dict, revision: RevisionRequest, cache_control: CacheControl) -> dict:
+    """
+    Regenerate only the sections of a stored document that a change affects
+    
+    Affected sections are the ones named in revision.sections or, if none are named,
+    the ones depending on idea fields that changed (by Section.fields for sectioned
+    proposals, otherwise by which sections quote the old field values). Untouched
+    sections and the citations are reused; the search only reruns if the mission changed.
+    Revised sections run on revision_generator with a burst budget of one call per
+    section, like generate_sectioned.
+    
+    Args:
+        record: The stored document (see remember_document)
+        revision: The requested change
+        cache_control: The client's Cache-Control directives
         
-        if "choices" in result and len(result["choices"]) > 0:
-            response_content = result["choices"][0]["message"]["content"]
+    Returns:
+        dict: result_key, content, revised_sections and reused_sections
+        
+    Raises:
+        HTTPException: 400 if the change is empty or can't be attributed to a section
+    """
+    endpoint_name = record["endpoint"]
+    document, system_prompt, citation_query = REVISABLE_DOCUMENTS[endpoint_name]
+    old_idea = record["idea"]
+    idea = revision.idea.model_dump() if revision.idea is not None else old_idea
+    changed_fields = [field for field in IDEA_FIELDS if old_idea.get(field) != idea.get(field)]
+    if not revision.instruction and not changed_fields:
+        raise HTTPException(status_code=400, detail="Nothing to revise: give an instruction or a changed idea")
+    
+    known = {section.title: section for section in GRANT_PROPOSAL_SECTIONS} if record["sectioned"] else None
+    preamble, parts = split_sections(record["content"], titles=known)
+    if not parts:
+        raise HTTPException(status_code=400, detail="The document has no sections to revise")
+    
+    targets = []
+    for name in revision.sections:
+        matches = [i for i, part in enumerate(parts)
+                   if part["title"].lower() == name.lower() or (known and known[part["title"]].key == name)]
+        if not matches:
+            titles = ", ".join(part["title"] for part in parts)
+            raise HTTPException(status_code=400, detail=f"Unknown section: {name} (sections: {titles})")
+        targets += [i for i in matches if i not in targets]
+    if not revision.sections:
+        old_values = [value.lower() for value in mentioned_values(old_idea, changed_fields)]
+        for i, part in enumerate(parts):
+            if known:
+                affected = set(known[part["title"]].fields) & set(changed_fields)
+            else:
+                text = (part["heading"] + part["body"]).lower()
+                affected = any(value in text for value in old_values)
+            if affected:
+                targets.append(i)
+    if not targets:
+        raise HTTPException(status_code=400,
+                            detail="Could not tell which sections the change affects; name them in `sections`")
+    
+    def revise_part(i):
+        part = parts[i]
+        section = known[part["title"]] if known else None
+        if section is not None and not revision.instruction:
+            # Same prompt as a fresh sectioned generation, so the result is shared with /getGrantProposal
+            messages = section_messages(section, idea, document, system_prompt)
         else:
-            raise HTTPException(status_code=500, detail="Unexpected response format from OpenRouter API")
+            messages = revision_messages(part["title"], part["body"], idea, document, system_prompt,
+                                         revision.instruction)
+        name = f"{endpoint_name}:{section.key if section else f'section{i + 1}'}"
+        return generate_content(messages, name, cache_control, rate_limit_burst=len(targets))
+    
+    with timed_phase("sections", f"{len(targets)} of {len(parts)} sections revised", span_name="revise_sections"):
+        revised = revision_generator.generate(targets, revise_part)
+    for i, text in zip(targets, revised):
+        body = parts[i]["body"]
+        leading = body[:len(body) - len(body.lstrip())] or "\n"
+        trailing = body[len(body.rstrip()):]
+        parts[i] = {**parts[i], "body": leading + text.strip() + trailing}
+    
+    citations = record["citations"]
+    if "mission" in changed_fields:
+        citations = integrate_duckduckgo(citation_query.format(mission=idea["mission"]))
+    content = join_sections(preamble, parts) + citations
+    print(f"✏️  Revised {len(targets)} of {len(parts)} sections of {endpoint_name}")
+    return {
+        "result_key": remember_document(endpoint_name, content, idea, record["sectioned"]),
+        "content": content,
+        "revised_sections": [parts[i]["title"] for i in targets],
+        "reused_sections": len(parts) - len(targets),
+    }
 
-        query = f"Business plan roadmap for {request.idea.mission}"
-        citations = integrate_duckduckgo(query)
-        combined_response = response_content + citations
-        return combined_response
 
+@app.post("/reviseDocument")
+async def reviseDocument(revision: RevisionRequest, http_request: Request):
+    """Revise the affected sections of a /getGrantProposal or /business_plan_roadmap result (X-Result-Key)"""
+    try:
+        record = await asyncio.to_thread(cache.get, "documents", {"result_key": revision.result_key},
+                                         record_stats=False)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired result_key; generate the document again")
+        cache_control = parse_cache_control(http_request.headers.get("cache-control"))
+        result = await asyncio.to_thread(revise_document, record, revision, cache_control)
+        return conditional_response(http_request, result, headers={"X-Result-Key": result["result_key"]})
+    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+
+class PdfExportRequest(BaseModel):
+    result_key: Optional[str] = None
+    content: Optional[str] = None
+    title: Optional[str] = None
+
+
+# Size of the pieces a PDF is streamed in
+PDF_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def citations_markdown(citations: str) -> str:
+    """A stored citations block ("\\n\\nCitations:\\n[1] title: url...") as a markdown section"""
+    if not citations.startswith(CITATIONS_HEADER):
+        return ""  # "not found" or search error text isn't worth printing
+    entries = [line.strip() for line in citations[len(CITATIONS_HEADER):].splitlines() if line.strip()]
+    return "\n\n## Citations\n\n" + "\n".join(f"- {entry}" for entry in entries) + "\n"
+
+
+async def render_pdf_cached(markdown: str, title: str, digest: str) -> bytes:
+    """
+    Render a PDF on the process pool, caching it by content hash
+    
+    Args:
+        markdown: The document
+        title: Its title
+        digest: Hash of the layout version, title and markdown
+        
+    Returns:
+        bytes: The PDF
+    """
+    cache_key = {"sha256": digest}
+    # Not an LLM completion: keep it out of the refresh-ahead access table
+    cached = await asyncio.to_thread(cache.get, "pdf_exports", cache_key, record_stats=False)
+    if cached is not None:
+        return base64.b64decode(cached["pdf"])
+    with timed_phase("pdf", "PDF render", span_name="pdf_render"):
+        pdf = await pdf_renderer.render(markdown, title)
+    print(f"📄 Rendered {len(markdown)} chars of markdown to a {len(pdf) // 1024} KB PDF")
+    await asyncio.to_thread(cache.set, "pdf_exports", cache_key, {"pdf": base64.b64encode(pdf).decode("ascii")})
+    return pdf
+
+
+@app.post("/exportPdf")
+async def exportPdf(export: PdfExportRequest, http_request: Request):
+    """Export a /getGrantProposal or /business_plan_roadmap result (X-Result-Key), or any markdown, as a PDF"""
+    try:
+        if export.result_key:
+            record = await asyncio.to_thread(cache.get, "documents", {"result_key": export.result_key},
+                                             record_stats=False)
+            if record is None:
+                raise HTTPException(status_code=404, detail="Unknown or expired result_key; generate the document again")
+            document = REVISABLE_DOCUMENTS[record["endpoint"]][0]
+            title = export.title or f"{document[0].upper()}{document[1:]} for {record['idea'].get('name', '')}".strip()
+            markdown = record["content"] + citations_markdown(record["citations"])
+        elif export.content:
+            title = export.title
+            markdown = export.content
+        else:
+            raise HTTPException(status_code=400, detail="Give a result_key or the markdown content to export")
+        
+        # The PDF is a function of its source, so the ETag is known before rendering
+        source = json.dumps([LAYOUT_VERSION, title, markdown]).encode()
+        etag = make_etag(source)
+        filename = re.sub(r"[^A-Za-z0-9]+", "-", title or "document").strip("-").lower()[:80] or "document"
+        headers = {"ETag": etag, "Content-Disposition": f'attachment; filename="{filename}.pdf"'}
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            print("✅ If-None-Match: client copy is current, 304")
+            return Response(status_code=304, headers=headers)
+        
+        pdf = await render_pdf_cached(markdown, title, hashlib.sha256(source).hexdigest())
+        
+        def chunks():
+            for start in range(0, len(pdf), PDF_STREAM_CHUNK_BYTES):
+                yield pdf[start:start + PDF_STREAM_CHUNK_BYTES]
+        
+        return StreamingResponse(chunks(), media_type="application/pdf",
+                                 headers={**headers, "Content-Length": str(len(pdf))})
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting PDF: {str(e)}")
@@ -0,0 +1,239 @@
+"""
+Local Prometheus-format metrics
+Dependency-free counters, gauges and histograms rendered in the Prometheus text
+exposition format by the /metrics endpoint. Works offline, without Honeycomb
+
+Metrics are per process: with several uvicorn workers, scrape each worker (or
+run a single worker) to get complete numbers
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus default buckets, extended for slow LLM calls and rate-limit waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None) -> str:
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        """
+        Args:
+            name: Metric name (Prometheus naming, e.g. cache_lookup_seconds)
+            documentation: HELP text
+            labelnames: Names of the labels every sample must provide
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.extend(self._render_sample(labelvalues, value))
+        return lines
+
+    def _render_sample(self, labelvalues, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _render_sample(self, labelvalues, state) -> list:
+        bucket_counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, labelvalues, ("le", _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Application metrics
+
+LLM_PROVIDER_LATENCY = Histogram(
+    "llm_provider_latency_seconds",
+    "Latency of LLM provider calls by provider, endpoint and outcome",
+    ("provider", "endpoint", "outcome"),
+)
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Provider failures that caused a fallback to the next provider",
+    ("endpoint", "provider"),
+)
+PROVIDER_RATE_LIMITED = Counter(
+    "provider_rate_limited_total",
+    "HTTP 429 responses received from upstream providers",
+    ("provider",),
+)
+RATE_LIMITER_WAIT = Histogram(
+    "rate_limiter_wait_seconds",
+    "Time spent waiting in RateLimiter before a provider call",
+    ("endpoint", "provider"),
+)
+CACHE_LOOKUP = Histogram(
+    "cache_lookup_seconds",
+    "ResponseCache lookups by tier and result (hit/miss)",
+    ("tier", "result"),
+    buckets=FAST_BUCKETS,
+)
+CACHE_WRITE = Histogram(
+    "cache_write_seconds",
+    "Time ResponseCache.set spends on the caller's path by mode (sync/write_behind)",
+    ("mode",),
+    buckets=FAST_BUCKETS,
+)
+CACHE_WRITE_QUEUE = Gauge(
+    "cache_write_queue_depth",
+    "Entries waiting for the write-behind writer",
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total",
+    "Cache entries evicted to stay within the byte budget (reason: budget/quota)",
+    ("endpoint", "reason"),
+)
+CACHE_BYTES = Gauge(
+    "cache_bytes",
+    "Bytes of cached entries per endpoint (bounded file cache)",
+    ("endpoint",),
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Cached entries per endpoint (bounded file cache)",
+    ("endpoint",),
+)
+CACHE_LIMIT_BYTES = Gauge(
+    "cache_limit_bytes",
+    "Configured cache byte limit (endpoint=\"all\" for the global budget)",
+    ("endpoint",),
+)
+DDG_SEARCH_LATENCY = Histogram(
+    "ddg_search_seconds",
+    "DuckDuckGo citation search latency by outcome",
+    ("outcome",),
+)
+ELEVENLABS_TTFB = Histogram(
+    "elevenlabs_ttfb_seconds",
+    "Time from ElevenLabs request to first audio byte",
+)
+PITCH_FIRST_AUDIO = Histogram(
+    "pitch_first_audio_seconds",
+    "Time from a /streamPitch request to its first sentence of audio",
+)
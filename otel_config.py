@@ -3,15 +3,19 @@ OpenTelemetry configuration for Honeycomb observability
 Provides automatic instrumentation for FastAPI and manual instrumentation utilities
 """
 
+import inspect
 import os
+from contextlib import contextmanager
+from functools import wraps
+# Only the lightweight API is imported here; the SDK, exporter and instrumentors
+# are imported in configure_opentelemetry, so cold starts without Honeycomb skip them
 from opentelemetry import trace, baggage
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-from opentelemetry.processor.baggage import BaggageSpanProcessor, ALLOW_ALL_BAGGAGE_KEYS
+
+import server_timing
+
+# Set once a tracer provider with an exporter is installed. While False every
+# helper below returns immediately without touching the OpenTelemetry API
+_tracing_enabled = False
 
 
 def configure_opentelemetry(app, service_name: str = "budhrajaankita-ted"):
@@ -30,6 +34,14 @@ def configure_opentelemetry(app, service_name: str = "budhrajaankita-ted"):
         print("⚠️  HONEYCOMB_API_KEY not configured - observability disabled")
         return None
     
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.requests import RequestsInstrumentor
+    from opentelemetry.processor.baggage import BaggageSpanProcessor, ALLOW_ALL_BAGGAGE_KEYS
+    
     # Determine Honeycomb endpoint (US or EU)
     honeycomb_endpoint = os.getenv(
         "OTEL_EXPORTER_OTLP_ENDPOINT",
@@ -43,8 +55,14 @@ def configure_opentelemetry(app, service_name: str = "budhrajaankita-ted"):
         "deployment.environment": os.getenv("ENVIRONMENT", "development"),
     })
     
+    # Head sampling by endpoint (OTEL_HEAD_SAMPLE_RATES), tail sampling below
+    from otel_sampling import (
+        TailSamplingProcessor, batch_processor_settings_from_env, sampler_from_env, wrap_with_tail_sampling,
+    )
+    sampler = sampler_from_env()
+    
     # Configure the tracer provider
-    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider = TracerProvider(resource=resource, sampler=sampler)
     
     # Add baggage processor to propagate baggage to spans
     tracer_provider.add_span_processor(BaggageSpanProcessor(ALLOW_ALL_BAGGAGE_KEYS))
@@ -57,11 +75,14 @@ def configure_opentelemetry(app, service_name: str = "budhrajaankita-ted"):
         }
     )
     
-    # Add batch span processor
-    tracer_provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
+    # Add batch span processor, behind the tail sampler unless it is disabled
+    batch_settings = batch_processor_settings_from_env()
+    span_processor = wrap_with_tail_sampling(BatchSpanProcessor(otlp_exporter, **batch_settings))
+    tracer_provider.add_span_processor(span_processor)
     
     # Set the global tracer provider
     trace.set_tracer_provider(tracer_provider)
+    enable_tracing()
     
     # Instrument FastAPI automatically
     FastAPIInstrumentor.instrument_app(app)
@@ -71,10 +92,39 @@ def configure_opentelemetry(app, service_name: str = "budhrajaankita-ted"):
     
     print(f"✅ Honeycomb observability enabled for service: {service_name}")
     print(f"   Endpoint: {honeycomb_endpoint}")
+    print(f"   Head sampler: {sampler.get_description()}")
+    print(f"   Tail sampling: {'on' if isinstance(span_processor, TailSamplingProcessor) else 'off'}")
+    print(f"   Batch export: queue={batch_settings['max_queue_size']}, "
+          f"batch={batch_settings['max_export_batch_size']}, "
+          f"interval={batch_settings['schedule_delay_millis']:.0f}ms")
     
     return tracer_provider
 
 
+def enable_tracing(enabled: bool = True):
+    """
+    Switch the instrumentation helpers on or off
+    
+    Called by configure_opentelemetry once an exporter is installed. Functions
+    decorated with instrument_function while tracing is off are left unwrapped,
+    so decorate after configuring (as main.py does)
+    """
+    global _tracing_enabled
+    _tracing_enabled = enabled
+
+
+def tracing_active() -> bool:
+    """
+    True if tracing is configured and the current span is being recorded
+    
+    Use it to skip building attribute dicts and f-strings that would be thrown away:
+    
+        if tracing_active():
+            add_span_event("provider_failed", {"error.message": str(e)})
+    """
+    return _tracing_enabled and trace.get_current_span().is_recording()
+
+
 def get_tracer(name: str = "main"):
     """
     Get a tracer instance for manual instrumentation
@@ -96,8 +146,10 @@ def add_span_attribute(key: str, value):
         key: Attribute key
         value: Attribute value (string, int, float, or bool)
     """
+    if not _tracing_enabled:
+        return
     span = trace.get_current_span()
-    if span:
+    if span.is_recording():
         span.set_attribute(key, value)
 
 
@@ -109,8 +161,10 @@ def add_span_event(name: str, attributes: dict = None):
         name: Event name
         attributes: Optional dictionary of attributes
     """
+    if not _tracing_enabled:
+        return
     span = trace.get_current_span()
-    if span:
+    if span.is_recording():
         span.add_event(name, attributes or {})
 
 
@@ -140,11 +194,50 @@ def detach_baggage(token):
     detach(token)
 
 
+def _should_start_span() -> bool:
+    """
+    Skip span creation when tracing is off, or when the parent span exists but is
+    not sampled (a child of an unsampled parent would be dropped anyway)
+    """
+    if not _tracing_enabled:
+        return False
+    parent = trace.get_current_span()
+    return parent.is_recording() or not parent.get_span_context().is_valid
+
+
+def timed_phase(name: str, description: str = None, span_name: str = None):
+    """
+    Time a block as both a span and a Server-Timing phase of the current request
+    
+    Args:
+        name: Server-Timing metric name (e.g. "cache", "citations")
+        description: Optional human-readable description for Server-Timing
+        span_name: Span name (defaults to name)
+        
+    Example:
+        with timed_phase("citations", "DuckDuckGo search"):
+            results = ddg_search(query)
+    """
+    if not _should_start_span():
+        return server_timing.phase(name, description)
+    return _span_phase(name, description, span_name)
+
+
+@contextmanager
+def _span_phase(name: str, description: str, span_name: str):
+    tracer = get_tracer("phase")
+    with tracer.start_as_current_span(span_name or name), server_timing.phase(name, description):
+        yield
+
+
 # Decorator for instrumenting functions
 def instrument_function(span_name: str = None):
     """
     Decorator to automatically create a span around a function
     
+    Supports both regular and async functions. When tracing is not configured at
+    decoration time the function is returned unchanged (zero overhead).
+    
     Args:
         span_name: Optional custom span name (defaults to function name)
         
@@ -155,13 +248,26 @@ def instrument_function(span_name: str = None):
             pass
     """
     def decorator(func):
-        from functools import wraps
+        if not _tracing_enabled:
+            return func
+        
+        name = span_name or func.__name__
+        tracer = get_tracer("decorator")
+        
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _should_start_span():
+                    return await func(*args, **kwargs)
+                with tracer.start_as_current_span(name):
+                    return await func(*args, **kwargs)
+            
+            return async_wrapper
         
         @wraps(func)
         def wrapper(*args, **kwargs):
-            tracer = get_tracer("decorator")
-            name = span_name or func.__name__
-            
+            if not _should_start_span():
+                return func(*args, **kwargs)
             with tracer.start_as_current_span(name):
                 return func(*args, **kwargs)
         
@@ -0,0 +1,250 @@
+"""
+Head and tail sampling for Honeycomb traces
+EndpointSampler makes the head decision per endpoint; TailSamplingProcessor buffers
+finished spans per trace and keeps slow, fallback and error traces while sampling
+fast cache hits at a low rate before handing spans to the batch exporter
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult
+from opentelemetry.trace import StatusCode
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+def _keep(trace_id: int, rate: float) -> bool:
+    """Deterministic per-trace decision, so every span of a trace agrees"""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    return (trace_id & _TRACE_ID_LIMIT) < rate * _TRACE_ID_LIMIT
+
+
+def _tail_bits(trace_id: int) -> int:
+    """
+    64 bits hashed from the trace id for the tail decision
+
+    The head sampler thresholds the id's low 64 bits; reusing them would make the
+    tail keep set a subset of the head one, and multiplying the two SampleRates
+    would then over-weight kept traces
+    """
+    return int.from_bytes(hashlib.blake2b(trace_id.to_bytes(16, "big"), digest_size=8).digest(), "big")
+
+
+def parse_rates(spec: str) -> dict:
+    """Parse "/metrics=0,/investors=0.5" into {path: rate}"""
+    rates = {}
+    for part in (spec or "").split(","):
+        path, sep, rate = part.strip().partition("=")
+        if sep:
+            rates[path.strip()] = float(rate)
+    return rates
+
+
+class EndpointSampler(Sampler):
+    """
+    Head sampler choosing a rate per request path
+
+    Child spans follow their parent's decision. Kept root spans carry a SampleRate
+    attribute so Honeycomb can re-weight counts
+    """
+
+    def __init__(self, rates: dict, default_rate: float = 1.0):
+        """
+        Args:
+            rates: Path -> sample rate (0.0-1.0), e.g. {"/metrics": 0.0}
+            default_rate: Rate for paths not listed
+        """
+        self.rates = rates
+        self.default_rate = default_rate
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None,
+                      links=None, trace_state=None):
+        parent = trace.get_current_span(parent_context).get_span_context()
+        if parent.is_valid:
+            decision = Decision.RECORD_AND_SAMPLE if parent.trace_flags.sampled else Decision.DROP
+            return SamplingResult(decision, attributes, parent.trace_state)
+
+        attributes = attributes or {}
+        path = attributes.get("http.target") or attributes.get("url.path") or ""
+        path = str(path).split("?", 1)[0]
+        rate = self.rates.get(path, self.default_rate)
+
+        if not _keep(trace_id, rate):
+            return SamplingResult(Decision.DROP, None, trace_state)
+        sampled_attributes = dict(attributes)
+        if rate < 1:
+            sampled_attributes["SampleRate"] = round(1 / rate)
+        return SamplingResult(Decision.RECORD_AND_SAMPLE, sampled_attributes, trace_state)
+
+    def get_description(self) -> str:
+        return f"EndpointSampler(default={self.default_rate}, rates={self.rates})"
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """
+    Buffers finished spans per trace and decides once the local root span ends
+
+    Always kept: traces slower than slow_ms, traces with a provider fallback and
+    traces with an error. Traces that were pure cache hits are kept at
+    cache_hit_rate, everything else at default_rate
+    """
+
+    def __init__(self, exporter_processor: SpanProcessor, slow_ms: float = 2000,
+                 cache_hit_rate: float = 0.05, default_rate: float = 1.0,
+                 max_traces: int = 10000, trace_timeout_s: float = 60):
+        """
+        Args:
+            exporter_processor: Processor receiving the kept spans (e.g. BatchSpanProcessor)
+            slow_ms: Root duration above which a trace is always kept
+            cache_hit_rate: Rate for traces served entirely from cache
+            default_rate: Rate for all other unremarkable traces
+            max_traces: Maximum number of traces buffered at once
+            trace_timeout_s: Decide traces whose root never ended after this long
+        """
+        self.exporter_processor = exporter_processor
+        self.slow_ns = slow_ms * 1e6
+        self.cache_hit_rate = cache_hit_rate
+        self.default_rate = default_rate
+        self.max_traces = max_traces
+        self.trace_timeout_s = trace_timeout_s
+        self._traces = OrderedDict()  # trace_id -> (first_seen, [spans])
+        self._lock = threading.Lock()
+        self.stats = {"kept": 0, "dropped": 0, "kept_slow": 0, "kept_error": 0, "kept_fallback": 0}
+
+    def on_start(self, span, parent_context=None):
+        self.exporter_processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        ready = []
+
+        with self._lock:
+            entry = self._traces.get(trace_id)
+            if entry is None:
+                entry = self._traces[trace_id] = (time.monotonic(), [])
+            entry[1].append(span)
+
+            if is_local_root:
+                ready.append(self._traces.pop(trace_id)[1])
+
+            # Flush traces whose root never ended, and cap the buffer size
+            now = time.monotonic()
+            while self._traces:
+                oldest_id, (first_seen, spans) = next(iter(self._traces.items()))
+                if len(self._traces) <= self.max_traces and now - first_seen < self.trace_timeout_s:
+                    break
+                del self._traces[oldest_id]
+                ready.append(spans)
+
+        for spans in ready:
+            self._decide(spans)
+
+    def _decide(self, spans: list):
+        reason = self._always_keep_reason(spans)
+        if reason:
+            self.stats[f"kept_{reason}"] += 1
+            self._export(spans, 1.0)
+            return
+
+        cache_hit = any(s.attributes.get("cache.hit") is True for s in spans) and \
+            not any(s.attributes.get("cache.hit") is False for s in spans)
+        rate = self.cache_hit_rate if cache_hit else self.default_rate
+        if _keep(_tail_bits(spans[0].context.trace_id), rate):
+            self._export(spans, rate)
+        else:
+            self.stats["dropped"] += 1
+
+    def _always_keep_reason(self, spans: list):
+        for span in spans:
+            if span.status.status_code == StatusCode.ERROR or "error" in span.attributes:
+                return "error"
+            if (span.attributes.get("http.status_code") or 0) >= 500:
+                return "error"
+        for span in spans:
+            if (span.attributes.get("provider.attempt") or 1) > 1 or \
+                    any(event.name == "provider_failed" for event in span.events):
+                return "fallback"
+        root = min(spans, key=lambda s: s.start_time or 0)
+        if root.end_time and root.start_time and root.end_time - root.start_time >= self.slow_ns:
+            return "slow"
+        return None
+
+    def _export(self, spans: list, rate: float):
+        self.stats["kept"] += 1
+        for span in spans:
+            if rate < 1:
+                span = _with_sample_rate(span, rate)
+            self.exporter_processor.on_end(span)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            pending = [spans for _, spans in self._traces.values()]
+            self._traces.clear()
+        for spans in pending:
+            self._decide(spans)
+        return self.exporter_processor.force_flush(timeout_millis)
+
+    def shutdown(self):
+        self.force_flush()
+        self.exporter_processor.shutdown()
+
+
+def _with_sample_rate(span: ReadableSpan, rate: float) -> ReadableSpan:
+    """Copy of a finished span carrying Honeycomb's SampleRate attribute"""
+    attributes = dict(span.attributes or {})
+    attributes["SampleRate"] = round(attributes.get("SampleRate", 1) / rate)
+    return ReadableSpan(
+        name=span.name,
+        context=span.context,
+        parent=span.parent,
+        resource=span.resource,
+        attributes=attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+def sampler_from_env() -> EndpointSampler:
+    """Head sampler configured from OTEL_HEAD_SAMPLE_RATES / OTEL_HEAD_SAMPLE_RATE_DEFAULT"""
+    return EndpointSampler(
+        rates=parse_rates(os.getenv("OTEL_HEAD_SAMPLE_RATES", "/metrics=0,/cache/stats=0")),
+        default_rate=float(os.getenv("OTEL_HEAD_SAMPLE_RATE_DEFAULT", "1.0")),
+    )
+
+
+def batch_processor_settings_from_env() -> dict:
+    """BatchSpanProcessor queue/interval settings (standard OTEL_BSP_* variables)"""
+    return {
+        "max_queue_size": int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "2048")),
+        "schedule_delay_millis": float(os.getenv("OTEL_BSP_SCHEDULE_DELAY", "5000")),
+        "max_export_batch_size": int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "512")),
+        "export_timeout_millis": float(os.getenv("OTEL_BSP_EXPORT_TIMEOUT", "30000")),
+    }
+
+
+def wrap_with_tail_sampling(processor: SpanProcessor) -> SpanProcessor:
+    """Wrap the export processor in a TailSamplingProcessor unless OTEL_TAIL_SAMPLING_ENABLED=false"""
+    if os.getenv("OTEL_TAIL_SAMPLING_ENABLED", "true").lower() != "true":
+        return processor
+    return TailSamplingProcessor(
+        processor,
+        slow_ms=float(os.getenv("OTEL_TAIL_SLOW_MS", "2000")),
+        cache_hit_rate=float(os.getenv("OTEL_TAIL_CACHE_HIT_RATE", "0.05")),
+        default_rate=float(os.getenv("OTEL_TAIL_DEFAULT_RATE", "1.0")),
+        max_traces=int(os.getenv("OTEL_TAIL_MAX_TRACES", "10000")),
+        trace_timeout_s=float(os.getenv("OTEL_TAIL_TRACE_TIMEOUT_S", "60")),
+    )
@@ -0,0 +1,282 @@
+"""
+PDF export
+Generated markdown (grant proposals, roadmaps) is parsed into ReportLab flowables:
+headings, paragraphs with bold/italic/code/links, nested lists, code blocks, quotes,
+rules and pipe tables. Rendering is CPU-bound, so PdfRenderer runs it on a bounded
+process pool and the event loop only waits for the bytes
+"""
+import asyncio
+import functools
+import html
+import io
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when the layout changes, so cached PDFs are rendered again
+LAYOUT_VERSION = 1
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+RULE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+INLINE_CODE = re.compile(r"`([^`]+)`")
+LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+BARE_URL = re.compile(r"https?://[^\s<>\"]+[^\s<>\".,;:!?)\]]")
+BOLD = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+ITALIC = re.compile(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])|(?<![\w_])_(?=\S)(.+?)(?<=\S)_(?![\w_])")
+PLACEHOLDER = re.compile("\x00(\\d+)\x00")
+
+
+@functools.lru_cache(maxsize=None)
+def get_styles():
+    """The stylesheet, built once per process instead of on every render"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle("Body", parent=styles["Normal"], fontSize=10.5, leading=14.5, spaceAfter=6))
+    styles.add(ParagraphStyle("ListBody", parent=styles["Body"], spaceAfter=2))
+    styles.add(ParagraphStyle("Quote", parent=styles["Body"], leftIndent=14, textColor=colors.HexColor("#444444"),
+                              fontName="Helvetica-Oblique"))
+    styles.add(ParagraphStyle("TableCell", parent=styles["Body"], fontSize=9, leading=11.5, spaceAfter=0))
+    styles.add(ParagraphStyle("CodeBlock", parent=styles["Code"], fontSize=8.5, leading=10.5,
+                              backColor=colors.HexColor("#f4f4f4"), borderPadding=4, spaceAfter=8))
+    return styles
+
+
+def inline_markup(text: str) -> str:
+    """
+    Convert inline markdown to ReportLab paragraph markup
+
+    Everything is escaped first, so "<", ">" and "&" in generated text can't break the
+    paragraph parser; code spans and links are set aside so their contents aren't
+    formatted again.
+    """
+    kept = []
+
+    def keep(markup: str) -> str:
+        kept.append(markup)
+        return f"\x00{len(kept) - 1}\x00"
+
+    text = INLINE_CODE.sub(lambda m: keep(f'<font face="Courier">{html.escape(m.group(1), quote=False)}</font>'), text)
+    text = html.escape(text, quote=False)
+    text = LINK.sub(lambda m: keep(f'<link href="{m.group(2)}" color="blue">{m.group(1)}</link>'), text)
+    text = BARE_URL.sub(lambda m: keep(f'<link href="{m.group(0)}" color="blue">{m.group(0)}</link>'), text)
+    text = BOLD.sub(lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    text = ITALIC.sub(lambda m: f"<i>{m.group(1) or m.group(2)}</i>", text)
+    while PLACEHOLDER.search(text):
+        text = PLACEHOLDER.sub(lambda m: kept[int(m.group(1))], text)
+    return text
+
+
+def _paragraph(text: str, style):
+    """A Paragraph of inline markdown, falling back to plain text if the markup doesn't parse"""
+    from reportlab.platypus import Paragraph
+    try:
+        return Paragraph(inline_markup(text), style)
+    except ValueError:
+        return Paragraph(html.escape(text, quote=False), style)
+
+
+def _split_row(line: str) -> list:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table(rows: list, styles, width: float):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    columns = max(len(row) for row in rows)
+    cells = [[_paragraph(row[i] if i < len(row) else "", styles["TableCell"]) for i in range(columns)]
+             for row in rows]
+    table = Table(cells, colWidths=[width / columns] * columns, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#bbbbbb")),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    return table
+
+
+def _list(items: list, styles):
+    """A (nested) ListFlowable from (indent, ordered, text) items, shallowest first"""
+    from reportlab.platypus import ListFlowable, ListItem
+
+    base = items[0][0]
+    entries = []
+    i = 0
+    while i < len(items):
+        _, _, text = items[i]
+        j = i + 1
+        while j < len(items) and items[j][0] > base:
+            j += 1
+        content = [_paragraph(text, styles["ListBody"])]
+        if j > i + 1:
+            content.append(_list(items[i + 1:j], styles))
+        entries.append(ListItem(content))
+        i = j
+    ordered = items[0][1]
+    return ListFlowable(entries, bulletType="1" if ordered else "bullet", leftIndent=16,
+                        bulletFontSize=9 if ordered else 6, spaceAfter=6)
+
+
+def markdown_to_flowables(markdown: str, styles=None, width: float = 468) -> list:
+    """
+    Parse markdown into ReportLab flowables
+
+    Args:
+        markdown: The document
+        styles: Stylesheet (default: get_styles())
+        width: Frame width in points, for table columns
+
+    Returns:
+        list: Flowables for SimpleDocTemplate.build()
+    """
+    from reportlab.platypus import HRFlowable, Preformatted
+
+    styles = styles or get_styles()
+    lines = markdown.replace("\r\n", "\n").split("\n")
+    flowables = []
+    paragraph = []
+
+    def end_paragraph():
+        if paragraph:
+            flowables.append(_paragraph(" ".join(paragraph), styles["Body"]))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            end_paragraph()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            flowables.append(Preformatted("\n".join(code), styles["CodeBlock"], maxLineLength=95, newLineChars=""))
+            i += 1
+            continue
+
+        heading = HEADING.match(line)
+        if heading:
+            end_paragraph()
+            flowables.append(_paragraph(heading.group(2), styles[f"Heading{len(heading.group(1))}"]))
+            i += 1
+            continue
+
+        if RULE.match(line):
+            end_paragraph()
+            flowables.append(HRFlowable(width="100%", thickness=0.5, spaceBefore=4, spaceAfter=8))
+            i += 1
+            continue
+
+        if stripped.startswith("|") and i + 1 < len(lines) and TABLE_SEPARATOR.match(lines[i + 1]):
+            end_paragraph()
+            rows = [_split_row(line)]
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_split_row(lines[i]))
+                i += 1
+            flowables.append(_table(rows, styles, width))
+            continue
+
+        if LIST_ITEM.match(line):
+            end_paragraph()
+            items = []
+            while i < len(lines):
+                match = LIST_ITEM.match(lines[i])
+                if match:
+                    indent, marker, text = match.groups()
+                    depth, ordered = len(indent.expandtabs(4)), marker[0].isdigit()
+                    if items and depth <= items[0][0] and ordered != items[0][1]:
+                        break  # a numbered list right after a bulleted one (or vice versa) is a new list
+                    items.append((depth, ordered, text))
+                elif lines[i].strip() and lines[i][:1].isspace() and items:
+                    items[-1] = items[-1][:2] + (f"{items[-1][2]} {lines[i].strip()}",)
+                elif not lines[i].strip() and i + 1 < len(lines) and LIST_ITEM.match(lines[i + 1]):
+                    pass  # a blank line between items of a loose list
+                else:
+                    break
+                i += 1
+            flowables.append(_list(items, styles))
+            continue
+
+        if stripped.startswith(">"):
+            end_paragraph()
+            quote = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quote.append(lines[i].strip()[1:].strip())
+                i += 1
+            flowables.append(_paragraph(" ".join(quote), styles["Quote"]))
+            continue
+
+        if stripped:
+            paragraph.append(stripped)
+        else:
+            end_paragraph()
+        i += 1
+
+    end_paragraph()
+    return flowables
+
+
+def _page_number(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, doc.bottomMargin / 2, str(doc.page))
+    canvas.restoreState()
+
+
+def render_pdf(markdown: str, title: str = None) -> bytes:
+    """
+    Render markdown as a letter-size PDF
+
+    Args:
+        markdown: The document
+        title: Shown above the document and set as the PDF title
+
+    Returns:
+        bytes: The PDF
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    styles = get_styles()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, title=title or "", leftMargin=54, rightMargin=54,
+                            topMargin=54, bottomMargin=54)
+    flowables = markdown_to_flowables(markdown, styles, doc.width)
+    if title:
+        flowables.insert(0, _paragraph(title, styles["Title"]))
+    doc.build(flowables, onFirstPage=_page_number, onLaterPages=_page_number)
+    return buffer.getvalue()
+
+
+class PdfRenderer:
+    """Runs render_pdf() on a bounded process pool, started on first use"""
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: PDFs rendered at once, across all requests; more are queued
+        """
+        self.max_workers = max_workers
+        self.executor = None
+
+    async def render(self, markdown: str, title: str = None) -> bytes:
+        """Render off the event loop"""
+        if self.executor is None:
+            # spawn, not fork: the server process has threads (thread pools, cache writer)
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, render_pdf, markdown, title)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
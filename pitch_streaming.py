@@ -0,0 +1,203 @@
+"""
+Streaming pitch pipeline
+The pitch transcript is cut into sentences while the LLM is still writing it. Each
+sentence goes to text-to-speech as soon as it is complete, and the audio is streamed
+back in sentence order, so playback can start once the first sentence is spoken
+instead of after the whole transcript and the whole synthesis.
+split_sentences()/pcm_to_wav() do the same cut on finished text and stitch separately
+synthesized sentences back into one recording
+"""
+import asyncio
+import io
+import re
+import threading
+import wave
+
+# Tokens ending in a period that don't end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "inc", "ltd", "co",
+    "corp", "no", "approx", "e.g", "i.e", "u.s", "u.k", "u.n",
+}
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a paragraph break (headings and list items often have no period)
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)|\n\s*\n")
+
+# Markdown the voice would read out literally
+MARKDOWN_NOISE = re.compile(r"^\s{0,3}(?:#{1,6}|[-*+]|\d+\.)\s+|\*\*|__|[*_`]", re.MULTILINE)
+
+
+def speakable(text: str) -> str:
+    """Strip markdown markers (headings, bullets, emphasis) and collapse whitespace"""
+    return " ".join(MARKDOWN_NOISE.sub("", text).split())
+
+
+class SentenceSplitter:
+    """Incrementally cuts streamed text into sentences"""
+
+    def __init__(self, min_chars: int = 20):
+        """
+        Args:
+            min_chars: Shorter sentences are merged into the next one, so the TTS
+                provider isn't called for a lone "Hi." and the voice keeps its flow
+        """
+        self.min_chars = min_chars
+        self.buffer = ""
+        self.pending = ""
+
+    def feed(self, text: str) -> list:
+        """
+        Add streamed text
+
+        Returns:
+            list: Sentences completed by this text (possibly none)
+        """
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            if match.group().startswith(".") and self._is_abbreviation(self.buffer[start:match.start()]):
+                continue
+            sentences.extend(self._emit(self.buffer[start:match.end()]))
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        """
+        End of stream
+
+        Returns:
+            list: Whatever text is left, as a final sentence
+        """
+        sentences = self._emit(self.buffer, final=True)
+        self.buffer = ""
+        return sentences
+
+    def _emit(self, text: str, final: bool = False) -> list:
+        sentence = speakable(f"{self.pending}\n{text}")
+        if not sentence:
+            return []
+        if len(sentence) < self.min_chars and not final:
+            self.pending = sentence
+            return []
+        self.pending = ""
+        return [sentence]
+
+    @staticmethod
+    def _is_abbreviation(text: str) -> bool:
+        """Whether the text before a period ends in an abbreviation or an initial"""
+        words = text.split()
+        if not words:
+            return False
+        word = words[-1].lower().lstrip("\"'(")
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def split_sentences(text: str, min_chars: int = 20) -> list:
+    """Cut finished text into the sentences SentenceSplitter would produce"""
+    splitter = SentenceSplitter(min_chars=min_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+def pcm_to_wav(chunks, sample_rate: int, pause_ms: int = 150) -> bytes:
+    """
+    Stitch raw 16-bit mono PCM chunks into one WAV file
+
+    Args:
+        chunks: PCM audio per sentence, in order
+        sample_rate: Sample rate of the PCM (e.g. 24000 for ElevenLabs' pcm_24000)
+        pause_ms: Silence inserted between sentences, which are synthesized without
+            their neighbours and would otherwise run into each other
+
+    Returns:
+        bytes: The WAV file (RIFF header with the correct data length)
+    """
+    pause = b"\x00\x00" * (sample_rate * pause_ms // 1000)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for i, chunk in enumerate(chunks):
+            if i:
+                wav.writeframes(pause)
+            wav.writeframes(chunk[:len(chunk) - len(chunk) % 2])
+    return buffer.getvalue()
+
+
+async def stream_pitch_audio(text_deltas, synthesize, max_concurrency: int = 3, context_chars: int = 300):
+    """
+    Speak streamed text sentence by sentence, yielding audio in sentence order
+
+    The text stream is consumed on a worker thread; every completed sentence is
+    synthesized right away (up to max_concurrency at once) while later sentences are
+    still being generated.
+
+    Args:
+        text_deltas: Iterator of text pieces (blocking; e.g. a provider token stream).
+            Closed early if the consumer stops listening
+        synthesize: synthesize(sentence, previous_text) -> bytes, called on worker threads.
+            previous_text is the text spoken so far, for consistent prosody
+        max_concurrency: Sentences synthesized at once
+        context_chars: How much preceding text is passed as previous_text
+
+    Yields:
+        bytes: One sentence's audio at a time
+
+    Raises:
+        Exception: Whatever the text stream or a synthesis raised
+    """
+    loop = asyncio.get_running_loop()
+    ordered = asyncio.Queue()  # synthesis tasks in sentence order; an exception or None ends it
+    semaphore = asyncio.Semaphore(max_concurrency)
+    stop = threading.Event()
+    spoken = []
+
+    async def speak(sentence: str, previous_text: str) -> bytes:
+        async with semaphore:
+            return await asyncio.to_thread(synthesize, sentence, previous_text)
+
+    def schedule(sentence: str):
+        if stop.is_set():
+            return
+        previous_text = " ".join(spoken)[-context_chars:]
+        spoken.append(sentence)
+        ordered.put_nowait(asyncio.ensure_future(speak(sentence, previous_text)))
+
+    def read_text():
+        splitter = SentenceSplitter()
+        end = None
+        try:
+            for delta in text_deltas:
+                if stop.is_set():
+                    break
+                for sentence in splitter.feed(delta):
+                    loop.call_soon_threadsafe(schedule, sentence)
+            else:
+                for sentence in splitter.flush():
+                    loop.call_soon_threadsafe(schedule, sentence)
+        except Exception as e:
+            end = e
+        finally:
+            close = getattr(text_deltas, "close", None)
+            if close:
+                close()
+            loop.call_soon_threadsafe(ordered.put_nowait, end)
+
+    # Not awaited on the way out: a blocked provider read would hold up the disconnect
+    reader = asyncio.ensure_future(asyncio.to_thread(read_text))
+    try:
+        while True:
+            item = await ordered.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield await item
+    finally:
+        stop.set()
+        while not ordered.empty():
+            item = ordered.get_nowait()
+            if isinstance(item, asyncio.Future):
+                item.cancel()
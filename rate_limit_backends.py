@@ -0,0 +1,190 @@
+"""
+Storage backends for RateLimiter
+Each backend atomically reserves the next call slot for an endpoint, so callers
+in other threads, processes or hosts queue up behind each other instead of all
+seeing the same "last call" and firing at once
+
+    memory              per-process dict (one worker only)
+    sqlite:///path.db   shared by every process on one host
+    redis://host:port/0 shared across hosts (Redis or redis_protocol.py stand-in)
+
+A reservation may allow a burst: the stored value is the slot the latest call would
+have had with every call one interval apart, and a call with burst=N may run up to
+N - 1 intervals ahead of it. Idle time refills the budget one call per interval (a
+token bucket in one number), and burst=1 is the plain one-call-per-interval limit
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from redis_protocol import RedisClient, WatchConflict
+
+
+def next_slot(last, now: float, min_interval: float, burst: int = 1) -> tuple:
+    """
+    The slot for a new call
+
+    Args:
+        last: Stored value for the endpoint (None if it has no calls yet)
+        now: Current time (epoch seconds)
+        min_interval: Minimum seconds between calls, on average
+        burst: Calls that may go through back to back after the endpoint has been idle
+
+    Returns:
+        tuple: (when the call may start, value to store)
+    """
+    due = now if last is None else max(now, last + min_interval)
+    return max(now, due - (burst - 1) * min_interval), due
+
+
+class MemoryRateLimitBackend:
+    """Per-process slots (the original RateLimiter behaviour)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.last_call_time = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, endpoint: str, min_interval: float, burst: int = 1) -> float:
+        """
+        Claim the next slot for endpoint
+
+        Args:
+            endpoint: Rate-limit key
+            min_interval: Minimum seconds between slots
+            burst: Calls that may go through back to back after the endpoint has been idle
+
+        Returns:
+            Seconds the caller must wait before its slot starts
+        """
+        with self._lock:
+            now = time.time()
+            slot, self.last_call_time[endpoint] = next_slot(self.last_call_time.get(endpoint), now, min_interval, burst)
+        return slot - now
+
+    def last_call(self, endpoint: str):
+        """Latest reserved slot (epoch seconds, as if calls were one interval apart) or None"""
+        return self.last_call_time.get(endpoint)
+
+
+class SQLiteRateLimitBackend:
+    """
+    Slots kept in a SQLite file; BEGIN IMMEDIATE serializes reservations across
+    processes on the same host
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file (created if missing); must be on a local disk
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (endpoint TEXT PRIMARY KEY, last_call REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, endpoint: str, min_interval: float, burst: int = 1) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT last_call FROM rate_limit WHERE endpoint = ?", (endpoint,)).fetchone()
+            slot, due = next_slot(row[0] if row else None, now, min_interval, burst)
+            conn.execute(
+                "INSERT INTO rate_limit (endpoint, last_call) VALUES (?, ?) "
+                "ON CONFLICT(endpoint) DO UPDATE SET last_call = excluded.last_call",
+                (endpoint, due),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return slot - now
+
+    def last_call(self, endpoint: str):
+        row = self._conn().execute("SELECT last_call FROM rate_limit WHERE endpoint = ?", (endpoint,)).fetchone()
+        return row[0] if row else None
+
+
+class RedisRateLimitBackend:
+    """
+    Slots kept in a Redis-protocol server, reserved with WATCH/MULTI/EXEC
+
+    Keys expire shortly after their slot has passed, so idle endpoints don't
+    accumulate. Hosts should keep their clocks in sync (NTP): slot times are
+    wall-clock seconds
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "ratelimit:", max_retries: int = 100):
+        """
+        Args:
+            url: redis://host:port/db
+            prefix: Key prefix for rate-limit slots
+            max_retries: Attempts before giving up when other callers keep winning the race
+        """
+        self.client = RedisClient(url)
+        self.prefix = prefix
+        self.max_retries = max_retries
+
+    def reserve(self, endpoint: str, min_interval: float, burst: int = 1) -> float:
+        key = f"{self.prefix}{endpoint}"
+        for _ in range(self.max_retries):
+            reservation = {}
+
+            def build(client):
+                last = client.execute("GET", key)
+                now = time.time()
+                slot, due = next_slot(float(last) if last is not None else None, now, min_interval, burst)
+                reservation.update(now=now, slot=slot)
+                ttl_ms = int((due - now + min_interval) * 1000) + 1000
+                return [("SET", key, repr(due), "PX", ttl_ms)]
+
+            try:
+                self.client.transaction([key], build)
+            except WatchConflict:
+                continue
+            return reservation["slot"] - reservation["now"]
+        raise RuntimeError(f"Could not reserve a rate-limit slot for {endpoint} after {self.max_retries} attempts")
+
+    def last_call(self, endpoint: str):
+        last = self.client.execute("GET", f"{self.prefix}{endpoint}")
+        return float(last) if last is not None else None
+
+
+def create_rate_limit_backend(spec: str = None):
+    """
+    Build a backend from a spec string (RATE_LIMIT_BACKEND)
+
+    Args:
+        spec: "memory", "sqlite:///relative/file.db", "sqlite:////absolute/file.db"
+            or "redis://host:port/db"
+
+    Raises:
+        ValueError: For an unknown scheme
+    """
+    spec = (spec or "memory").strip()
+    if spec == "memory":
+        return MemoryRateLimitBackend()
+    if spec.startswith("sqlite://"):
+        # Same convention as SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        return SQLiteRateLimitBackend(spec[len("sqlite:///"):])
+    if spec.startswith("redis://"):
+        return RedisRateLimitBackend(spec)
+    raise ValueError(f"Unknown rate-limit backend: {spec!r} (use memory, sqlite:///path or redis://host:port/db)")
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Minimal Redis-protocol (RESP2) client and a local stand-in server
+The client speaks the real protocol, so it works against Redis, Valkey, KeyDB,
+etc. for multi-host deployments. The stand-in implements the subset of commands
+the app uses (strings with TTLs, WATCH/MULTI/EXEC, SCAN) for local development,
+tests and benchmarks without installing Redis
+
+Usage:
+    python redis_protocol.py serve --port 6399
+    CACHE_BACKEND=redis://127.0.0.1:6399/0 RATE_LIMIT_BACKEND=redis://127.0.0.1:6399/0 uvicorn main:app --workers 4
+"""
+import argparse
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RedisError(Exception):
+    """Error reply from the server, or a connection failure"""
+
+
+class WatchConflict(Exception):
+    """EXEC aborted because a WATCHed key changed"""
+
+
+def _encode_command(args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, float):
+            data = repr(arg).encode()
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class _Reader:
+    """Buffered RESP reader over a socket"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def _fill(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        self.buffer.extend(chunk)
+
+    def line(self) -> bytes:
+        while True:
+            end = self.buffer.find(b"\r\n")
+            if end >= 0:
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 2]
+                return line
+            self._fill()
+
+    def exact(self, n: int) -> bytes:
+        while len(self.buffer) < n + 2:
+            self._fill()
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n + 2]
+        return data
+
+    def reply(self):
+        line = self.line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else self.exact(length)
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self.reply() for _ in range(length)]
+        raise RedisError(f"Protocol error: unexpected reply {line[:40]!r}")
+
+
+class _Connection:
+    """One socket to the server; not thread-safe, borrowed from RedisClient's pool"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = _Reader(self.sock)
+
+    def roundtrip(self, commands: list) -> list:
+        self.sock.sendall(b"".join(_encode_command(command) for command in commands))
+        return [self.reader.reply() for _ in commands]
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class _PinnedConnection:
+    """Connection held for the duration of a transaction"""
+
+    def __init__(self, client, conn: _Connection):
+        self._client = client
+        self._conn = conn
+
+    def execute_many(self, commands: list, raise_on_error: bool = True) -> list:
+        return self._client._run(self._conn, commands, raise_on_error)
+
+    def execute(self, *args):
+        return self.execute_many([args])[0]
+
+
+class RedisClient:
+    """
+    Thread-safe client with a small connection pool
+
+    Replies are returned as bytes / int / str / list / None; error replies raise
+    RedisError. Connections that fail are dropped and reopened on the next call
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout: float = 5.0, max_idle: int = 8):
+        """
+        Args:
+            url: redis://[:password@]host:port/db
+            timeout: Socket connect/read timeout in seconds
+            max_idle: Idle connections kept open for reuse
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = []
+        self._pool_lock = threading.Lock()
+
+    def _acquire(self) -> _Connection:
+        with self._pool_lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            conn = _Connection(self.host, self.port, self.timeout)
+        except OSError as e:
+            raise RedisError(f"Connection to {self.host}:{self.port} failed: {e}") from e
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            self._run(conn, setup, raise_on_error=True)
+        return conn
+
+    def _release(self, conn: _Connection):
+        with self._pool_lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _run(self, conn: _Connection, commands: list, raise_on_error: bool) -> list:
+        try:
+            replies = conn.roundtrip(commands)
+        except (OSError, ConnectionError) as e:
+            conn.close()
+            conn.broken = True
+            raise RedisError(f"Connection to {self.host}:{self.port} failed: {e}") from e
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+        return replies
+
+    def execute_many(self, commands: list, raise_on_error: bool = True) -> list:
+        """
+        Send several commands in one write and read all replies (pipelining)
+
+        Args:
+            commands: List of argument tuples, e.g. [("GET", "a"), ("SET", "b", "1")]
+            raise_on_error: Raise the first error reply instead of returning it
+        """
+        conn = self._acquire()
+        try:
+            return self._run(conn, commands, raise_on_error)
+        finally:
+            if not getattr(conn, "broken", False):
+                self._release(conn)
+
+    def execute(self, *args):
+        """Run one command and return its reply"""
+        return self.execute_many([args])[0]
+
+    def transaction(self, watch_keys: list, build_commands):
+        """
+        Optimistic transaction: WATCH keys, let build_commands read them and return
+        the commands to run, then MULTI/EXEC on the same connection
+
+        Args:
+            watch_keys: Keys whose modification aborts the transaction
+            build_commands: Called with a connection-bound executor (execute /
+                execute_many); returns a list of commands
+
+        Returns:
+            List of replies from EXEC
+
+        Raises:
+            WatchConflict: If a watched key changed before EXEC
+        """
+        conn = self._acquire()
+        pinned = _PinnedConnection(self, conn)
+        try:
+            pinned.execute("WATCH", *watch_keys)
+            try:
+                commands = build_commands(pinned)
+            except BaseException:
+                pinned.execute("UNWATCH")
+                raise
+            replies = pinned.execute_many([("MULTI",), *commands, ("EXEC",)])
+        finally:
+            if not getattr(conn, "broken", False):
+                self._release(conn)
+        if replies[-1] is None:
+            raise WatchConflict()
+        return replies[-1]
+
+    def close(self):
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# Local stand-in server
+
+class _Store:
+    """Key space of the stand-in: bytes values with optional expiry and a version per key"""
+
+    def __init__(self):
+        self.data = {}      # key -> (value, expires_at or None)
+        self.versions = {}  # key -> write counter, for WATCH
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def _alive(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            self._touch(key)
+            return None
+        return entry
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _write(self, key, value, expires_at=None):
+        self.data[key] = (value, expires_at)
+        self._touch(key)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One client connection of the stand-in server"""
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = _Reader(self.request)
+        self.store = self.server.store
+        self.watched = {}
+        self.queued = None
+        self.pending = []
+
+    def handle(self):
+        while True:
+            try:
+                command = self.reader.reply()
+            except (ConnectionError, OSError):
+                return
+            if not isinstance(command, list) or not command:
+                self._send(RedisError("ERR Protocol error: expected array of bulk strings"))
+                continue
+            name = command[0].decode().upper()
+            args = command[1:]
+            if name == "QUIT":
+                self._send("OK")
+                return
+            self._send(self._dispatch(name, args))
+
+    def _send(self, reply):
+        # Pipelined commands already buffered get their replies in one write
+        self.pending.append(self._encode(reply))
+        if not self.reader.buffer:
+            self.wfile.write(b"".join(self.pending))
+            self.pending = []
+
+    def _encode(self, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, RedisError):
+            return f"-{reply}\r\n".encode()
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        if isinstance(reply, bool):
+            return b":%d\r\n" % int(reply)
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        if isinstance(reply, _NullArray):
+            return b"*-1\r\n"
+        return b"*%d\r\n" % len(reply) + b"".join(self._encode(item) for item in reply)
+
+    def _dispatch(self, name, args):
+        if name == "MULTI":
+            if self.queued is not None:
+                return RedisError("ERR MULTI calls can not be nested")
+            self.queued = []
+            return "OK"
+        if name == "DISCARD":
+            self.queued = None
+            self.watched = {}
+            return "OK"
+        if name == "EXEC":
+            return self._exec()
+        if self.queued is not None and name not in ("WATCH",):
+            self.queued.append((name, args))
+            return "QUEUED"
+        if name == "WATCH":
+            with self.store.lock:
+                for key in args:
+                    self.store._alive(key)
+                    self.watched[key] = self.store.versions.get(key, 0)
+            return "OK"
+        if name == "UNWATCH":
+            self.watched = {}
+            return "OK"
+        with self.store.lock:
+            return self._run(name, args)
+
+    def _exec(self):
+        if self.queued is None:
+            return RedisError("ERR EXEC without MULTI")
+        queued, self.queued = self.queued, None
+        watched, self.watched = self.watched, {}
+        with self.store.lock:
+            for key, version in watched.items():
+                self.store._alive(key)
+                if self.store.versions.get(key, 0) != version:
+                    return _NullArray()
+            return [self._run(name, args) for name, args in queued]
+
+    def _run(self, name, args):
+        """Execute one command; the caller holds the store lock"""
+        store = self.store
+        store.commands += 1
+        handler = getattr(self, f"_cmd_{name.lower()}", None)
+        if handler is None:
+            return RedisError(f"ERR unknown command '{name}'")
+        try:
+            return handler(store, args)
+        except (IndexError, ValueError):
+            return RedisError(f"ERR wrong number or type of arguments for '{name.lower()}'")
+
+    # Commands
+
+    def _cmd_ping(self, store, args):
+        return args[0] if args else "PONG"
+
+    def _cmd_echo(self, store, args):
+        return args[0]
+
+    def _cmd_select(self, store, args):
+        return "OK"
+
+    def _cmd_auth(self, store, args):
+        return "OK"
+
+    def _cmd_time(self, store, args):
+        now = time.time()
+        return [str(int(now)).encode(), str(int((now % 1) * 1_000_000)).encode()]
+
+    def _cmd_get(self, store, args):
+        entry = store._alive(args[0])
+        return entry[0] if entry else None
+
+    def _cmd_mget(self, store, args):
+        return [self._cmd_get(store, [key]) for key in args]
+
+    def _cmd_set(self, store, args):
+        key, value = args[0], args[1]
+        expires_at, nx, xx, keep_ttl = None, False, False, False
+        options = [arg.decode().upper() for arg in args[2:]]
+        i = 0
+        while i < len(options):
+            option = options[i]
+            if option in ("EX", "PX"):
+                amount = float(options[i + 1])
+                expires_at = time.time() + (amount if option == "EX" else amount / 1000)
+                i += 1
+            elif option == "NX":
+                nx = True
+            elif option == "XX":
+                xx = True
+            elif option == "KEEPTTL":
+                keep_ttl = True
+            else:
+                return RedisError("ERR syntax error")
+            i += 1
+        existing = store._alive(key)
+        if (nx and existing) or (xx and not existing):
+            return None
+        if keep_ttl and existing:
+            expires_at = existing[1]
+        store._write(key, value, expires_at)
+        return "OK"
+
+    def _cmd_del(self, store, args):
+        removed = 0
+        for key in args:
+            if store._alive(key):
+                del store.data[key]
+                store._touch(key)
+                removed += 1
+        return removed
+
+    def _cmd_exists(self, store, args):
+        return sum(1 for key in args if store._alive(key))
+
+    def _cmd_incrby(self, store, args):
+        entry = store._alive(args[0])
+        value = int(entry[0]) + int(args[1]) if entry else int(args[1])
+        store._write(args[0], str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def _cmd_incr(self, store, args):
+        return self._cmd_incrby(store, [args[0], b"1"])
+
+    def _cmd_expire(self, store, args):
+        return self._cmd_pexpire(store, [args[0], str(float(args[1]) * 1000).encode()])
+
+    def _cmd_pexpire(self, store, args):
+        entry = store._alive(args[0])
+        if not entry:
+            return 0
+        store._write(args[0], entry[0], time.time() + float(args[1]) / 1000)
+        return 1
+
+    def _cmd_pttl(self, store, args):
+        entry = store._alive(args[0])
+        if not entry:
+            return -2
+        if entry[1] is None:
+            return -1
+        return int((entry[1] - time.time()) * 1000)
+
+    def _cmd_ttl(self, store, args):
+        ttl = self._cmd_pttl(store, args)
+        return ttl if ttl < 0 else ttl // 1000
+
+    def _cmd_strlen(self, store, args):
+        entry = store._alive(args[0])
+        return len(entry[0]) if entry else 0
+
+    def _cmd_keys(self, store, args):
+        pattern = args[0].decode()
+        return [key for key in list(store.data) if store._alive(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+
+    def _cmd_scan(self, store, args):
+        # The whole key space fits in one page for a stand-in
+        pattern = "*"
+        options = [arg.decode() for arg in args[1:]]
+        for i, option in enumerate(options):
+            if option.upper() == "MATCH":
+                pattern = options[i + 1]
+        return [b"0", self._cmd_keys(store, [pattern.encode()])]
+
+    def _cmd_dbsize(self, store, args):
+        return sum(1 for key in list(store.data) if store._alive(key))
+
+    def _cmd_flushdb(self, store, args):
+        for key in list(store.data):
+            store._touch(key)
+        store.data.clear()
+        return "OK"
+
+    _cmd_flushall = _cmd_flushdb
+
+    def _cmd_info(self, store, args):
+        used = sum(len(key) + len(value) for key, (value, _) in store.data.items())
+        return (f"# Server\r\nredis_version:stand-in\r\n"
+                f"# Memory\r\nused_memory:{used}\r\n"
+                f"# Stats\r\ntotal_commands_processed:{store.commands}\r\n").encode()
+
+
+class _NullArray:
+    """Marker for the *-1 reply of an aborted EXEC"""
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RedisStandIn:
+    """
+    In-process Redis-protocol server for tests, benchmarks and single-host setups
+
+    Usage:
+        server = RedisStandIn(port=0).start()
+        client = RedisClient(server.url)
+        ...
+        server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6399):
+        self._server = _Server((host, port), _Handler)
+        self._server.store = _Store()
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="redis-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Run the stand-in server in the foreground")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args()
+
+    server = RedisStandIn(args.host, args.port)
+    print(f"🧱 Redis-protocol stand-in listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
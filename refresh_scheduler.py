@@ -0,0 +1,137 @@
+"""
+Refresh-ahead scheduler for hot cache entries
+Regenerates frequently requested responses shortly before they expire so that
+popular ideas never fall out of the cache on the user's critical path
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class RefreshScheduler:
+    """Background thread that refreshes hot ResponseCache entries before expiry"""
+
+    def __init__(self, cache, refresh_fn, min_hits_per_hour=3, refresh_ahead_minutes=30,
+                 check_interval_seconds=60, max_refreshes_per_interval=2):
+        """
+        Initialize the scheduler
+
+        Args:
+            cache: ResponseCache instance to watch
+            refresh_fn: Callable(endpoint, data) -> bool that regenerates and stores
+                an entry. Returns False when the refresh was skipped (e.g. no
+                provider budget available right now)
+            min_hits_per_hour: Hit rate above which an entry is considered hot
+            refresh_ahead_minutes: How long before expiry a hot entry is refreshed
+            check_interval_seconds: Seconds between scheduler passes
+            max_refreshes_per_interval: Upper bound on refreshes per pass, so the
+                scheduler never eats the provider rate budget
+        """
+        self.cache = cache
+        self.refresh_fn = refresh_fn
+        self.min_hits_per_hour = min_hits_per_hour
+        self.refresh_ahead = timedelta(minutes=refresh_ahead_minutes)
+        self.check_interval = check_interval_seconds
+        self.max_refreshes_per_interval = max_refreshes_per_interval
+
+        # cache_key -> expiry of the entry that was replaced by a refresh
+        self._refreshed = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            'passes': 0,
+            'refreshes_attempted': 0,
+            'refreshes_succeeded': 0,
+            'refreshes_skipped': 0,
+            'refreshes_failed': 0,
+            'misses_prevented': 0,
+            'last_pass': None,
+        }
+
+    def start(self):
+        """Start the background refresh thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-refresh", daemon=True)
+        self._thread.start()
+        print(f"🔁 Cache refresh-ahead scheduler started "
+              f"(>= {self.min_hits_per_hour} hits/h, {self.refresh_ahead} ahead)")
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ Cache refresh pass failed: {e}")
+
+    def _count_prevented_misses(self):
+        """
+        An entry refreshed before expiry that is hit after its old expiry time
+        would have been a miss without the scheduler
+        """
+        now = datetime.now()
+        for cache_key, old_expires_at in list(self._refreshed.items()):
+            last_hit = self.cache.get_last_hit(cache_key)
+            if last_hit is not None and datetime.fromtimestamp(last_hit) > old_expires_at:
+                self.stats['misses_prevented'] += 1
+                del self._refreshed[cache_key]
+            elif now - old_expires_at > self.cache.ttl:
+                # Nobody came back for it; stop watching
+                del self._refreshed[cache_key]
+
+    def run_once(self):
+        """
+        Run a single scheduler pass
+
+        Returns:
+            Number of entries refreshed during this pass
+        """
+        self.stats['passes'] += 1
+        self.stats['last_pass'] = datetime.now().isoformat()
+        self._count_prevented_misses()
+
+        hot_entries = self.cache.get_hot_entries(self.min_hits_per_hour, self.refresh_ahead)
+        refreshed = 0
+
+        for entry in hot_entries:
+            if refreshed >= self.max_refreshes_per_interval:
+                break
+            if entry['expires_at'] <= datetime.now():
+                # Already expired - cold path will regenerate it on demand
+                continue
+
+            self.stats['refreshes_attempted'] += 1
+            start_time = time.time()
+            try:
+                if not self.refresh_fn(entry['endpoint'], entry['data']):
+                    self.stats['refreshes_skipped'] += 1
+                    continue
+            except Exception as e:
+                self.stats['refreshes_failed'] += 1
+                print(f"❌ Refresh-ahead failed for {entry['endpoint']}: {e}")
+                continue
+
+            refreshed += 1
+            self.stats['refreshes_succeeded'] += 1
+            self._refreshed[entry['cache_key']] = entry['expires_at']
+            print(f"🔁 Refreshed hot entry for {entry['endpoint']} "
+                  f"({entry['hits_per_hour']:.1f} hits/h, {time.time() - start_time:.2f}s)")
+
+        return refreshed
+
+    def get_stats(self):
+        """Get scheduler statistics"""
+        return {
+            **self.stats,
+            'pending_verification': len(self._refreshed),
+            'running': bool(self._thread and self._thread.is_alive()),
+        }
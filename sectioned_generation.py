@@ -0,0 +1,235 @@
+"""
+Sectioned document generation
+Long documents (grant proposals) are generated as one provider call per section,
+run concurrently and assembled in order. Each section's prompt carries only the
+idea fields that section depends on, so its cache entry survives edits to the
+fields it doesn't use and a regenerate only redoes the affected sections.
+split_sections()/join_sections() take any generated document apart at its headings
+so single sections can be revised in place.
+"""
+import contextvars
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+IDEA_FIELDS = ("name", "mission", "goals", "targetMarket", "primaryProduct", "sdgs")
+
+
+class Section:
+    """One independently generated (and cached) part of a document"""
+
+    __slots__ = ("key", "title", "instruction", "fields")
+
+    def __init__(self, key: str, title: str, instruction: str, fields: tuple = IDEA_FIELDS):
+        """
+        Args:
+            key: Stable identifier, used in the section's cache namespace
+            title: Heading the section is assembled under
+            instruction: What to write, including an "about N words" length target
+            fields: Idea fields the section depends on ("name" is always included)
+        """
+        self.key = key
+        self.title = title
+        self.instruction = instruction
+        self.fields = fields if "name" in fields else ("name",) + tuple(fields)
+
+    def __repr__(self):
+        return f"Section({self.key!r})"
+
+
+GRANT_PROPOSAL_SYSTEM_PROMPT = (
+    "You are a helpful assistant, expert in writing grant proposals for non-profits. "
+    "Provide compelling, concise and accurate responses. Use a conversational yet professional tone, "
+    "incorporate storytelling elements, and emphasize the human impact of the work. Provide concrete "
+    "examples and data to support your claims, tailored to the goals and values of potential funders."
+)
+
+GRANT_PROPOSAL_SECTIONS = (
+    Section("executive_summary", "Executive Summary",
+            "Write a captivating executive summary that highlights the problem, the solution and its "
+            "potential impact, in about 150 words."),
+    Section("problem_statement", "Problem Statement",
+            "Write a clear problem statement with supporting data and real-world examples, in about 200 words.",
+            ("mission", "targetMarket", "sdgs")),
+    Section("solution", "Our Approach and Solution",
+            "Describe the organization's unique approach and proposed solution, in about 200 words.",
+            ("mission", "primaryProduct", "targetMarket")),
+    Section("goals", "Goals and Objectives",
+            "List specific, measurable goals and objectives, in about 150 words.",
+            ("mission", "goals")),
+    Section("implementation", "Implementation Plan",
+            "Write a detailed implementation plan with timeline and milestones, in about 200 words.",
+            ("goals", "primaryProduct", "targetMarket")),
+    Section("outcomes", "Expected Outcomes and Evaluation",
+            "Describe the expected outcomes and how success will be measured, in about 150 words.",
+            ("goals", "sdgs")),
+    Section("budget", "Budget",
+            "Give a realistic budget breakdown, in about 150 words.",
+            ("goals", "primaryProduct", "targetMarket")),
+    Section("team", "Team Qualifications",
+            "Describe the team's qualifications and relevant experience, in about 120 words.",
+            ("mission", "primaryProduct")),
+    Section("sustainability", "Sustainability Plan",
+            "Write a sustainability plan for long-term impact, in about 150 words.",
+            ("mission", "primaryProduct", "targetMarket")),
+    Section("conclusion", "Conclusion",
+            "Write a compelling conclusion that reinforces the urgency and importance of the project, "
+            "in about 100 words.",
+            ("mission", "goals", "sdgs")),
+)
+
+
+def section_messages(section: Section, idea: dict, document: str, system_prompt: str) -> list:
+    """
+    Chat messages generating one section
+
+    Args:
+        section: The section to write
+        idea: The idea (IdeaModel as a dict)
+        document: What the section belongs to (e.g. "grant proposal")
+        system_prompt: System message shared by all sections of the document
+
+    Returns:
+        list: Messages for make_openrouter_request
+    """
+    context = {field: idea[field] for field in section.fields if field in idea}
+    return [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": f"My non-profit idea: {json.dumps(context, sort_keys=True)}\n\n"
+                       f"Write only the \"{section.title}\" section of a {document} for it. {section.instruction} "
+                       f"Output markdown without the section heading.",
+        },
+    ]
+
+
+def revision_messages(title: str, body: str, idea: dict, document: str, system_prompt: str,
+                      instruction: str = None) -> list:
+    """
+    Chat messages revising one section of an existing document
+
+    Only the section itself and the idea are sent, not the rest of the document.
+
+    Args:
+        title: The section's title
+        body: The section's current markdown
+        idea: The (possibly updated) idea
+        document: What the section belongs to (e.g. "grant proposal")
+        system_prompt: The document's system message
+        instruction: The requested change (None = bring the section in line with the idea)
+
+    Returns:
+        list: Messages for make_openrouter_request
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": f"My non-profit idea: {json.dumps(idea, sort_keys=True)}\n\n"
+                       f"This is the \"{title}\" section of my {document}:\n\n{body.strip()}\n\n"
+                       f"Revise only this section. {instruction or 'Update it to match the idea above.'} "
+                       f"Keep its structure and length (about {max(len(body.split()), 20)} words) unless asked otherwise. "
+                       f"Output markdown without the section heading.",
+        },
+    ]
+
+
+def mentioned_values(idea: dict, fields) -> list:
+    """Strings (of 4+ characters) in the given idea fields, for finding sections that quote them"""
+    values = []
+    for field in fields:
+        value = idea.get(field)
+        items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else [value]
+        values.extend(str(item) for item in items if item is not None and len(str(item)) >= 4)
+    return values
+
+
+def assemble(sections, contents) -> str:
+    """Join section contents in order, each under a "## Title" heading"""
+    return "\n\n".join(f"## {section.title}\n\n{content.strip()}" for section, content in zip(sections, contents))
+
+
+class SectionedGenerator:
+    """Generates the sections of a document concurrently on a bounded thread pool"""
+
+    def __init__(self, max_concurrency: int = 5, name: str = "section"):
+        """
+        Args:
+            max_concurrency: Provider calls in flight at once, across all requests
+            name: Thread name prefix
+        """
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+
+    def generate(self, sections, generate_one) -> list:
+        """
+        Run generate_one(section) for every section and return the results in order
+
+        Each call runs in a copy of the caller's context, so Server-Timing phases,
+        traffic-capture cache outcomes and trace spans still land on the request.
+
+        Raises:
+            Exception: The first failing section's exception (in section order)
+        """
+        futures = [
+            self.executor.submit(contextvars.copy_context().run, generate_one, section)
+            for section in sections
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+HEADING = re.compile(r"^(#{1,3})[ \t]+(.+?)[ \t#]*$")
+
+
+def split_sections(markdown: str, titles=None):
+    """
+    Split a markdown document into revisable sections at its headings
+
+    Args:
+        markdown: The document
+        titles: Known section titles (documents built by assemble()); only "## <title>"
+            lines start a section. Without titles the shallowest heading level that
+            occurs more than once is used (or the only heading level present)
+
+    Returns:
+        tuple: (preamble, sections) where preamble is the text before the first
+        section and each section is a dict with "title", "heading" (the heading line)
+        and "body"; join_sections() reverses the split exactly
+    """
+    lines = markdown.splitlines(keepends=True)
+    headings = []
+    in_fence = False
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else HEADING.match(line.rstrip("\r\n"))
+        if match:
+            headings.append((i, len(match.group(1)), match.group(2).strip()))
+
+    if titles is not None:
+        wanted = set(titles)
+        starts = [(i, title) for i, level, title in headings if level == 2 and title in wanted]
+    else:
+        levels = sorted({level for _, level, _ in headings})
+        repeated = [level for level in levels if sum(1 for _, l, _ in headings if l == level) > 1]
+        level = (repeated or levels or [None])[0]
+        starts = [(i, title) for i, l, title in headings if l == level]
+
+    if not starts:
+        return markdown, []
+    preamble = "".join(lines[:starts[0][0]])
+    sections = []
+    for n, (i, title) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        sections.append({"title": title, "heading": lines[i], "body": "".join(lines[i + 1:end])})
+    return preamble, sections
+
+
+def join_sections(preamble: str, sections: list) -> str:
+    """Reassemble the output of split_sections()"""
+    return preamble + "".join(section["heading"] + section["body"] for section in sections)
@@ -0,0 +1,116 @@
+"""
+Per-request latency breakdown via the Server-Timing response header
+Instrumentation points record phases (cache lookup, rate-limit wait, provider
+attempts, citation search, TTS) into a request-scoped collector; the middleware
+renders them as a Server-Timing header and, on request, a JSON detail header
+"""
+import json
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# List of (name, description, duration_ms) for the request being served
+_current_phases = ContextVar("server_timing_phases", default=None)
+
+# Send this request header with value "json" to also get X-Server-Timing-Detail
+DETAIL_REQUEST_HEADER = b"x-server-timing"
+DETAIL_RESPONSE_HEADER = "X-Server-Timing-Detail"
+
+
+def record_phase(name: str, duration_seconds: float, description: str = None):
+    """
+    Add a finished phase to the current request's timing breakdown
+
+    Args:
+        name: Short token used as the Server-Timing metric name (e.g. "cache")
+        duration_seconds: How long the phase took
+        description: Optional human-readable description
+    """
+    phases = _current_phases.get()
+    if phases is not None:
+        phases.append((name, description, duration_seconds * 1000))
+
+
+class _Phase:
+    """Context manager recording one phase into a request's phase list"""
+
+    __slots__ = ("phases", "name", "description", "start")
+
+    def __init__(self, phases: list, name: str, description: str):
+        self.phases = phases
+        self.name = name
+        self.description = description
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.phases.append((self.name, self.description, (time.perf_counter() - self.start) * 1000))
+        return False
+
+
+_NO_PHASE = nullcontext()
+
+
+def phase(name: str, description: str = None):
+    """Time a with-block as a Server-Timing phase (no-op outside a request)"""
+    phases = _current_phases.get()
+    if phases is None:
+        return _NO_PHASE
+    return _Phase(phases, name, description)
+
+
+def format_server_timing(phases: list, total_ms: float) -> str:
+    parts = []
+    for name, description, duration_ms in phases:
+        entry = name
+        if description:
+            entry += f';desc="{description}"'
+        parts.append(f"{entry};dur={duration_ms:.1f}")
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding Server-Timing (and optionally a JSON breakdown) to every response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = []
+        token = _current_phases.set(phases)
+        start = time.perf_counter()
+        want_detail = any(
+            key == DETAIL_REQUEST_HEADER and value.lower() == b"json"
+            for key, value in scope.get("headers", [])
+        )
+
+        async def timing_send(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(phases, total_ms).encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                if want_detail:
+                    detail = {
+                        "total_ms": round(total_ms, 1),
+                        "phases": [
+                            {"name": name, "description": description, "duration_ms": round(duration_ms, 1)}
+                            for name, description, duration_ms in phases
+                        ],
+                    }
+                    headers.append((DETAIL_RESPONSE_HEADER.lower().encode(),
+                                    json.dumps(detail, separators=(",", ":")).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timing_send)
+        finally:
+            _current_phases.reset(token)
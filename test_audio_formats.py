@@ -0,0 +1,210 @@
+"""
+Audio formats test
+Checks audio_formats.py and /generatePitchAudio content negotiation against
+fake_providers.py (started on a free port):
+  - Accept headers map to the right format (q-values, wildcards, Ogg -> Opus)
+  - no preference gets MP3 straight from ElevenLabs, correctly labeled audio/mpeg
+  - ?format=wav returns a real WAV; unknown formats are a 400
+  - with ffmpeg installed: Opus/Vorbis (and MP3 for stitched chunked audio) are
+    transcoded in a worker process without stalling the event loop, and repeats
+    come from the cache without synthesizing again; without it, a client that only
+    accepts Ogg gets a 406
+
+Usage:
+    python test_audio_formats.py
+"""
+import array
+import asyncio
+import contextlib
+import io
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import httpx
+
+from audio_formats import AudioTranscoder, negotiate_audio_format, transcoding_available
+from pitch_streaming import pcm_to_wav
+
+ROOT = Path(__file__).resolve().parent
+ALL = ["mp3", "opus", "ogg", "wav"]
+FIREFOX_AUDIO = "audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,application/ogg;q=0.7,video/*;q=0.6,*/*;q=0.5"
+PITCH = "Every day, millions of people walk hours to reach clean water. Join us and help bring it home."
+
+
+def quiet():
+    """The app prints on every cache hit and provider call"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_providers():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(port), "--latency", "fixed:0.05"],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(f"{url}/__fake__/config")
+            return process, url
+        except httpx.HTTPError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def speech_like_wav(seconds: float, sample_rate: int = 24000) -> bytes:
+    """A warbling tone: compresses like a voice, unlike the fake provider's silence"""
+    samples = array.array("h", (
+        int(8000 * math.sin(2 * math.pi * (180 + 60 * math.sin(t / sample_rate * 3)) * t / sample_rate))
+        for t in range(int(seconds * sample_rate))
+    ))
+    return pcm_to_wav([samples.tobytes()], sample_rate)
+
+
+async def transcode_with_lag(transcoder, audio, target):
+    """Transcode while measuring how late a 10ms ticker on the event loop runs"""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    encoded = await transcoder.transcode(audio, "wav", target)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return encoded, elapsed, lag
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("AUDIO FORMATS TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Negotiation
+    cases = [
+        (None, ALL, "mp3"), ("*/*", ALL, "mp3"), ("audio/*", ALL, "mp3"),
+        ("audio/ogg", ALL, "opus"), ("audio/opus", ALL, "opus"), (FIREFOX_AUDIO, ALL, "opus"),
+        ("audio/wav", ALL, "wav"), ("audio/ogg;q=0.5, audio/mpeg", ALL, "mp3"),
+        ("audio/mpeg;q=0, */*", ALL, "opus"), ("audio/flac", ALL, None),
+        ("audio/ogg", ["mp3", "wav"], None), (FIREFOX_AUDIO, ["mp3", "wav"], "wav"),
+    ]
+    wrong = [(accept, available, want, negotiate_audio_format(accept, available))
+             for accept, available, want in cases
+             if negotiate_audio_format(accept, available) != want]
+    expect(f"{len(cases) - len(wrong)}/{len(cases)} Accept headers negotiated as expected", not wrong)
+    for accept, available, want, got in wrong:
+        print(f"   {accept!r} from {available}: wanted {want}, got {got}")
+
+    ffmpeg = transcoding_available()
+    if ffmpeg:
+        transcoder = AudioTranscoder(max_workers=2)
+        source = speech_like_wav(30)
+        sizes = {"wav": len(source)}
+        for target in ("opus", "ogg"):
+            encoded, elapsed, lag = asyncio.run(transcode_with_lag(transcoder, source, target))
+            sizes[target] = len(encoded)
+            expect(f"30s WAV -> {target}: {len(encoded) // 1024} KB in {elapsed:.2f}s, "
+                   f"event loop lag {lag * 1000:.0f}ms",
+                   encoded.startswith(b"OggS") and lag < 0.05)
+        transcoder.shutdown()
+        print(f"   sizes: " + ", ".join(f"{k} {v // 1024} KB" for k, v in sizes.items())
+              + f" (128 kbps MP3 would be {30 * 128 // 8} KB)")
+    else:
+        print("⏭️  ffmpeg not installed: transcoding checks skipped")
+
+    workdir = tempfile.mkdtemp(prefix="audio-formats-")
+    fake, url = start_fake_providers()
+    try:
+        os.environ.update({
+            "ELEVENLABS_API_KEY": "fake", "ELEVENLABS_BASE_URL": url, "GEMINI_API_KEY": "fake",
+            "GEMINI_BASE_URL": url, "CACHE_REFRESH_ENABLED": "false", "LOOP_MONITOR_ENABLED": "false",
+        })
+        os.environ.pop("HONEYCOMB_API_KEY", None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+            client = TestClient(app_main.app)
+
+        def post(query="", accept=None):
+            headers = {"Accept": accept} if accept else {}
+            with quiet():
+                return client.post(f"/generatePitchAudio{query}", json={"pitch_text": PITCH}, headers=headers)
+
+        response = post()
+        expect("no preference: MP3 from ElevenLabs, labeled audio/mpeg",
+               response.headers["content-type"] == "audio/mpeg" and response.content[:2] == b"\xff\xfb"
+               and 'filename="pitch.mp3"' in response.headers["content-disposition"])
+        response = post("?format=wav")
+        with wave.open(io.BytesIO(response.content)) as wav:
+            expect(f"?format=wav: a real {wav.getnframes() / wav.getframerate():.2f}s WAV",
+                   response.headers["content-type"] == "audio/wav" and wav.getnframes() > 0)
+        expect("Accept: audio/wav honored", post(accept="audio/x-wav").headers["content-type"] == "audio/wav")
+        expect("unknown ?format= is a 400", post("?format=flac").status_code == 400)
+        expect("responses vary on Accept", post().headers.get("vary") == "Accept")
+
+        if ffmpeg:
+            response = post("?mode=chunked", accept="audio/ogg")
+            start = time.perf_counter()
+            repeat = post("?mode=chunked", accept="audio/ogg")
+            repeat_s = time.perf_counter() - start
+            expect(f"Accept: audio/ogg gets Opus; repeat served from the cache ({repeat_s * 1000:.0f}ms)",
+                   response.headers["content-type"] == "audio/ogg; codecs=opus"
+                   and response.content.startswith(b"OggS") and repeat.content == response.content)
+            whole = post(accept="audio/ogg")
+            before = httpx.get(f"{url}/__fake__/stats").json().get("elevenlabs:200", 0)
+            repeat = post(accept="audio/ogg")
+            calls = httpx.get(f"{url}/__fake__/stats").json().get("elevenlabs:200", 0) - before
+            expect(f"whole pitch as Opus: the repeat makes {calls} TTS calls",
+                   whole.content.startswith(b"OggS") and repeat.content == whole.content and calls == 0)
+            response = post("?mode=chunked")
+            expect("chunked audio without a preference is transcoded to MP3",
+                   response.headers["content-type"] == "audio/mpeg" and len(response.content) > 0)
+        else:
+            response = post(accept="audio/ogg")
+            expect("without ffmpeg, an Ogg-only client gets a 406", response.status_code == 406)
+            expect("without ffmpeg, ?format=opus is a 406", post("?format=opus").status_code == 406)
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+ResponseCache backend test
+Runs the same checks against the file backend and the Redis-protocol backend
+(served by an in-process redis_protocol.py stand-in): round trips, pipelined
+get_many/set_many, per-endpoint namespacing, server-side TTLs and single-flight
+
+Usage:
+    python test_cache_backends.py
+    python test_cache_backends.py --redis-url redis://127.0.0.1:6379/0
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from cache_backends import FileCacheBackend, RedisCacheBackend
+from cache_manager import ResponseCache
+from redis_protocol import RedisStandIn
+
+
+def quiet():
+    """ResponseCache prints on every hit and write"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def check_backend(make_cache, server_side_ttl: bool) -> list:
+    failures = []
+
+    def expect(label, condition):
+        print(f"  {'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    cache = make_cache(ttl_hours=24)
+    with quiet():
+        cache.clear_all()
+        cache.set("investors", {"idea": 1}, {"text": "one"})
+        hit = cache.get("investors", {"idea": 1})
+        miss = cache.get("investors", {"idea": 2})
+        other_endpoint = cache.get("grantInfo", {"idea": 1})
+    expect("set/get round trip", hit == {"text": "one"})
+    expect("unknown key misses", miss is None)
+    expect("endpoints are separate namespaces", other_endpoint is None)
+
+    with quiet():
+        cache.set_many("grantInfo", [({"idea": i}, {"text": f"grant {i}"}) for i in range(10)])
+        found = cache.get_many("grantInfo", [{"idea": i} for i in range(12)])
+    expect("set_many/get_many round trip", found[:10] == [{"text": f"grant {i}"} for i in range(10)])
+    expect("get_many misses stay in order", found[10:] == [None, None])
+
+    with quiet():
+        stats = cache.get_stats()
+    expect(f"stats count entries ({stats['total']})", stats["total"] == 11)
+
+    # One generation for a key many threads miss at once
+    generations = []
+
+    def regenerate():
+        if cache.get("pitch", {"idea": 7}) is not None:
+            return
+        with cache.single_flight("pitch", {"idea": 7}):
+            if cache.get("pitch", {"idea": 7}, record_stats=False) is not None:
+                return
+            generations.append(1)
+            time.sleep(0.1)
+            cache.set("pitch", {"idea": 7}, {"text": "pitch"})
+
+    # redirect_stdout isn't thread-safe: silence once around all threads
+    with quiet():
+        threads = [threading.Thread(target=regenerate) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    expect(f"single-flight: {len(generations)} generation(s) for 8 threads", len(generations) == 1)
+
+    # Expiry: a fresh ResponseCache with a tiny TTL over the same storage
+    short = make_cache(ttl_hours=0.5 / 3600)
+    with quiet():
+        short.set("roadmap", {"idea": 1}, {"text": "soon gone"})
+        before = short.get("roadmap", {"idea": 1})
+        time.sleep(0.7)
+        after = short.get("roadmap", {"idea": 1})
+        removed = short.clear_expired()
+    expect("entries expire after the TTL", before is not None and after is None)
+    if server_side_ttl:
+        stats = short.get_stats()
+        expect("expired entries are gone server-side (nothing to sweep)",
+               removed == 0 and stats["per_endpoint"].get("roadmap", 0) == 0)
+
+    with quiet():
+        cleared = cache.clear_all()
+    expect(f"clear_all removes everything ({cleared})", cache.get_stats()["total"] == 0)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResponseCache backend test")
+    parser.add_argument("--redis-url", help="Test this server instead of an in-process stand-in")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("RESPONSE CACHE BACKEND TEST")
+    print("=" * 70)
+
+    cache_dir = tempfile.mkdtemp(prefix="cache-backends-")
+    server = None if args.redis_url else RedisStandIn(port=0).start()
+    redis_url = args.redis_url or server.url
+    failures = []
+    try:
+        print("\n📁 file backend")
+        failures += check_backend(
+            lambda ttl_hours: ResponseCache(ttl_hours=ttl_hours, backend=FileCacheBackend(cache_dir)),
+            server_side_ttl=False,
+        )
+        print(f"\n🧱 redis backend ({redis_url})")
+        failures += check_backend(
+            lambda ttl_hours: ResponseCache(ttl_hours=ttl_hours, backend=RedisCacheBackend(redis_url, prefix="test:")),
+            server_side_ttl=True,
+        )
+    finally:
+        if server is not None:
+            server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("\n" + "=" * 70)
+    print(f"{'✅ All checks passed' if not failures else f'❌ {len(failures)} check(s) failed'}")
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Bounded cache eviction test
+Fills a FileCacheBackend with a byte budget and per-endpoint quotas and checks that:
+  - the directory never exceeds the budget, even with several writer processes
+  - endpoint quotas only evict that endpoint's entries
+  - lru keeps recently read entries, lfu keeps frequently read ones
+  - the index occupancy matches what is actually on disk
+
+Usage:
+    python test_cache_eviction.py
+"""
+import contextlib
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from cache_backends import FileCacheBackend
+from cache_manager import ResponseCache
+
+ENTRY_BYTES = 2000
+
+
+def quiet():
+    """ResponseCache prints on every hit and write"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def payload(i: int) -> dict:
+    return {"text": f"{i}:" + "x" * ENTRY_BYTES}
+
+
+def make_cache(cache_dir, **kwargs) -> ResponseCache:
+    return ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir, **kwargs))
+
+
+def disk_bytes(cache_dir) -> int:
+    return sum(f.stat().st_size for f in Path(cache_dir).glob("*.json"))
+
+
+def writer(cache_dir: str, max_bytes: int, worker: int, count: int):
+    with quiet():
+        cache = make_cache(cache_dir, max_bytes=max_bytes)
+        for i in range(count):
+            cache.set("stress", {"worker": worker, "i": i}, payload(i))
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("BOUNDED CACHE EVICTION TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    base = tempfile.mkdtemp(prefix="cache-eviction-")
+    try:
+        # Global budget: 200 entries written into room for ~50
+        budget = 50 * (ENTRY_BYTES + 200)
+        cache_dir = os.path.join(base, "budget")
+        with quiet():
+            cache = make_cache(cache_dir, max_bytes=budget)
+            for i in range(200):
+                cache.set("investors", {"i": i}, payload(i))
+            stats = cache.get_stats()
+        expect(f"budget held: {disk_bytes(cache_dir)} bytes on disk <= {budget}", disk_bytes(cache_dir) <= budget)
+        expect(f"index matches disk ({stats['bytes']} bytes, {stats['total']} files)",
+               stats['bytes'] == disk_bytes(cache_dir) and stats['per_endpoint']['investors']['entries'] == stats['total'])
+        expect(f"{stats['evictions']} evictions counted", stats['evictions'] == 200 - stats['total'])
+
+        # Per-endpoint quota: only the noisy endpoint is trimmed
+        cache_dir = os.path.join(base, "quota")
+        quota = 10 * (ENTRY_BYTES + 200)
+        with quiet():
+            cache = make_cache(cache_dir, endpoint_quotas={"getGrantProposal": quota})
+            for i in range(20):
+                cache.set("grantInfo", {"i": i}, payload(i))
+            for i in range(100):
+                cache.set("getGrantProposal", {"i": i}, payload(i))
+            usage = cache.get_stats()['per_endpoint']
+        expect(f"quota held: getGrantProposal {usage['getGrantProposal']['bytes']} bytes <= {quota}",
+               usage['getGrantProposal']['bytes'] <= quota)
+        expect("other endpoints untouched by the quota", usage['grantInfo']['entries'] == 20)
+
+        # Policies: lru keeps what was read recently, lfu what was read often
+        for policy in ("lru", "lfu"):
+            cache_dir = os.path.join(base, policy)
+            with quiet():
+                cache = make_cache(cache_dir, max_bytes=20 * (ENTRY_BYTES + 200), eviction=policy)
+                for i in range(20):
+                    cache.set("pitch", {"i": i}, payload(i))
+                # Entry 0 is read often but long ago; entries 10-19 are read once, recently
+                for _ in range(10):
+                    cache.get("pitch", {"i": 0})
+                for i in range(10, 20):
+                    cache.get("pitch", {"i": i})
+                for i in range(20, 30):
+                    cache.set("pitch", {"i": i}, payload(i))
+                kept_frequent = cache.get("pitch", {"i": 0}) is not None
+                kept_recent = all(cache.get("pitch", {"i": i}) is not None for i in range(15, 20))
+            if policy == "lru":
+                expect("lru keeps recently read entries", kept_recent and not kept_frequent)
+            else:
+                expect("lfu keeps the frequently read entry", kept_frequent)
+
+        # Several processes writing at once still respect the shared budget
+        cache_dir = os.path.join(base, "multiprocess")
+        with quiet():
+            make_cache(cache_dir, max_bytes=budget)
+        processes = [multiprocessing.Process(target=writer, args=(cache_dir, budget, w, 100)) for w in range(4)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        with quiet():
+            stats = make_cache(cache_dir, max_bytes=budget).get_stats()
+        expect(f"4 writer processes: {disk_bytes(cache_dir)} bytes on disk <= {budget}", disk_bytes(cache_dir) <= budget)
+        expect(f"index matches disk after concurrent writes ({stats['bytes']} vs {disk_bytes(cache_dir)})",
+               stats['bytes'] == disk_bytes(cache_dir))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
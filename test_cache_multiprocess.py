@@ -0,0 +1,169 @@
+"""
+Multi-process ResponseCache stress test
+Several processes share one cache directory (like uvicorn workers) and hammer it
+with overlapping writes, reads and sweeps, then check that:
+  - no read ever returned a partial or corrupted entry
+  - no written entry was lost (sweeps must not delete fresh entries)
+  - with single_flight, each missing key is regenerated by exactly one process
+
+Usage:
+    python test_cache_multiprocess.py
+    python test_cache_multiprocess.py --workers 16 --seconds 10
+"""
+import argparse
+import contextlib
+import hashlib
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from cache_manager import ResponseCache
+
+
+def make_payload(key: int, writer: int, seq: int, size: int) -> dict:
+    blob = f"{key}:{writer}:{seq}:" + "x" * random.randint(size // 2, size)
+    return {"key": key, "blob": blob, "check": hashlib.md5(blob.encode()).hexdigest()}
+
+
+def valid_payload(key: int, payload) -> bool:
+    return (
+        isinstance(payload, dict)
+        and payload.get("key") == key
+        and hashlib.md5(payload.get("blob", "").encode()).hexdigest() == payload.get("check")
+    )
+
+
+def quiet():
+    """ResponseCache prints on every hit and write"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def hammer(cache_dir: str, worker: int, seconds: float, keys: int, size: int, results):
+    """Random interleaved writes and reads of a small shared key set"""
+    with quiet():
+        cache = ResponseCache(cache_dir=cache_dir, ttl_hours=24)
+        written, reads, bad_reads, seq = set(), 0, 0, 0
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            key = random.randrange(keys)
+            if random.random() < 0.5:
+                seq += 1
+                cache.set("stress", {"key": key}, make_payload(key, worker, seq, size))
+                written.add(key)
+            else:
+                reads += 1
+                payload = cache.get("stress", {"key": key})
+                if payload is not None and not valid_payload(key, payload):
+                    bad_reads += 1
+        results.put({
+            "worker": worker, "writes": seq, "reads": reads, "bad_reads": bad_reads,
+            "read_errors": cache.read_errors, "written": sorted(written),
+        })
+
+
+def sweep(cache_dir: str, seconds: float, results):
+    """Continuous sweeps racing with the writers (nothing is old enough to expire)"""
+    with quiet():
+        cache = ResponseCache(cache_dir=cache_dir, ttl_hours=24)
+        sweeps, removed = 0, 0
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            removed += cache.clear_expired()
+            sweeps += 1
+            time.sleep(0.005)
+        results.put({"sweeper": True, "sweeps": sweeps, "removed": removed})
+
+
+def regenerate(cache_dir: str, keys: int, log_path: str, start_at: float):
+    """Every process asks for the same missing keys at the same moment"""
+    with quiet():
+        cache = ResponseCache(cache_dir=cache_dir, ttl_hours=24)
+        time.sleep(max(0.0, start_at - time.time()))
+        for key in range(keys):
+            data = {"key": key}
+            if cache.get("flight", data) is not None:
+                continue
+            with cache.single_flight("flight", data):
+                if cache.get("flight", data, record_stats=False) is not None:
+                    continue
+                time.sleep(0.05)  # stands in for the LLM call
+                with open(log_path, "a") as log:
+                    log.write(f"{key}\n")
+                cache.set("flight", data, make_payload(key, os.getpid(), 0, 100))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process ResponseCache stress test")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--payload-bytes", type=int, default=50000)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print(f"MULTI-PROCESS CACHE STRESS TEST ({args.workers} workers + 1 sweeper, {args.seconds}s)")
+    print("=" * 70)
+
+    cache_dir = tempfile.mkdtemp(prefix="cache-stress-")
+    failed = False
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=hammer, args=(cache_dir, i, args.seconds, args.keys, args.payload_bytes, results))
+            for i in range(args.workers)
+        ]
+        processes.append(multiprocessing.Process(target=sweep, args=(cache_dir, args.seconds, results)))
+        for p in processes:
+            p.start()
+        reports = [results.get(timeout=args.seconds + 120) for _ in processes]
+        for p in processes:
+            p.join()
+
+        workers = [r for r in reports if not r.get("sweeper")]
+        sweeper = next(r for r in reports if r.get("sweeper"))
+        writes = sum(r["writes"] for r in workers)
+        reads = sum(r["reads"] for r in workers)
+        bad_reads = sum(r["bad_reads"] for r in workers)
+        read_errors = sum(r["read_errors"] for r in workers)
+        written = set().union(*(r["written"] for r in workers))
+
+        with quiet():
+            cache = ResponseCache(cache_dir=cache_dir, ttl_hours=24)
+            lost = [key for key in written if not valid_payload(key, cache.get("stress", {"key": key}))]
+
+        print(f"📝 {writes} writes, {reads} reads, {sweeper['sweeps']} sweeps")
+        for label, count in (("corrupted reads", bad_reads), ("read errors", read_errors),
+                             ("entries removed by sweeps", sweeper["removed"]), ("lost entries", len(lost))):
+            print(f"{'✅' if count == 0 else '❌'} {label}: {count}")
+            failed |= count > 0
+
+        # Single-flight: every process misses the same keys at once
+        log_path = os.path.join(cache_dir, "generations.log")
+        start_at = time.time() + 0.5
+        flights = [
+            multiprocessing.Process(target=regenerate, args=(cache_dir, args.keys, log_path, start_at))
+            for _ in range(args.workers)
+        ]
+        for p in flights:
+            p.start()
+        for p in flights:
+            p.join()
+        with open(log_path) as log:
+            generations = [int(line) for line in log if line.strip()]
+        duplicates = len(generations) - len(set(generations))
+        print(f"{'✅' if duplicates == 0 and len(set(generations)) == args.keys else '❌'} single-flight: "
+              f"{len(generations)} generations for {args.keys} keys across {args.workers} processes")
+        failed |= duplicates > 0 or len(set(generations)) != args.keys
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Write-behind cache test
+Checks ResponseCache(write_behind=True) against a file backend:
+  - a set entry is served from the memory tier before it is persisted
+  - rewrites of a pending key are coalesced into one backend write
+  - a full queue falls back to synchronous writes instead of dropping entries
+  - close() persists everything pending (shutdown)
+  - single-flight holds its lock until the entry is on disk, so other processes
+    never regenerate it
+and reports the time set() spends on the caller's path with and without write-behind
+
+Usage:
+    python test_cache_write_behind.py
+"""
+import contextlib
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from cache_backends import FileCacheBackend
+from cache_manager import ResponseCache
+
+RESPONSE = {"choices": [{"message": {"content": "grant proposal " * 300}}]}
+
+
+def quiet():
+    """ResponseCache prints on every hit and write"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def count_files(cache_dir) -> int:
+    return sum(1 for name in os.listdir(cache_dir) if name.endswith(".json"))
+
+
+def regenerate(cache_dir: str, log_path: str, start_at: float):
+    """Every process misses the same key at once; the winner writes behind"""
+    with quiet():
+        cache = ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir), write_behind=True,
+                              write_behind_flush_interval=0.3)
+        time.sleep(max(0.0, start_at - time.time()))
+        data = {"idea": "shared"}
+        if cache.get("flight", data) is None:
+            with cache.single_flight("flight", data):
+                if cache.get("flight", data, record_stats=False) is None:
+                    with open(log_path, "a") as log:
+                        log.write(f"{os.getpid()}\n")
+                    cache.set("flight", data, RESPONSE)
+        cache.close()
+
+
+def set_latency_us(cache, count: int) -> list:
+    samples = []
+    with quiet():
+        for i in range(count):
+            start = time.perf_counter()
+            cache.set("latency", {"i": i}, RESPONSE)
+            samples.append((time.perf_counter() - start) * 1e6)
+            time.sleep(0.002)  # misses are spread out by the LLM call in front of them
+    return samples
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("WRITE-BEHIND CACHE TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    base = tempfile.mkdtemp(prefix="cache-write-behind-")
+    try:
+        cache_dir = os.path.join(base, "basic")
+        with quiet():
+            cache = ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir), write_behind=True,
+                                  write_behind_flush_interval=0.5)
+            cache.set("investors", {"i": 1}, {"v": 1})
+            served = cache.get("investors", {"i": 1})
+        expect("pending entry served from the memory tier", served == {"v": 1} and count_files(cache_dir) == 0)
+
+        with quiet():
+            for v in range(2, 6):
+                cache.set("investors", {"i": 1}, {"v": v})
+            cache.flush()
+            fresh = ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir))
+            persisted = fresh.get("investors", {"i": 1})
+        stats = cache.writer.stats
+        expect(f"rewrites coalesced ({stats['coalesced']} coalesced, {stats['persisted']} persisted)",
+               persisted == {"v": 5} and stats['persisted'] == 1)
+
+        cache_dir = os.path.join(base, "bounded")
+        with quiet():
+            cache = ResponseCache(ttl_hours=24, backend=FileCacheBackend(cache_dir), write_behind=True,
+                                  write_behind_max_pending=5, write_behind_flush_interval=60)
+            for i in range(20):
+                cache.set("grantInfo", {"i": i}, {"v": i})
+        stats = cache.writer.stats
+        expect(f"bounded queue: {len(cache.writer.pending)} pending, {stats['overflows']} written synchronously",
+               len(cache.writer.pending) <= 5 and count_files(cache_dir) == 20 - len(cache.writer.pending))
+
+        with quiet():
+            cache.close()
+        expect(f"close() persisted everything ({count_files(cache_dir)} files)", count_files(cache_dir) == 20)
+
+        cache_dir = os.path.join(base, "flight")
+        os.makedirs(cache_dir)
+        log_path = os.path.join(base, "generations.log")
+        start_at = time.time() + 0.5
+        processes = [multiprocessing.Process(target=regenerate, args=(cache_dir, log_path, start_at)) for _ in range(6)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        with open(log_path) as log:
+            generations = len(log.readlines())
+        expect(f"single-flight across 6 processes: {generations} generation(s)", generations == 1)
+
+        # Caller-path cost of set() on a miss
+        results = {}
+        for mode in ("sync", "write_behind"):
+            with quiet():
+                cache = ResponseCache(ttl_hours=24, backend=FileCacheBackend(os.path.join(base, mode)),
+                                      write_behind=mode == "write_behind")
+            samples = set_latency_us(cache, 300)
+            with quiet():
+                cache.close()
+            results[mode] = samples
+        print("\n⏱️  set() on the request path (300 misses, ~9 KB responses):")
+        for mode, samples in results.items():
+            samples.sort()
+            print(f"   {mode:<13} p50 {statistics.median(samples):7.1f}us   p95 {samples[int(len(samples) * 0.95)]:7.1f}us")
+        expect("write-behind is faster on the request path",
+               statistics.median(results["write_behind"]) < statistics.median(results["sync"]))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
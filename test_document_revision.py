@@ -0,0 +1,207 @@
+"""
+Document revision test
+Checks /reviseDocument end to end against fake_providers.py (started on a free port,
+with output-length-proportional latency):
+  - split_sections()/join_sections() round-trip a document exactly
+  - an idea edit on a sectioned proposal regenerates only the sections using that field
+  - an instruction for one section makes one provider call and leaves the rest untouched
+  - a monolithic roadmap can be revised section by section
+  - revised sections are rate-limited on their endpoint's key, not one key per section
+  - at the default 60s interval a cold sectioned proposal and a multi-section revision
+    go through on the burst budget, and revisions run on their own pool
+and reports provider calls and latency of a revision vs a full regenerate
+
+Usage:
+    python test_document_revision.py
+"""
+import contextlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from sectioned_generation import join_sections, split_sections
+
+ROOT = Path(__file__).resolve().parent
+BASE_IDEA = json.loads((ROOT / "biz_roadmap_generation" / "sample_input.json").read_text())
+
+DOCUMENT = """Intro line before any heading.
+
+## Step 1: Register
+Pick a name.
+
+```
+## not a heading (code)
+```
+
+## Step 2: Fundraise
+### Details
+Grants and donors.
+"""
+
+
+def quiet():
+    """The app prints on every cache hit and provider call"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_providers():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(port), "--latency", "fixed:0.1",
+         "--latency", "ddg=fixed:0.05", "--decode-chars-per-second", "4000"],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(f"{url}/__fake__/config")
+            return process, url
+        except httpx.HTTPError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def provider_calls(url: str) -> int:
+    stats = httpx.get(f"{url}/__fake__/stats").json()
+    return sum(count for key, count in stats.items() if not key.startswith("ddg:"))
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("DOCUMENT REVISION TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    preamble, parts = split_sections(DOCUMENT)
+    expect("split at the repeated heading level, ignoring code fences",
+           [p["title"] for p in parts] == ["Step 1: Register", "Step 2: Fundraise"])
+    expect("join_sections() restores the document exactly", join_sections(preamble, parts) == DOCUMENT)
+    _, parts = split_sections(DOCUMENT, titles={"Step 2: Fundraise"})
+    expect("known titles: only those headings start sections", [p["title"] for p in parts] == ["Step 2: Fundraise"])
+
+    workdir = tempfile.mkdtemp(prefix="document-revision-")
+    fake, url = start_fake_providers()
+    try:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake", "GEMINI_BASE_URL": url, "DDG_BASE_URL": url,
+            "RATE_LIMIT_MIN_INTERVAL_SECONDS": "0", "CACHE_REFRESH_ENABLED": "false",
+            "LOOP_MONITOR_ENABLED": "false", "SECTION_CONCURRENCY": "10",
+        })
+        for key in ("OPENROUTER_API_KEY", "CLOUDFLARE_API_KEY", "HONEYCOMB_API_KEY"):
+            os.environ.pop(key, None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+            client = TestClient(app_main.app)
+
+        def post(path, body):
+            before = provider_calls(url)
+            start = time.perf_counter()
+            with quiet():
+                response = client.post(path, json=body)
+            return response, provider_calls(url) - before, time.perf_counter() - start
+
+        # Sectioned proposal: edit one idea field
+        proposal, calls, full_s = post("/getGrantProposal?mode=sectioned", BASE_IDEA)
+        result_key = proposal.headers["x-result-key"]
+        edited = {**BASE_IDEA["idea"], "sdgs": ["SDG 13: Climate Action"]}
+        revised, revise_calls, revise_s = post("/reviseDocument", {"result_key": result_key, "idea": edited})
+        body = revised.json()
+        expect(f"sdgs edit: {revise_calls} of {calls} calls ({', '.join(body['revised_sections'])})",
+               revise_calls == 4 and body["reused_sections"] == 6)
+        print(f"   full generation {full_s:.2f}s, revision {revise_s:.2f}s")
+
+        # One section with an instruction; everything else stays byte-identical
+        revised, revise_calls, revise_s = post("/reviseDocument", {
+            "result_key": result_key, "sections": ["budget"], "instruction": "Cut the budget by half.",
+        })
+        titles = [s.title for s in app_main.GRANT_PROPOSAL_SECTIONS]
+        _, before = split_sections(proposal.json().split("\n\nCitations:")[0], titles=titles)
+        _, after = split_sections(revised.json()["content"].split("\n\nCitations:")[0], titles=titles)
+        unchanged = [a["body"] == b["body"] for a, b in zip(before, after)]
+        expect(f"budget instruction: {revise_calls} call, {sum(unchanged)} sections untouched ({revise_s:.2f}s)",
+               revise_calls == 1 and unchanged.count(False) == 1 and not unchanged[titles.index("Budget")])
+        expect("citations reused when the mission is unchanged",
+               revised.json()["content"].endswith(proposal.json()[proposal.json().index("\n\nCitations:"):]))
+
+        # Monolithic roadmap: sections come from its headings
+        roadmap, calls, full_s = post("/business_plan_roadmap", BASE_IDEA)
+        _, parts = split_sections(roadmap.json().split("\n\nCitations:")[0])
+        revised, revise_calls, revise_s = post("/reviseDocument", {
+            "result_key": roadmap.headers["x-result-key"], "sections": [parts[1]["title"]],
+            "instruction": "Add a permits step.",
+        })
+        expect(f"roadmap section revised with {revise_calls} call ({full_s:.2f}s full vs {revise_s:.2f}s)",
+               revised.status_code == 200 and revise_calls == 1 and revised.json()["reused_sections"] == len(parts) - 1)
+
+        limiter = app_main.rate_limiter.backend
+        expect("revised sections share their endpoint's rate limit",
+               limiter.last_call("business_plan_roadmap_Google Gemini") is not None
+               and limiter.last_call("business_plan_roadmap:section2_Google Gemini") is None
+               and limiter.last_call("getGrantProposal:budget_Google Gemini") is None)
+
+        # The default interval on idle endpoints: sections go through at once instead of one a minute
+        app_main.rate_limiter.min_interval = 60
+        app_main.rate_limiter.backend.last_call_time.clear()
+        cold, calls, cold_s = post("/getGrantProposal?mode=sectioned",
+                                   {**BASE_IDEA, "idea": {**BASE_IDEA["idea"], "name": "Burst Test"}})
+        threads = []
+        generate_content = app_main.generate_content
+
+        def recording(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return generate_content(*args, **kwargs)
+
+        app_main.generate_content = recording
+        titles = [part["title"] for part in parts[:3]]
+        revised, revise_calls, revise_s = post("/reviseDocument", {
+            "result_key": roadmap.headers["x-result-key"], "sections": titles, "instruction": "Tighten it.",
+        })
+        app_main.generate_content = generate_content
+        expect(f"60s interval: {calls} cold section calls in {cold_s:.2f}s, {revise_calls} revised in {revise_s:.2f}s",
+               cold.status_code == 200 and calls == 10 and cold_s < 10
+               and revised.status_code == 200 and revise_calls == len(titles) and revise_s < 10)
+        expect("revisions run on their own pool", threads and all(name.startswith("revision") for name in threads))
+        app_main.rate_limiter.min_interval = 0
+
+        missing, _, _ = post("/reviseDocument", {"result_key": "0" * 32, "instruction": "x"})
+        unknown, _, _ = post("/reviseDocument", {"result_key": result_key, "sections": ["nope"], "instruction": "x"})
+        expect("unknown result key is a 404, unknown section a 400", missing.status_code == 404 and unknown.status_code == 400)
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
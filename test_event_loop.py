@@ -0,0 +1,159 @@
+"""
+Event-loop blocking test
+Runs every endpoint in-process against fake_providers.py (started on a free port,
+0.3s per provider call) and reports any call that blocks the event loop longer than
+the threshold, with the stack of the blocking call. Every request must also
+succeed, so a broken setup can't pass by failing fast
+
+Usage:
+    python test_event_loop.py
+"""
+import asyncio
+import contextlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from loop_monitor import detect_blocking
+from sectioned_generation import split_sections
+
+THRESHOLD_SECONDS = 0.1
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+test_idea = {
+    "idea": {
+        "name": "Clean Water Initiative",
+        "mission": "Provide clean drinking water to underserved communities",
+        "goals": [
+            "Install 100 water filtration systems",
+            "Train local communities on water safety",
+        ],
+        "targetMarket": {
+            "region": "Sub-Saharan Africa",
+            "demographics": "Rural communities without access to clean water",
+        },
+        "primaryProduct": "Community water filtration systems",
+        "sdgs": ["SDG 6: Clean Water and Sanitation"],
+    }
+}
+
+# Bodies may depend on earlier responses (endpoint -> response)
+ENDPOINTS = [
+    ("/investors", test_idea),
+    ("/grantInfo", test_idea),
+    ("/getGrantProposal", test_idea),
+    ("/generatePitchText", test_idea),
+    ("/business_plan_roadmap", test_idea),
+    ("/reviseDocument", lambda responses: {
+        "result_key": responses["/business_plan_roadmap"].headers["x-result-key"],
+        "instruction": "Make it shorter.",
+        "sections": [split_sections(responses["/business_plan_roadmap"].json())[1][0]["title"]],
+    }),
+    ("/generatePitchAudio", {"pitch_text": "Clean water for every village."}),
+]
+
+
+def quiet():
+    """The app prints on every cache hit and provider call"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_providers():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(port), "--latency", "fixed:0.3"],
+        cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(f"{url}/__fake__/config")
+            return process, url
+        except httpx.HTTPError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def app_frames(stack: str, count: int = 2) -> str:
+    """The innermost frames from this repo, plus the call that actually blocked"""
+    lines = stack.rstrip().splitlines()
+    frames = [lines[i:i + 2] for i in range(len(lines)) if lines[i].startswith("  File ")]
+    ours = [frame for frame in frames if frame[0].startswith(f'  File "{APP_DIR}')]
+    return "\n".join(line for frame in ours[-count:] + frames[-1:] for line in frame)
+
+
+async def main():
+    print("\n" + "=" * 70)
+    print(f"EVENT-LOOP BLOCKING TEST (threshold {THRESHOLD_SECONDS * 1000:.0f}ms)")
+    print("=" * 70)
+
+    workdir = tempfile.mkdtemp(prefix="event-loop-")
+    fake, url = start_fake_providers()
+    failures = 0
+    try:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake", "GEMINI_BASE_URL": url, "DDG_BASE_URL": url,
+            "ELEVENLABS_API_KEY": "fake", "ELEVENLABS_BASE_URL": url,
+            "RATE_LIMIT_MIN_INTERVAL_SECONDS": "0", "CACHE_REFRESH_ENABLED": "false",
+            "HONEYCOMB_API_KEY": "",
+        })
+        for key in ("OPENROUTER_API_KEY", "CLOUDFLARE_API_KEY"):
+            os.environ.pop(key, None)
+        os.chdir(workdir)
+        with quiet():
+            from main import app
+
+        responses = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=300) as client:
+            for endpoint, body in ENDPOINTS:
+                if callable(body):
+                    body = body(responses)
+                with quiet():
+                    async with detect_blocking(THRESHOLD_SECONDS, raise_on_block=False) as events:
+                        response = await client.post(endpoint, json=body)
+                responses[endpoint] = response
+
+                if response.status_code != 200:
+                    failures += 1
+                    print(f"❌ {endpoint} ({response.status_code}): request failed: {response.text[:200]}")
+                    continue
+                if not events:
+                    print(f"✅ {endpoint} ({response.status_code}): no blocking")
+                    continue
+
+                failures += 1
+                worst = max(events, key=lambda event: event["blocked_ms"])
+                print(f"❌ {endpoint} ({response.status_code}): blocked {len(events)} time(s), "
+                      f"worst {worst['blocked_ms']}ms")
+                if worst["stack"]:
+                    print(app_frames(worst["stack"]))
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 70)
+    print(f"{failures}/{len(ENDPOINTS)} endpoints failed or block the event loop")
+    print("=" * 70)
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(main()) else 0)
@@ -0,0 +1,146 @@
+"""
+HTTP caching test
+Checks the pieces behind ETag / conditional-request support:
+  - Cache-Control request directives are parsed (no-cache, max-stale[=N])
+  - If-None-Match matching, including lists, "*", weak and -gzip tags
+  - ResponseCache serves expired entries only within max_stale
+  - CompressionMiddleware gzips text (single-body and streamed), marks the ETag,
+    and leaves small responses, audio and 304s alone
+
+Usage:
+    python test_http_caching.py
+"""
+import contextlib
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from cache_backends import FileCacheBackend
+from cache_manager import ResponseCache
+from compression import CompressionMiddleware
+from http_caching import etag_matches, make_etag, parse_cache_control
+
+MARKDOWN = "## Potential investors\n\n" + "- Foundation for clean water access\n" * 200
+
+
+def quiet():
+    """ResponseCache prints on every hit and write"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def make_app():
+    async def markdown(request):
+        response = JSONResponse(MARKDOWN)
+        response.headers["ETag"] = make_etag(response.body)
+        return response
+
+    async def small(request):
+        return JSONResponse("ok")
+
+    async def audio(request):
+        return Response(b"RIFF" + bytes(5000), media_type="audio/wav")
+
+    async def not_modified(request):
+        return Response(status_code=304, headers={"ETag": '"abc"'})
+
+    async def stream(request):
+        async def events():
+            for i in range(5):
+                yield f"data: sentence {i}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app = Starlette(routes=[
+        Route("/markdown", markdown), Route("/small", small), Route("/audio", audio),
+        Route("/not_modified", not_modified), Route("/stream", stream),
+    ])
+    return CompressionMiddleware(app, minimum_size=1000)
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("HTTP CACHING TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Cache-Control
+    directives = parse_cache_control("no-cache")
+    expect("no-cache parsed", directives.no_cache and directives.max_stale == 0)
+    directives = parse_cache_control('max-stale="3600", foo=bar')
+    expect("max-stale=N parsed", not directives.no_cache and directives.max_stale == 3600)
+    expect("bare max-stale accepts any age", parse_cache_control("MAX-STALE").max_stale == float("inf"))
+    expect("malformed max-stale ignored", parse_cache_control("max-stale=soon").max_stale == 0)
+    expect("missing header means no directives", not parse_cache_control(None).no_cache)
+
+    # If-None-Match
+    etag = make_etag(b"body")
+    expect("exact tag matches", etag_matches(etag, etag))
+    expect("tag in a list matches", etag_matches(f'"other", {etag}', etag))
+    expect("weak form matches", etag_matches(f"W/{etag}", etag))
+    expect("gzip representation tag matches", etag_matches(f'{etag[:-1]}-gzip"', etag))
+    expect("* matches", etag_matches("*", etag))
+    expect("different tag does not match", not etag_matches('"other"', etag))
+    expect("no header does not match", not etag_matches(None, etag))
+
+    # max-stale on ResponseCache
+    cache_dir = tempfile.mkdtemp(prefix="http-caching-")
+    try:
+        with quiet():
+            cache = ResponseCache(ttl_hours=0.5 / 3600, backend=FileCacheBackend(cache_dir))
+            cache.set("investors", {"i": 1}, {"v": 1})
+            time.sleep(0.7)
+            expired = cache.get("investors", {"i": 1})
+            within = cache.get("investors", {"i": 1}, max_stale=60)
+            beyond = cache.get("investors", {"i": 1}, max_stale=0.1)
+            unbounded = cache.get("investors", {"i": 1}, max_stale=float("inf"))
+        expect("expired entry misses by default", expired is None)
+        expect("expired entry served within max-stale", within == {"v": 1} and unbounded == {"v": 1})
+        expect("entry too stale for max-stale misses", beyond is None)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # Compression
+    client = TestClient(make_app())
+    raw = client.get("/markdown", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/markdown", headers={"Accept-Encoding": "identity"})
+    expect(f"markdown gzipped ({len(raw.content)} chars, {raw.headers.get('content-length')} bytes on the wire)",
+           raw.headers.get("content-encoding") == "gzip" and raw.json() == MARKDOWN
+           and int(raw.headers["content-length"]) < len(identity.content))
+    expect("gzip ETag is distinct from the identity ETag",
+           raw.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"')
+    expect("Vary: Accept-Encoding set", raw.headers.get("vary") == "Accept-Encoding")
+    expect("identity requested: not compressed", "content-encoding" not in identity.headers)
+    expect("gzip;q=0 is respected",
+           "content-encoding" not in client.get("/markdown", headers={"Accept-Encoding": "gzip;q=0"}).headers)
+    expect("small response sent as-is",
+           "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers)
+    expect("audio passes through",
+           "content-encoding" not in client.get("/audio", headers={"Accept-Encoding": "gzip"}).headers)
+    expect("304 passes through",
+           client.get("/not_modified", headers={"Accept-Encoding": "gzip"}).status_code == 304)
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as streamed:
+        wire = b"".join(streamed.iter_raw())
+    expect("streamed body gzipped chunk by chunk",
+           streamed.headers.get("content-encoding") == "gzip"
+           and gzip.decompress(wire).decode().count("data: sentence") == 5)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
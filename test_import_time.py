@@ -0,0 +1,87 @@
+"""
+Cold-start import budget test
+Imports main.py in fresh processes and checks that heavy dependencies stay
+unloaded until first use and that import plus the first response fit the budget
+
+Usage:
+    python test_import_time.py
+    IMPORT_BUDGET_SECONDS=0.8 python test_import_time.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+RUNS = int(os.getenv("IMPORT_BUDGET_RUNS", "5"))
+
+# Must not be imported until an endpoint actually needs them
+LAZY_MODULES = [
+    "elevenlabs",
+    "reportlab",
+    "duckduckgo_search",
+    "opentelemetry.sdk",
+    "opentelemetry.exporter",
+    "opentelemetry.instrumentation",
+]
+
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+client.get("/metrics")
+first_response = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "first_response_s": first_response - start,
+    "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_once() -> dict:
+    # No Honeycomb key: a cold start without observability must not pay for it
+    env = {**os.environ, "HONEYCOMB_API_KEY": ""}
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        capture_output=True, text=True, check=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print("\n" + "=" * 70)
+    print(f"COLD-START IMPORT BUDGET TEST ({RUNS} runs, budget {IMPORT_BUDGET_SECONDS}s)")
+    print("=" * 70)
+
+    runs = [run_once() for _ in range(RUNS)]
+    import_s = statistics.median(r["import_s"] for r in runs)
+    first_response_s = statistics.median(r["first_response_s"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+
+    print(f"⏱️  import main:        {import_s * 1000:.0f}ms (median)")
+    print(f"⏱️  first response:     {first_response_s * 1000:.0f}ms (median)")
+
+    failed = False
+    if loaded:
+        print(f"❌ Heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    else:
+        print("✅ Heavy modules stay unloaded until first use")
+
+    if import_s > IMPORT_BUDGET_SECONDS:
+        print(f"❌ Import took {import_s:.3f}s, over the {IMPORT_BUDGET_SECONDS}s budget")
+        failed = True
+    else:
+        print(f"✅ Import within the {IMPORT_BUDGET_SECONDS}s budget")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
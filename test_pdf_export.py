@@ -0,0 +1,192 @@
+"""
+PDF export test
+Checks pdf_export.py and /exportPdf:
+  - markdown becomes headings, nested lists, tables, code blocks and rules, with
+    inline formatting and links, and "<"/"&" in generated text can't break it
+  - render_pdf() produces a multi-page PDF; rendering on the PdfRenderer pool doesn't
+    stall the event loop
+  - a stored document (its X-Result-Key) exports with its title and citations; the
+    repeat is served from the PDF cache, If-None-Match gets a 304, and an unknown key
+    is a 404
+
+Usage:
+    python test_pdf_export.py
+"""
+import asyncio
+import contextlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pdf_export import PdfRenderer, inline_markup, markdown_to_flowables, render_pdf
+
+ROOT = Path(__file__).resolve().parent
+
+MARKDOWN = """# Clean Water Initiative
+
+Filters for **500 people** per village, *maintained locally* (costs < $5 & falling).
+
+## Milestones
+
+1. Pilot in `Kisumu`
+2. Scale out
+   - train technicians
+   - partner with clinics
+3. Measure impact
+
+- see https://example.org/report.
+
+| Quarter | Budget |
+|---|---:|
+| Q1 | $20k |
+| Q2 | $35k |
+
+---
+
+```
+impact = people * liters
+```
+"""
+
+
+def quiet():
+    """The app prints on every cache hit"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def page_count(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+
+
+async def render_with_lag(renderer, markdown):
+    """Render on the pool while measuring how late a 10ms ticker on the event loop runs"""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    pdf = await renderer.render(markdown)
+    done.set()
+    await tick
+    return pdf, lag
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("PDF EXPORT TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Parsing
+    kinds = [type(f).__name__ for f in markdown_to_flowables(MARKDOWN)]
+    expect(f"markdown parsed into {', '.join(kinds)}", kinds == [
+        "Paragraph", "Paragraph", "Paragraph", "ListFlowable", "ListFlowable", "Table", "HRFlowable", "Preformatted",
+    ])
+    expect("inline bold, italic, code and escaping",
+           inline_markup("**a** *b* `<c>` x < y & z") ==
+           '<b>a</b> <i>b</i> <font face="Courier">&lt;c&gt;</font> x &lt; y &amp; z')
+    expect("links and bare URLs, trailing punctuation left out",
+           inline_markup("[site](https://a.org/?x=1&y=2) or https://b.org.") ==
+           '<link href="https://a.org/?x=1&amp;y=2" color="blue">site</link> or '
+           '<link href="https://b.org" color="blue">https://b.org</link>.')
+    expect("snake_case and arithmetic aren't italicized", inline_markup("snake_case_name 2*3*4") ==
+           "snake_case_name 2*3*4")
+    unbalanced = markdown_to_flowables("Unbalanced **bold *italic** end*")
+    expect("markup that doesn't nest falls back to plain text", len(unbalanced) == 1)
+
+    # Rendering
+    long_markdown = "\n\n".join(f"## Part {i}\n\n" + "Clean water for every village. " * 40 for i in range(20))
+    pdf = render_pdf(long_markdown, "Long Proposal")
+    expect(f"render_pdf: a {page_count(pdf)}-page PDF of {len(pdf) // 1024} KB",
+           pdf.startswith(b"%PDF") and page_count(pdf) > 3)
+    renderer = PdfRenderer(max_workers=1)
+    asyncio.run(renderer.render("# warm up"))  # the worker's first render imports ReportLab
+    pooled, lag = asyncio.run(render_with_lag(renderer, long_markdown * 3))
+    renderer.shutdown()
+    expect(f"rendered on the pool, event loop lag {lag * 1000:.0f}ms",
+           pooled.startswith(b"%PDF") and lag < 0.05)
+
+    # Endpoint
+    workdir = tempfile.mkdtemp(prefix="pdf-export-")
+    try:
+        os.environ.update({"CACHE_REFRESH_ENABLED": "false", "LOOP_MONITOR_ENABLED": "false"})
+        os.environ.pop("HONEYCOMB_API_KEY", None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+        with TestClient(app_main.app) as client:
+            content = MARKDOWN + "\n\nCitations:\n[1] Water report: https://example.org/water"
+            with quiet():
+                result_key = app_main.remember_document(
+                    "business_plan_roadmap", content, {"name": "Clean Water Initiative"})
+
+            renders = []
+            render = app_main.pdf_renderer.render
+
+            async def counting_render(markdown, title=None):
+                renders.append(title)
+                return await render(markdown, title)
+
+            app_main.pdf_renderer.render = counting_render
+
+            def export(body, headers=None):
+                start = time.perf_counter()
+                with quiet():
+                    response = client.post("/exportPdf", json=body, headers=headers or {})
+                return response, time.perf_counter() - start
+
+            response, cold_s = export({"result_key": result_key})
+            expect(f"result_key exports as a PDF ({len(response.content) // 1024} KB in {cold_s:.2f}s)",
+                   response.status_code == 200 and response.headers["content-type"] == "application/pdf"
+                   and response.content.startswith(b"%PDF")
+                   and int(response.headers["content-length"]) == len(response.content)
+                   and 'filename="non-profit-business-plan-and-roadmap-for-clean-water-initiative.pdf"'
+                   in response.headers["content-disposition"])
+            expect("title and citations end up in the PDF",
+                   b"Non-profit business plan and roadmap for Clean Water Initiative" in response.content
+                   and b"https://example.org/water" in response.content)
+
+            repeat, repeat_s = export({"result_key": result_key})
+            expect(f"repeat served from the PDF cache ({repeat_s * 1000:.0f}ms, {len(renders)} render)",
+                   repeat.content == response.content and repeat.headers["etag"] == response.headers["etag"]
+                   and len(renders) == 1)
+            not_modified, _ = export({"result_key": result_key}, {"If-None-Match": response.headers["etag"]})
+            expect("If-None-Match gets a 304", not_modified.status_code == 304 and not not_modified.content)
+
+            retitled, _ = export({"result_key": result_key, "title": "Board Copy"})
+            expect("a different title is a different PDF", retitled.status_code == 200
+                   and retitled.headers["etag"] != response.headers["etag"]
+                   and 'filename="board-copy.pdf"' in retitled.headers["content-disposition"])
+            markdown_only, _ = export({"content": "# Just markdown\n\nHello."})
+            expect("plain markdown content exports too", markdown_only.status_code == 200
+                   and markdown_only.content.startswith(b"%PDF"))
+            expect("unknown result_key is a 404", export({"result_key": "nope"})[0].status_code == 404)
+            expect("nothing to export is a 400", export({})[0].status_code == 400)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
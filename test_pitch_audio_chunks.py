@@ -0,0 +1,158 @@
+"""
+Chunked pitch audio test
+Checks /generatePitchAudio?mode=chunked against fake_providers.py (started on a free port):
+  - pcm_to_wav() writes a valid WAV with every sentence plus the pauses between them
+  - every sentence is synthesized once, concurrently, and stitched into one WAV
+  - editing one sentence re-synthesizes only that sentence; a repeat makes no TTS call
+  - an unknown mode is a 400
+
+Usage:
+    python test_pitch_audio_chunks.py
+"""
+import contextlib
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import httpx
+
+from pitch_streaming import pcm_to_wav, split_sentences
+
+ROOT = Path(__file__).resolve().parent
+SAMPLE_RATE = 24000
+AUDIO_BYTES_PER_CHAR = 100
+
+PITCH = (
+    "Every day, millions of people walk hours to reach clean water. "
+    "Clean Water Initiative installs community filtration systems in rural villages. "
+    "Each system serves five hundred people and is maintained by trained locals. "
+    "Our work advances SDG 6 and strengthens community health. "
+    "In two years we have reached twelve villages across Kenya. "
+    "Join us and help bring clean water to every home."
+)
+
+
+def quiet():
+    """The app prints on every cache hit and provider call"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_providers():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(port), "--latency", "fixed:0.1",
+         "--audio-bytes-per-char", str(AUDIO_BYTES_PER_CHAR)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(f"{url}/__fake__/config")
+            return process, url
+        except httpx.HTTPError:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def tts_calls(url: str) -> int:
+    return httpx.get(f"{url}/__fake__/stats").json().get("elevenlabs:200", 0)
+
+
+def pcm_frames(sentence: str) -> int:
+    """fake_providers.py returns len(text) * audio_bytes_per_char bytes of 16-bit PCM"""
+    return len(sentence) * AUDIO_BYTES_PER_CHAR // 2
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("CHUNKED PITCH AUDIO TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Stitching
+    stitched = pcm_to_wav([b"\x01\x00" * 100, b"\x02\x00" * 50 + b"\x03"], 8000, pause_ms=10)
+    with wave.open(io.BytesIO(stitched)) as wav:
+        expect("stitched WAV: 16-bit mono, both chunks plus one pause (odd byte dropped)",
+               wav.getsampwidth() == 2 and wav.getnchannels() == 1 and wav.getframerate() == 8000
+               and wav.getnframes() == 100 + 80 + 50)
+
+    sentences = split_sentences(PITCH)
+    expect(f"pitch splits into {len(sentences)} sentences", len(sentences) == 6)
+
+    workdir = tempfile.mkdtemp(prefix="pitch-audio-chunks-")
+    fake, url = start_fake_providers()
+    try:
+        os.environ.update({
+            "ELEVENLABS_API_KEY": "fake", "ELEVENLABS_BASE_URL": url, "GEMINI_API_KEY": "fake",
+            "GEMINI_BASE_URL": url, "CACHE_REFRESH_ENABLED": "false", "LOOP_MONITOR_ENABLED": "false",
+            "PITCH_TTS_CONCURRENCY": "6", "PITCH_PCM_SAMPLE_RATE": str(SAMPLE_RATE),
+        })
+        os.environ.pop("HONEYCOMB_API_KEY", None)
+        os.chdir(workdir)
+        sys.path.insert(0, str(ROOT))
+        with quiet():
+            import main as app_main
+            from fastapi.testclient import TestClient
+            client = TestClient(app_main.app)
+            app_main.get_elevenlabs_client()  # the SDK import would dominate the first timing
+
+        def post(text, mode="chunked"):
+            before = tts_calls(url)
+            start = time.perf_counter()
+            with quiet():
+                response = client.post(f"/generatePitchAudio?mode={mode}&format=wav", json={"pitch_text": text})
+            return response, tts_calls(url) - before, time.perf_counter() - start
+
+        response, calls, cold_s = post(PITCH)
+        with wave.open(io.BytesIO(response.content)) as wav:
+            frames, rate = wav.getnframes(), wav.getframerate()
+        pauses = (len(sentences) - 1) * (SAMPLE_RATE * 150 // 1000)
+        expect(f"cold: {calls} TTS calls in {cold_s:.2f}s, one WAV of {frames / rate:.2f}s",
+               response.status_code == 200 and response.headers["content-type"] == "audio/wav"
+               and calls == len(sentences) and rate == SAMPLE_RATE
+               and frames == sum(pcm_frames(s) for s in sentences) + pauses)
+        expect("sentences synthesized concurrently", cold_s < 0.1 * len(sentences))
+
+        edited = PITCH.replace("twelve villages", "fifteen villages")
+        response, calls, edit_s = post(edited)
+        expect(f"one sentence edited: {calls} TTS call ({edit_s:.2f}s)", response.status_code == 200 and calls == 1)
+
+        response, calls, repeat_s = post(PITCH)
+        expect(f"repeat: {calls} TTS calls ({repeat_s:.3f}s)", response.status_code == 200 and calls == 0)
+
+        response, _, _ = post(PITCH, mode="sentences")
+        expect("unknown mode is a 400", response.status_code == 400)
+    finally:
+        fake.terminate()
+        fake.wait()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Streaming pitch test
+Checks pitch_streaming.py and /streamPitch:
+  - SentenceSplitter cuts streamed text at sentence ends and paragraph breaks, not at
+    abbreviations, initials or decimals, and merges very short sentences
+  - stream_pitch_audio() yields audio in sentence order even when later sentences
+    finish synthesizing first, starts speaking before the text stream ends, and
+    bounds concurrent synthesis
+  - end to end against fake_providers.py (streaming LLM + TTS) served by uvicorn:
+    first audio (median of three cold requests, after a warm-up that pays for the lazy
+    imports) arrives long before the full transcript would, the audio covers every
+    sentence, a provider that fails before streaming (Gemini, pointed at a closed port)
+    falls back to the next, and the transcript is shared with /generatePitchText's cache
+
+Usage:
+    python test_pitch_streaming.py
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from fake_providers import SILENT_MP3_FRAME
+from pitch_streaming import SentenceSplitter, stream_pitch_audio
+
+ROOT = Path(__file__).resolve().parent
+BASE_IDEA = json.loads((ROOT / "biz_roadmap_generation" / "sample_input.json").read_text())
+AUDIO_BYTES_PER_CHAR = 400
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, process):
+    deadline = time.time() + 30
+    while True:
+        try:
+            httpx.get(url)
+            return
+        except httpx.HTTPError:
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise
+            time.sleep(0.1)
+
+
+def split_all(pieces) -> list:
+    splitter = SentenceSplitter()
+    sentences = []
+    for piece in pieces:
+        sentences.extend(splitter.feed(piece))
+    return sentences + splitter.flush()
+
+
+def check_pipeline(expect):
+    sentences = [f"Sentence number {i} is spoken here." for i in range(8)]
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    contexts = []
+    produced_at = []
+
+    def text_deltas():
+        for sentence in sentences:
+            for word in sentence.split(" "):
+                time.sleep(0.005)
+                yield word + " "
+        produced_at.append(time.perf_counter())
+
+    def synthesize(sentence, previous_text):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        contexts.append(previous_text)
+        time.sleep(random.uniform(0.01, 0.08))  # later sentences often finish first
+        with lock:
+            running["now"] -= 1
+        return sentence.encode()
+
+    async def consume():
+        chunks = []
+        first_at = None
+        async for chunk in stream_pitch_audio(text_deltas(), synthesize, max_concurrency=2):
+            first_at = first_at or time.perf_counter()
+            chunks.append(chunk.decode())
+        return chunks, first_at
+
+    chunks, first_at = asyncio.run(consume())
+    expect("audio comes back in sentence order", chunks == sentences)
+    expect("first audio before the text stream ended", first_at < produced_at[0])
+    expect(f"at most 2 sentences synthesized at once (peak {running['peak']})", running["peak"] <= 2)
+    expect("each sentence gets the preceding text as context",
+           sorted(contexts, key=len)[-1].endswith(sentences[-2]) and "" in contexts)
+
+    def failing_deltas():
+        yield "One whole sentence goes first. "
+        raise RuntimeError("provider dropped the stream")
+
+    async def consume_failure():
+        chunks = []
+        try:
+            async for chunk in stream_pitch_audio(failing_deltas(), synthesize):
+                chunks.append(chunk)
+        except RuntimeError as e:
+            return chunks, str(e)
+        return chunks, None
+
+    chunks, error = asyncio.run(consume_failure())
+    expect("a broken text stream raises after the audio already produced",
+           len(chunks) == 1 and error == "provider dropped the stream")
+
+
+def expected_audio_bytes(transcript: str) -> int:
+    """fake_providers.py returns audio proportional to each sentence's length"""
+    size = 0
+    for sentence in split_all([transcript]):
+        frames = max(1, len(sentence) * AUDIO_BYTES_PER_CHAR // len(SILENT_MP3_FRAME))
+        size += frames * len(SILENT_MP3_FRAME)
+    return size
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("STREAMING PITCH TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Sentence splitting
+    text = ("Dr. Smith leads the project. We raised $2.5 million in 2024! "
+            "J. Doe joined, e.g. as CTO. Why now?\n\n## Our Plan\n\nWe build filters, "
+            "train locals and scale fast. Ok. Join us today")
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    expect("sentences cut at . ! ? and paragraph breaks only", split_all(pieces) == [
+        "Dr. Smith leads the project.",
+        "We raised $2.5 million in 2024!",
+        "J. Doe joined, e.g. as CTO.",
+        "Why now? Our Plan We build filters, train locals and scale fast.",
+        "Ok. Join us today",
+    ])
+    expect("chunking of the stream doesn't change the split", split_all([text]) == split_all(pieces))
+
+    check_pipeline(expect)
+
+    # End to end
+    workdir = tempfile.mkdtemp(prefix="pitch-streaming-")
+    fake_port, app_port, closed_port = free_port(), free_port(), free_port()
+    fake_url, app_url = f"http://127.0.0.1:{fake_port}", f"http://127.0.0.1:{app_port}"
+    fake = subprocess.Popen(
+        [sys.executable, "fake_providers.py", "--port", str(fake_port), "--latency", "fixed:0.2",
+         "--response-chars", "1200", "--decode-chars-per-second", "600",
+         "--audio-bytes-per-char", str(AUDIO_BYTES_PER_CHAR)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    env = {
+        **os.environ, "GEMINI_API_KEY": "fake", "GEMINI_BASE_URL": f"http://127.0.0.1:{closed_port}",
+        "OPENROUTER_API_KEY": "fake", "OPENROUTER_BASE_URL": f"{fake_url}/api/v1",
+        "ELEVENLABS_API_KEY": "fake", "ELEVENLABS_BASE_URL": fake_url, "DDG_BASE_URL": fake_url,
+        "RATE_LIMIT_MIN_INTERVAL_SECONDS": "0", "CACHE_REFRESH_ENABLED": "false", "HONEYCOMB_API_KEY": "",
+    }
+    env.pop("CLOUDFLARE_API_KEY", None)
+    server = None
+    try:
+        wait_until_up(f"{fake_url}/__fake__/config", fake)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(ROOT), "--port", str(app_port),
+             "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_until_up(f"{app_url}/metrics", server)
+
+        def stream_pitch(body):
+            start = time.perf_counter()
+            first = None
+            audio = b""
+            with httpx.stream("POST", f"{app_url}/streamPitch", json=body, timeout=60) as response:
+                for chunk in response.iter_bytes():
+                    first = first or time.perf_counter() - start
+                    audio += chunk
+            return response, audio, first, time.perf_counter() - start
+
+        def idea_named(name):
+            return {**BASE_IDEA, "idea": {**BASE_IDEA["idea"], "name": name}}
+
+        # The first request imports the ElevenLabs client; keep that out of the timings
+        stream_pitch(idea_named("Warm up"))
+        httpx.post(f"{fake_url}/__fake__/reset")
+        runs = [stream_pitch(idea_named(f"Run {i}")) for i in range(3)]
+        response, audio, _, _ = runs[0]
+        first_s = statistics.median(run[2] for run in runs)
+        total_s = statistics.median(run[3] for run in runs)
+        transcript = httpx.post(f"{app_url}/generatePitchText", json=idea_named("Run 0"), timeout=60).json()
+        text_only_s = 0.2 + len(transcript) / 600
+        expect(f"first audio after {first_s:.2f}s (median of 3), full transcript alone takes "
+               f"~{text_only_s:.2f}s (stream done in {total_s:.2f}s)",
+               all(run[0].status_code == 200 and run[0].headers["content-type"] == "audio/mpeg" for run in runs)
+               and first_s < text_only_s / 2)
+        expect(f"audio covers every sentence ({len(audio)} bytes of MP3 frames)",
+               audio.startswith(SILENT_MP3_FRAME[:4]) and len(audio) == expected_audio_bytes(transcript))
+        stats = httpx.get(f"{fake_url}/__fake__/stats").json()
+        expect("Gemini unreachable: one OpenRouter call per request, shared with /generatePitchText through the cache",
+               stats.get("openrouter:200") == 3 and len(stats) == 2 and stats.get("elevenlabs:200", 0) > 1)
+
+        httpx.post(f"{fake_url}/__fake__/reset")
+        httpx.post(f"{fake_url}/__fake__/config", json={"error_5xx_rate": 1.0})
+        failing = httpx.post(f"{app_url}/streamPitch", json=idea_named("X"))
+        httpx.post(f"{fake_url}/__fake__/config", json={"error_5xx_rate": 0.0})
+        expect(f"all providers failing before any audio is an error status ({failing.status_code})",
+               failing.status_code == 500)
+        with httpx.stream("POST", f"{app_url}/streamPitch", timeout=60, json=idea_named("Y")) as response:
+            audio = response.read()
+        expect("a fresh idea streams audio after the failures", response.status_code == 200 and len(audio) > 0)
+    finally:
+        for process in (server, fake):
+            if process:
+                process.terminate()
+                process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Multi-process RateLimiter accuracy test
+Several processes (like uvicorn workers) call wait_if_needed on the same endpoint at
+once, for each backend. Calls through a shared backend must be spaced at least
+min_interval apart; the per-process memory backend is shown as the baseline that
+lets N workers through N times as often. Every backend must also let a burst
+(the sections of one document) through at once and space the calls after it
+
+Usage:
+    python test_rate_limiter_multiprocess.py
+    python test_rate_limiter_multiprocess.py --workers 8 --calls 10 --interval 0.2
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from cache_manager import RateLimiter
+from rate_limit_backends import create_rate_limit_backend
+from redis_protocol import RedisStandIn
+
+
+def quiet():
+    """RateLimiter prints every wait"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def worker(spec: str, interval: float, calls: int, start_at: float, results):
+    with quiet():
+        limiter = RateLimiter(min_interval_seconds=interval, backend=create_rate_limit_backend(spec))
+        time.sleep(max(0.0, start_at - time.time()))
+        stamps = []
+        for _ in range(calls):
+            limiter.wait_if_needed("stress_provider")
+            stamps.append(time.time())
+    results.put(stamps)
+
+
+def run_backend(spec: str, workers: int, calls: int, interval: float) -> list:
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0
+    processes = [
+        multiprocessing.Process(target=worker, args=(spec, interval, calls, start_at, results))
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    stamps = sorted(t for _ in processes for t in results.get(timeout=workers * calls * interval + 60))
+    for p in processes:
+        p.join()
+    return stamps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process RateLimiter accuracy test")
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Allowed scheduling jitter per gap in seconds")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print(f"MULTI-PROCESS RATE LIMITER TEST ({args.workers} workers x {args.calls} calls, "
+          f"interval {args.interval * 1000:.0f}ms)")
+    print("=" * 70)
+
+    tmp_dir = tempfile.mkdtemp(prefix="rate-limit-")
+    server = RedisStandIn(port=0).start()
+    backends = [
+        ("memory", "memory", False),
+        ("sqlite", f"sqlite:///{os.path.join(tmp_dir, 'rate_limit.db')}", True),
+        ("redis", server.url, True),
+    ]
+
+    failed = False
+    try:
+        for name, spec, shared in backends:
+            stamps = run_backend(spec, args.workers, args.calls, args.interval)
+            gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+            too_close = sum(1 for gap in gaps if gap < args.interval - args.tolerance)
+            span = stamps[-1] - stamps[0]
+            rate = (len(stamps) - 1) / span if span > 0 else float("inf")
+            ok = too_close == 0
+            icon = ("✅" if ok else "❌") if shared else "ℹ️ "
+            print(f"{icon} {name:<7} {len(stamps)} calls, min gap {min(gaps) * 1000:6.1f}ms, "
+                  f"{too_close:>3} gaps under the interval, {rate:6.1f} calls/s "
+                  f"(limit {1 / args.interval:.1f}/s)")
+            if shared:
+                failed |= not ok
+
+        for name, spec, _ in backends:
+            backend = create_rate_limit_backend(spec)
+            waits = [backend.reserve("burst_provider", 60, 3) for _ in range(5)]
+            ok = all(abs(wait - expected) < 1 for wait, expected in zip(waits, [0, 0, 0, 60, 120]))
+            print(f"{'✅' if ok else '❌'} {name:<7} burst of 3 at a 60s interval: waits "
+                  f"{', '.join(f'{wait:.0f}s' for wait in waits)}")
+            failed |= not ok
+    finally:
+        server.stop()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("=" * 70)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
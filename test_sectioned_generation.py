@@ -0,0 +1,92 @@
+"""
+Sectioned generation test
+Checks sectioned_generation.py:
+  - a section's prompt only carries the idea fields it depends on, so editing
+    another field leaves its prompt (and cache key) unchanged
+  - SectionedGenerator returns results in section order, runs sections
+    concurrently up to its bound, and propagates the caller's context
+  - assemble() puts every section under its heading, in order
+
+Usage:
+    python test_sectioned_generation.py
+"""
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from sectioned_generation import (
+    GRANT_PROPOSAL_SECTIONS, GRANT_PROPOSAL_SYSTEM_PROMPT, Section, SectionedGenerator, assemble, section_messages,
+)
+
+IDEA = {
+    "name": "Clean Water Initiative",
+    "mission": "Provide clean drinking water to underserved communities",
+    "goals": ["Install 100 water filtration systems"],
+    "targetMarket": {"region": "Sub-Saharan Africa"},
+    "primaryProduct": "Community water filtration systems",
+    "sdgs": ["SDG 6: Clean Water and Sanitation"],
+}
+
+request_id = ContextVar("request_id", default=None)
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("SECTIONED GENERATION TEST")
+    print("=" * 70)
+
+    failures = []
+
+    def expect(label, condition):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Prompts depend only on the fields a section uses
+    edited = {**IDEA, "sdgs": ["SDG 13: Climate Action"]}
+    changed = [
+        section.key for section in GRANT_PROPOSAL_SECTIONS
+        if section_messages(section, IDEA, "grant proposal", GRANT_PROPOSAL_SYSTEM_PROMPT)
+        != section_messages(section, edited, "grant proposal", GRANT_PROPOSAL_SYSTEM_PROMPT)
+    ]
+    expect(f"an sdgs edit changes {len(changed)}/{len(GRANT_PROPOSAL_SECTIONS)} section prompts ({', '.join(changed)})",
+           set(changed) == {s.key for s in GRANT_PROPOSAL_SECTIONS if "sdgs" in s.fields})
+    budget = next(s for s in GRANT_PROPOSAL_SECTIONS if s.key == "budget")
+    prompt = section_messages(budget, IDEA, "grant proposal", GRANT_PROPOSAL_SYSTEM_PROMPT)[1]["content"]
+    expect("the name is always part of the context", "Clean Water Initiative" in prompt and "SDG 6" not in prompt)
+
+    # Ordering, concurrency bound and context propagation
+    sections = [Section(f"s{i}", f"Part {i}", "Write it, in about 10 words.") for i in range(8)]
+    generator = SectionedGenerator(max_concurrency=3)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def generate_one(section):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05 if section.key != "s0" else 0.15)  # the first section finishes last
+        with lock:
+            running["now"] -= 1
+        return f"{section.key} for {request_id.get()}"
+
+    request_id.set("req-1")
+    start = time.perf_counter()
+    contents = generator.generate(sections, generate_one)
+    elapsed = time.perf_counter() - start
+    generator.shutdown()
+    expect("results come back in section order", [c.split()[0] for c in contents] == [s.key for s in sections])
+    expect(f"at most 3 sections at once (peak {running['peak']})", running["peak"] == 3)
+    expect(f"sections overlap ({elapsed:.2f}s for 8 sections)", elapsed < 0.15 + 0.05 * 8)
+    expect("caller's context reaches every section", all(c.endswith("for req-1") for c in contents))
+
+    document = assemble(sections[:2], ["first\n", "second"])
+    expect("assembled under headings in order", document == "## Part 0\n\nfirst\n\n## Part 1\n\nsecond")
+
+    print("=" * 70)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Traffic capture and replay
+Opt-in ASGI middleware that records anonymized request bodies, endpoints (with
+their query string), the headers later requests depend on, timestamps and cache
+outcomes to a compact JSONL log, plus a replay tool that re-issues the captured
+traffic against a server at 1x or accelerated speed
+
+Capture (in the app):
+    TRAFFIC_CAPTURE_PATH=traffic.jsonl TRAFFIC_CAPTURE_SALT=some-secret uvicorn main:app
+
+Replay / inspect:
+    python traffic_capture.py summary traffic.jsonl
+    python traffic_capture.py replay traffic.jsonl --base-url http://127.0.0.1:8000 --speed 10
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+# Per-request capture record; endpoints report cache outcomes into it
+_current_record = ContextVar("traffic_capture_record", default=None)
+
+# Request headers that change the response (content negotiation, caching, 304s)
+CAPTURED_HEADERS = ("accept", "cache-control", "if-none-match")
+
+PSEUDONYM_WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima "
+    "mike november oscar papa quebec romeo sierra tango uniform victor whiskey"
+).split()
+
+
+def note_cache_outcome(hit: bool):
+    """Record a cache hit/miss for the request being captured (no-op when capture is off)"""
+    record = _current_record.get()
+    if record is not None:
+        record["hits" if hit else "misses"] += 1
+
+
+class Anonymizer:
+    """
+    Replaces every string and number with a deterministic pseudonym
+
+    Identical inputs map to identical outputs (so repeat ideas stay repeats) and
+    strings keep their length (so prompt sizes and token costs stay realistic)
+    """
+
+    def __init__(self, salt: bytes):
+        self.salt = salt
+
+    def _digest(self, value: str) -> bytes:
+        return hmac.new(self.salt, value.encode(), hashlib.sha256).digest()
+
+    def _string(self, value: str) -> str:
+        rng = random.Random(self._digest(value))
+        words = []
+        length = 0
+        while length < len(value):
+            word = rng.choice(PSEUDONYM_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)[:len(value)]
+
+    def anonymize(self, value):
+        if isinstance(value, dict):
+            return {key: self.anonymize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.anonymize(item) for item in value]
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            return int.from_bytes(self._digest(repr(value))[:3], "big")
+        return self._string(str(value))
+
+
+class CaptureWriter:
+    """
+    Appends captured requests on a background thread
+
+    Anonymizing and file writes stay off the event loop; requests are formatted and
+    appended in batches, one open() per batch
+    """
+
+    def __init__(self, path: str, format_line, batch_size: int = 100):
+        """
+        Args:
+            path: JSONL file to append to
+            format_line: Callable turning a queued request into a JSON line
+            batch_size: Maximum lines appended per write
+        """
+        self.path = path
+        self.format_line = format_line
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, request: tuple):
+        with self._lock:
+            # Started on first use, and again if the app is started after a shutdown
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+            self._queue.put(request)
+
+    def close(self, timeout: float = 10):
+        """Write everything queued and stop the thread"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [request for request in batch if request is not None]
+            lines = []
+            for request in batch:
+                try:
+                    lines.append(self.format_line(*request) + "\n")
+                except Exception as e:
+                    print(f"⚠️ Traffic capture format error: {e}")
+            if not lines:
+                continue
+            try:
+                with open(self.path, "a") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                print(f"⚠️ Traffic capture write error: {e}")
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware appending one compact JSON line per POST request"""
+
+    def __init__(self, app, path: str, salt: str = None):
+        """
+        Args:
+            app: ASGI application
+            path: JSONL file to append captured requests to
+            salt: Secret for pseudonymization. Use the same value on every worker
+                so repeat ideas stay recognizable across processes
+        """
+        self.app = app
+        self.path = path
+        if not salt:
+            print("⚠️  TRAFFIC_CAPTURE_SALT not set - pseudonyms will differ per process")
+        self.anonymizer = Anonymizer((salt or secrets.token_hex(16)).encode())
+        self.writer = CaptureWriter(path, self._format)
+        print(f"📼 Traffic capture enabled: {path}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.app(scope, receive, self._flushing_send(send))
+            return
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        body_parts = []
+        status = {"code": 500}
+        record = {"hits": 0, "misses": 0}
+        token = _current_record.set(record)
+        start = time.time()
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body_parts.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            _current_record.reset(token)
+            headers = {}
+            for name, value in scope.get("headers", []):
+                name = name.decode("latin-1").lower()
+                if name in CAPTURED_HEADERS:
+                    headers[name] = value.decode("latin-1")
+            self.writer.put((scope["path"], scope.get("query_string", b"").decode("latin-1"), headers,
+                             start, time.time() - start, b"".join(body_parts), status["code"], record))
+
+    def _flushing_send(self, send):
+        """Write the remaining captured requests before the server reports shutdown complete"""
+        async def lifespan_send(message):
+            if message["type"] == "lifespan.shutdown.complete":
+                await asyncio.to_thread(self.writer.close)
+            await send(message)
+        return lifespan_send
+
+    def _format(self, path: str, query: str, headers: dict, start: float, elapsed: float, raw_body: bytes,
+                status: int, record: dict) -> str:
+        try:
+            body = json.loads(raw_body) if raw_body else None
+        except ValueError:
+            body = None
+
+        if record["hits"] and not record["misses"]:
+            cache = "hit"
+        elif record["misses"] and not record["hits"]:
+            cache = "miss"
+        elif record["hits"]:
+            cache = "mixed"
+        else:
+            cache = None
+
+        line = {
+            "t": round(start, 3),
+            "ep": path,
+            "st": status,
+            "ms": round(elapsed * 1000, 1),
+            "c": cache,
+            "b": self.anonymizer.anonymize(body),
+        }
+        if query:
+            line["q"] = query
+        if headers:
+            line["h"] = headers
+        return json.dumps(line, separators=(",", ":"))
+
+
+def load_capture(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_capture(records: list) -> dict:
+    """Endpoint ratios, repeat-body ratio, cache outcomes and burstiness of a capture"""
+    from collections import Counter
+
+    if not records:
+        return {"requests": 0}
+    endpoints = Counter(r["ep"] for r in records)
+    bodies = Counter((r["ep"], json.dumps(r["b"], sort_keys=True)) for r in records)
+    cache = Counter(r["c"] or "none" for r in records)
+    per_second = Counter(int(r["t"]) for r in records)
+    duration = records[-1]["t"] - records[0]["t"]
+    return {
+        "requests": len(records),
+        "duration_s": round(duration, 1),
+        "endpoints": {ep: round(n / len(records), 3) for ep, n in endpoints.most_common()},
+        "repeat_ratio": round(1 - len(bodies) / len(records), 3),
+        "cache_outcomes": dict(cache),
+        "captured_hit_rate": round(cache["hit"] / max(1, cache["hit"] + cache["miss"] + cache["mixed"]), 3),
+        "mean_rps": round(len(records) / duration, 3) if duration else None,
+        "peak_rps": max(per_second.values()),
+    }
+
+
+async def replay(records: list, base_url: str, speed: float, timeout: float, max_in_flight: int) -> dict:
+    """
+    Re-issue captured requests, preserving inter-arrival times divided by speed
+
+    Query strings and captured headers are sent along. A captured If-None-Match is
+    replaced by the ETag this server returned for the same request earlier, so
+    revalidations still get their 304s (or go out unconditional the first time)
+    """
+    from collections import defaultdict
+
+    import httpx
+
+    from bench_load import summarize
+
+    samples = defaultdict(list)
+    etags = {}
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        async def cache_counters():
+            try:
+                stats = (await client.get("/cache/stats")).json()["cache"]
+                return stats.get("hits", 0), stats.get("misses", 0)
+            except (httpx.HTTPError, ValueError, KeyError):
+                return None
+
+        async def issue(record):
+            url = f"{record['ep']}?{record['q']}" if record.get("q") else record["ep"]
+            headers = dict(record.get("h") or {})
+            request_key = (url, json.dumps(record["b"], sort_keys=True))
+            if "if-none-match" in headers:
+                if request_key in etags:
+                    headers["if-none-match"] = etags[request_key]
+                else:
+                    del headers["if-none-match"]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=record["b"], headers=headers)
+                    if "etag" in response.headers:
+                        etags[request_key] = response.headers["etag"]
+                    outcome = "ok" if response.status_code < 400 else "error"
+                except httpx.TimeoutException:
+                    outcome = "timeout"
+                except httpx.HTTPError:
+                    outcome = "error"
+                samples[record["ep"]].append((time.perf_counter() - start, outcome))
+
+        before = await cache_counters()
+        t0 = records[0]["t"]
+        wall_start = time.perf_counter()
+        tasks = []
+        for record in records:
+            delay = (record["t"] - t0) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(issue(record)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - wall_start
+        after = await cache_counters()
+
+    all_samples = [s for endpoint_samples in samples.values() for s in endpoint_samples]
+    result = {
+        "speed": speed,
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(all_samples, elapsed),
+        "endpoints": {ep: summarize(s, elapsed) for ep, s in sorted(samples.items())},
+    }
+    if before and after:
+        hits, misses = after[0] - before[0], after[1] - before[1]
+        result["replay_hit_rate"] = round(hits / max(1, hits + misses), 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay captured traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = sub.add_parser("summary", help="Show the request mix of a capture")
+    summary_parser.add_argument("capture")
+
+    replay_parser = sub.add_parser("replay", help="Re-issue a capture against a server")
+    replay_parser.add_argument("capture")
+    replay_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Time acceleration (10 = 10x faster)")
+    replay_parser.add_argument("--timeout", type=float, default=120.0)
+    replay_parser.add_argument("--max-in-flight", type=int, default=200)
+    replay_parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+
+    args = parser.parse_args()
+    records = sorted(load_capture(args.capture), key=lambda r: r["t"])
+    summary = summarize_capture(records)
+
+    if args.command == "summary":
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"▶️  Replaying {len(records)} requests at {args.speed}x against {args.base_url}")
+    result = asyncio.run(replay(records, args.base_url, args.speed, args.timeout, args.max_in_flight))
+    result["capture"] = summary
+
+    captured_ms = sorted(r["ms"] for r in records if r["st"] < 400)
+    if captured_ms:
+        from bench_load import percentile
+        result["captured_p50_ms"] = percentile(captured_ms, 50)
+        result["captured_p95_ms"] = percentile(captured_ms, 95)
+
+    print(json.dumps({k: v for k, v in result.items() if k != "endpoints"}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()